@@ -19,6 +19,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from database import Base
+import models  # noqa: F401  (регистрирует таблицы в Base.metadata для autogenerate)
 target_metadata = Base.metadata
 
 
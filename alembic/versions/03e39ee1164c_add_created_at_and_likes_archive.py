@@ -0,0 +1,56 @@
+"""Add created_at to likes and likes_archive table
+
+Revision ID: 03e39ee1164c
+Revises: 126733199667
+Create Date: 2026-10-19 10:02:11.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '03e39ee1164c'
+down_revision: Union[str, Sequence[str], None] = '126733199667'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# время создания старых лайков неизвестно: ставим заведомо прошлую дату, чтобы прочитанные
+# попали под архивацию, а не ждали ещё LIKES_ARCHIVE_AFTER_DAYS с момента миграции
+LEGACY_CREATED_AT = '2000-01-01 00:00:00'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # константный default заполняет существующие строки без перезаписи таблицы (Postgres 11+),
+    # новые строки дальше получают now()
+    op.add_column('likes', sa.Column('created_at', sa.DateTime(), server_default=sa.text(f"'{LEGACY_CREATED_AT}'"), nullable=False))
+    op.alter_column('likes', 'created_at', server_default=sa.text('now()'))
+    op.create_table('likes_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('from_user_tg_id', sa.String(), nullable=False),
+    sa.Column('to_user_tg_id', sa.String(), nullable=False),
+    sa.Column('text', sa.String(), nullable=True),
+    sa.Column('is_like', sa.Boolean(), nullable=False),
+    sa.Column('is_readed', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_likes_archive_from_user_tg_id'), 'likes_archive', ['from_user_tg_id'], unique=False)
+    op.create_index(op.f('ix_likes_archive_to_user_tg_id'), 'likes_archive', ['to_user_tg_id'], unique=False)
+    # индекс на живой таблице строим без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_likes_created_at'), 'likes', ['created_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_likes_created_at'), table_name='likes')
+    op.drop_index(op.f('ix_likes_archive_to_user_tg_id'), table_name='likes_archive')
+    op.drop_index(op.f('ix_likes_archive_from_user_tg_id'), table_name='likes_archive')
+    op.drop_table('likes_archive')
+    op.drop_column('likes', 'created_at')
@@ -0,0 +1,34 @@
+"""Add users like counters
+
+Revision ID: 2b14f9a05747
+Revises: 68a6baafaa2b
+Create Date: 2026-10-19 19:20:41.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b14f9a05747'
+down_revision: Union[str, Sequence[str], None] = '68a6baafaa2b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # счётчики заполняются после миграции пачками: python -m services.popularity_service
+    op.add_column('users', sa.Column('likes_received', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('dislikes_received', sa.Integer(), server_default='0', nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_likes_received', 'users', ['likes_received', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_likes_received', table_name='users')
+    op.drop_column('users', 'dislikes_received')
+    op.drop_column('users', 'likes_received')
@@ -0,0 +1,29 @@
+"""Add likes (to_user_tg_id, id) index
+
+Revision ID: 30a7d0515c15
+Revises: 7e7837408efc
+Create Date: 2026-10-19 17:32:41.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '30a7d0515c15'
+down_revision: Union[str, Sequence[str], None] = '7e7837408efc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_likes_to_user_id', 'likes', ['to_user_tg_id', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_likes_to_user_id', table_name='likes')
@@ -0,0 +1,100 @@
+"""Add olymp_catalog and olymps.catalog_id
+
+Revision ID: 3fdf5a1b19fe
+Revises: 6afd11019e7f
+Create Date: 2026-10-19 15:31:48.620377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# ключи справочника считаются той же функцией, что и в приложении: lower() в БД зависит от
+# collation/локали для кириллицы, и ключи разошлись бы с catalog_service.normalize
+from services.catalog_service import normalize
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3fdf5a1b19fe'
+down_revision: Union[str, Sequence[str], None] = '6afd11019e7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+olymps = sa.table(
+    'olymps',
+    sa.column('id', sa.Integer()),
+    sa.column('name', sa.String()),
+    sa.column('profile', sa.String()),
+    sa.column('catalog_id', sa.Integer()),
+)
+olymp_catalog = sa.table(
+    'olymp_catalog',
+    sa.column('id', sa.Integer()),
+    sa.column('name', sa.String()),
+    sa.column('profile', sa.String()),
+    sa.column('name_key', sa.String()),
+    sa.column('profile_key', sa.String()),
+)
+
+
+def backfill_catalog(bind) -> None:
+    """Дедупликация существующих названий в справочник и проставление olymps.catalog_id."""
+    entries = {}
+    olymp_ids = {}
+    for olymp_id, name, profile in bind.execute(sa.select(olymps.c.id, olymps.c.name, olymps.c.profile)):
+        key = (normalize(name), normalize(profile))
+        # как min(btrim(...)) в группе: из вариантов написания берётся наименьший
+        entries[key] = min(entries.get(key, (name.strip(), profile.strip())), (name.strip(), profile.strip()))
+        olymp_ids.setdefault(key, []).append(olymp_id)
+    if not entries:
+        return
+    bind.execute(
+        olymp_catalog.insert(),
+        [
+            {'name': name, 'profile': profile, 'name_key': key[0], 'profile_key': key[1]}
+            for key, (name, profile) in entries.items()
+        ],
+    )
+    catalog_ids = {
+        (row.name_key, row.profile_key): row.id
+        for row in bind.execute(sa.select(olymp_catalog.c.id, olymp_catalog.c.name_key, olymp_catalog.c.profile_key))
+    }
+    updates = [{'olymp_id': olymp_id, 'catalog': catalog_ids[key]} for key, ids in olymp_ids.items() for olymp_id in ids]
+    stmt = olymps.update().where(olymps.c.id == sa.bindparam('olymp_id')).values(catalog_id=sa.bindparam('catalog'))
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        bind.execute(stmt, updates[start:start + BACKFILL_BATCH_SIZE])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('olymp_catalog',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('profile', sa.String(), nullable=False),
+    sa.Column('name_key', sa.String(), nullable=False),
+    sa.Column('profile_key', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_olymp_catalog_id'), 'olymp_catalog', ['id'], unique=False)
+    op.create_index('ix_olymp_catalog_keys', 'olymp_catalog', ['name_key', 'profile_key'], unique=True)
+    op.add_column('olymps', sa.Column('catalog_id', sa.Integer(), nullable=True))
+    # SQLite не умеет добавлять внешний ключ через ALTER TABLE
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_foreign_key(op.f('olymps_catalog_id_fkey'), 'olymps', 'olymp_catalog', ['catalog_id'], ['id'])
+
+    backfill_catalog(op.get_bind())
+    op.create_index(op.f('ix_olymps_catalog_id'), 'olymps', ['catalog_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_olymps_catalog_id'), table_name='olymps')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint(op.f('olymps_catalog_id_fkey'), 'olymps', type_='foreignkey')
+    op.drop_column('olymps', 'catalog_id')
+    op.drop_index('ix_olymp_catalog_keys', table_name='olymp_catalog')
+    op.drop_index(op.f('ix_olymp_catalog_id'), table_name='olymp_catalog')
+    op.drop_table('olymp_catalog')
@@ -0,0 +1,33 @@
+"""Add users.deleted_at and likes.from_user_tg_id index
+
+Revision ID: 68a6baafaa2b
+Revises: 30a7d0515c15
+Create Date: 2026-10-19 18:05:12.734410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '68a6baafaa2b'
+down_revision: Union[str, Sequence[str], None] = '30a7d0515c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_users_deleted_at'), 'users', ['deleted_at'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_likes_from_user_tg_id'), 'likes', ['from_user_tg_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_likes_from_user_tg_id'), table_name='likes')
+    op.drop_index(op.f('ix_users_deleted_at'), table_name='users')
+    op.drop_column('users', 'deleted_at')
@@ -0,0 +1,39 @@
+"""Add full-text search indexes
+
+Revision ID: 6afd11019e7f
+Revises: e2e22fa94b61
+Create Date: 2026-10-19 14:05:32.118640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6afd11019e7f'
+down_revision: Union[str, Sequence[str], None] = 'e2e22fa94b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# должно совпадать с models.tsvector_ru_en
+TSVECTOR = "(to_tsvector('russian'::regconfig, coalesce({0}, '')) || to_tsvector('english'::regconfig, coalesce({0}, '')))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # только Postgres: на SQLite поиск идёт через FTS5-таблицу (services/search_service.init_text_search)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_description_fts', 'users', [sa.text(TSVECTOR.format('description'))], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_olymps_name_fts', 'olymps', [sa.text(TSVECTOR.format('name'))], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_olymps_name_fts', table_name='olymps')
+    op.drop_index('ix_users_description_fts', table_name='users')
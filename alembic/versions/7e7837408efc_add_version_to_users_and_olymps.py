@@ -0,0 +1,30 @@
+"""Add version to users and olymps
+
+Revision ID: 7e7837408efc
+Revises: 3fdf5a1b19fe
+Create Date: 2026-10-19 16:48:20.054931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e7837408efc'
+down_revision: Union[str, Sequence[str], None] = '3fdf5a1b19fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('olymps', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('olymps', 'version')
+    op.drop_column('users', 'version')
@@ -0,0 +1,37 @@
+"""Add olymps.is_rejected and pending moderation index
+
+Revision ID: ae208b17afe5
+Revises: 2b14f9a05747
+Create Date: 2026-10-19 19:58:03.217645
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ae208b17afe5'
+down_revision: Union[str, Sequence[str], None] = '2b14f9a05747'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('olymps', sa.Column('is_rejected', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # NULL в is_approved не попал бы ни в очередь, ни в одобренные
+    op.execute("UPDATE olymps SET is_approved = false WHERE is_approved IS NULL")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_olymps_pending', 'olymps', ['id'], unique=False,
+            postgresql_where=sa.text('is_approved = false AND is_rejected = false'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_olymps_pending', table_name='olymps')
+    op.drop_column('olymps', 'is_rejected')
@@ -0,0 +1,31 @@
+"""Add olymps search indexes
+
+Revision ID: e2e22fa94b61
+Revises: dfca98582828
+Create Date: 2026-10-19 12:40:05.771520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2e22fa94b61'
+down_revision: Union[str, Sequence[str], None] = 'dfca98582828'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_olymps_user_tg_id'), 'olymps', ['user_tg_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_olymps_profile_level_result', 'olymps', ['profile', 'level', 'result', 'user_tg_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_olymps_profile_level_result', table_name='olymps')
+    op.drop_index(op.f('ix_olymps_user_tg_id'), table_name='olymps')
@@ -0,0 +1,74 @@
+"""
+Фильтр Блума для like_exists: время построения, память, доля ложных срабатываний, цена проверки.
+
+    python benchmarks/bench_bloom.py [--likes 200000] [--error-rate 0.01] [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import models
+import queries
+from bloom import LikesBloom
+from database import Base
+
+
+def populate(engine, likes: int, users: int) -> set:
+    rng = random.Random(1)
+    pairs = set()
+    while len(pairs) < likes:
+        pairs.add((str(rng.randrange(users)), str(rng.randrange(users))))
+    with engine.begin() as conn:
+        conn.execute(insert(models.Users), [{"tg_id": str(i)} for i in range(users)])
+        conn.execute(
+            insert(models.Likes),
+            [{"from_user_tg_id": f, "to_user_tg_id": t, "is_like": True} for f, t in pairs],
+        )
+    return pairs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--likes", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    pairs = populate(engine, args.likes, args.users)
+    db = sessionmaker(bind=engine)()
+
+    bloom = LikesBloom(capacity=args.likes, error_rate=args.error_rate, max_lag=3600)
+    stats = bloom.build(db)
+    print(
+        f"build: {stats['build_seconds']:.2f} s for {stats['items']} likes, "
+        f"{stats['memory_bytes'] / 2**20:.2f} MiB, {stats['hashes']} hashes, "
+        f"capacity {stats['capacity']}, expected FP rate {stats['expected_error_rate']:.4f}"
+    )
+
+    rng = random.Random(2)
+    misses = []
+    while len(misses) < args.lookups:
+        pair = (str(rng.randrange(args.users)), str(rng.randrange(args.users)))
+        if pair not in pairs:
+            misses.append(pair)
+
+    started = time.perf_counter()
+    false_positives = sum(not bloom.definitely_absent(db, f, t, True) for f, t in misses)
+    bloom_us = (time.perf_counter() - started) / len(misses) * 1e6
+    print(f"measured FP rate: {false_positives / len(misses):.4f} ({false_positives} of {len(misses)} negatives)")
+
+    started = time.perf_counter()
+    for f, t in misses:
+        queries.like_exists(db, f, t, True)
+    db_us = (time.perf_counter() - started) / len(misses) * 1e6
+    print(f"negative lookup: bloom {bloom_us:.1f} us, database {db_us:.1f} us")
@@ -0,0 +1,115 @@
+"""
+Пропускная способность consumer.callback на брокере в памяти (broker.InMemoryChannel).
+
+    python benchmarks/bench_consumer.py [--messages 100000] [--db sqlite:///bench_consumer.db]
+
+Смесь сообщений: корректные лайки, некорректный JSON/поля и лайки несуществующим пользователям.
+Отчёт: сообщений в секунду, распределение времени обработки и SQL-запросов на сообщение по видам.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pika import BasicProperties
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import consumer
+import models
+from broker import InMemoryChannel
+from database import Base
+
+
+def make_messages(count: int, users: int, invalid_share: float, missing_share: float):
+    rng = random.Random(1)
+    for i in range(count):
+        roll = rng.random()
+        if roll < invalid_share:
+            kind = "invalid"
+            body = rng.choice([b"not json", b'{"from_user_tg_id": "1"}', json.dumps({"from_user_tg_id": "1", "to_user_tg_id": "2", "is_like": True, "text": "x" * 2000}).encode()])
+        elif roll < invalid_share + missing_share:
+            kind = "missing user"
+            body = json.dumps({"from_user_tg_id": str(rng.randrange(users)), "to_user_tg_id": f"ghost-{i}", "is_like": True}).encode()
+        else:
+            kind = "valid"
+            body = json.dumps(
+                {"from_user_tg_id": str(rng.randrange(users)), "to_user_tg_id": str(rng.randrange(users)), "is_like": rng.random() < 0.8, "text": "привет"}
+            ).encode()
+        yield kind, body
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--invalid", type=float, default=0.1, help="доля некорректных сообщений")
+    parser.add_argument("--missing", type=float, default=0.1, help="доля лайков несуществующим пользователям")
+    parser.add_argument("--db", default="sqlite://", help="URL БД; по умолчанию SQLite в памяти")
+    args = parser.parse_args()
+
+    # логирование каждого сообщения меряло бы скорость диска, а не обработчика
+    logging.getLogger("db_service").setLevel(logging.CRITICAL)
+
+    if args.db == "sqlite://":
+        engine = create_engine(args.db, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(args.db)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Users), [{"tg_id": str(i)} for i in range(args.users)])
+    consumer.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    statements = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*_):
+        global statements
+        statements += 1
+
+    ch = InMemoryChannel()
+    for kind, body in make_messages(args.messages, args.users, args.invalid, args.missing):
+        ch.basic_publish(exchange="", routing_key=consumer.LIKES_QUEUE, body=body, properties=BasicProperties(headers={"kind": kind}))
+
+    latencies = defaultdict(list)
+    queries = defaultdict(int)
+
+    def timed_callback(ch, method, properties, body):
+        before = statements
+        started = time.perf_counter()
+        consumer.callback(ch, method, properties, body)
+        kind = properties.headers["kind"]
+        latencies[kind].append(time.perf_counter() - started)
+        queries[kind] += statements - before
+
+    started = time.perf_counter()
+    ch.basic_consume(queue=consumer.LIKES_QUEUE, on_message_callback=timed_callback)
+    ch.start_consuming()
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.messages} messages in {elapsed:.1f} s: {args.messages / elapsed:,.0f} msg/s, unacked {len(ch.unacked)}")
+    print(f"{'kind':<14}{'count':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'SQL/msg':>9}")
+    everything = []
+    for kind, values in sorted(latencies.items()):
+        everything.extend(values)
+        values.sort()
+        print(
+            f"{kind:<14}{len(values):>8}{percentile(values, 0.5) * 1e3:>9.2f}{percentile(values, 0.95) * 1e3:>9.2f}"
+            f"{percentile(values, 0.99) * 1e3:>9.2f}{values[-1] * 1e3:>9.2f}{queries[kind] / len(values):>9.1f}"
+        )
+    everything.sort()
+    print(f"{'all':<14}{len(everything):>8}{percentile(everything, 0.5) * 1e3:>9.2f}{percentile(everything, 0.95) * 1e3:>9.2f}"
+          f"{percentile(everything, 0.99) * 1e3:>9.2f}{everything[-1] * 1e3:>9.2f}{sum(queries.values()) / len(everything):>9.1f}")
+    print(f"mean {statistics.mean(everything) * 1e3:.2f} ms; retries published: {sum(len(ch.queues[q]) for q in ch.queues if '.retry.' in q)}")
@@ -0,0 +1,106 @@
+"""
+Время на вызов горячих запросов: ORM Query (как было) против queries.py (lambda_stmt, Core).
+
+    python benchmarks/bench_hot_queries.py [--calls 20000] [--users 1000]
+
+SQLite в памяти, поэтому разница — почти целиком CPU на построение запроса и разбор строк.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import queries
+from database import Base
+from services.likes_service import from_active_user
+
+
+def orm_user_exists(db, tg_id):
+    return db.query(models.Users).filter(models.Users.tg_id == tg_id, models.Users.deleted_at.is_(None)).first() is not None
+
+
+def orm_like_exists(db, from_user_tg_id, to_user_tg_id, is_like):
+    return (
+        db.query(models.Likes)
+        .filter(
+            models.Likes.from_user_tg_id == from_user_tg_id,
+            models.Likes.to_user_tg_id == to_user_tg_id,
+            models.Likes.is_like == is_like,
+            from_active_user(),
+        )
+        .first()
+        is not None
+    )
+
+
+def orm_user_olymps(db, tg_id):
+    return db.query(models.Olymps).filter(models.Olymps.user_tg_id == tg_id).all()
+
+
+def populate(db, users: int) -> None:
+    db.add_all([models.Users(tg_id=str(i)) for i in range(users)])
+    db.add_all(
+        [
+            models.Olymps(name=f"olymp {n}", profile="math", level=1, user_tg_id=str(i), result=1, year="2025")
+            for i in range(users) for n in range(5)
+        ]
+    )
+    db.add_all(
+        [models.Likes(from_user_tg_id=str(i), to_user_tg_id=str((i + 1) % users), is_like=True) for i in range(users)]
+    )
+    db.commit()
+
+
+def measure(name: str, fn, calls: int, users: int) -> float:
+    Session = sessionmaker(bind=engine, autoflush=False)
+    db = Session()
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(db, i % users)
+        if i % 100 == 0:
+            # запрос обслуживается короткой сессией: identity map не накапливается
+            db.close()
+    elapsed = (time.perf_counter() - started) / calls * 1e6
+    db.close()
+    print(f"{name:<28} {elapsed:8.1f} us/call")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        populate(db, args.users)
+
+    cases = [
+        (
+            "user exists",
+            lambda db, i: orm_user_exists(db, str(i)),
+            lambda db, i: queries.user_exists(db, str(i)),
+        ),
+        (
+            "like exists",
+            lambda db, i: orm_like_exists(db, str(i), str((i + 1) % args.users), True),
+            lambda db, i: queries.like_exists(db, str(i), str((i + 1) % args.users), True),
+        ),
+        (
+            "user olymps (5 rows)",
+            lambda db, i: orm_user_olymps(db, str(i)),
+            lambda db, i: queries.user_olymps(db, str(i)),
+        ),
+    ]
+    for name, orm_fn, core_fn in cases:
+        before = measure(f"{name}: ORM", orm_fn, args.calls, args.users)
+        after = measure(f"{name}: queries", core_fn, args.calls, args.users)
+        print(f"{'':<28} {before - after:8.1f} us saved ({(1 - after / before) * 100:.0f}%)")
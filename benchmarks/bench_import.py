@@ -0,0 +1,69 @@
+"""
+Скорость и память потокового импорта олимпиад (services/import_service.py).
+
+    python benchmarks/bench_import.py [--rows 1000000] [--users 10000] [--chunk-size 5000] [--db sqlite:///bench_import.db]
+
+Строки CSV генерируются на лету, как чтение файла построчно; 2% строк некорректны,
+1% — олимпиады несуществующих пользователей. Отчёт: строк в секунду и пиковый RSS процесса.
+Пиковый RSS не должен расти с --rows.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from services.import_service import import_olymps
+from services.search_service import init_text_search
+
+PROFILES = ["Физика", "Математика", "Информатика", "Химия", "Биология"]
+
+
+def make_lines(rows: int, users: int):
+    rng = random.Random(1)
+    yield "name,profile,level,user_tg_id,result,year\n"
+    for i in range(rows):
+        roll = rng.random()
+        user = f"ghost{i}" if roll < 0.01 else str(rng.randrange(users))
+        level = 7 if roll > 0.98 else rng.randrange(4)
+        yield f"Олимпиада {rng.randrange(200)},{rng.choice(PROFILES)},{level},{user},{rng.randrange(4)},{rng.randrange(2015, 2026)}\n"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--db", default="sqlite:///bench_import.db")
+    args = parser.parse_args()
+
+    if args.db.startswith("sqlite:///") and os.path.exists(args.db[len("sqlite:///"):]):
+        os.remove(args.db[len("sqlite:///"):])
+    engine = create_engine(args.db)
+    Base.metadata.create_all(bind=engine)
+    init_text_search(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    db.execute(insert(models.Users), [{"tg_id": str(i)} for i in range(args.users)])
+    db.commit()
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    started = time.perf_counter()
+    summary = import_olymps(db, make_lines(args.rows, args.users), "csv", args.chunk_size)
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    summary.pop("errors")
+    print(summary)
+    print(f"{args.rows / elapsed:,.0f} rows/s, {elapsed:.1f} s; peak RSS {rss_before:.0f} -> {rss_after:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
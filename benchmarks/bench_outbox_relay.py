@@ -0,0 +1,67 @@
+"""
+Пропускная способность relay outbox -> брокер.
+
+Заполняет outbox синтетическими событиями и прогоняет relay_batch с InMemoryPublisher
+для нескольких размеров пачки. --rtt-ms имитирует задержку до брокера: RabbitMQPublisher
+тратит один round-trip (tx_commit) на пачку. Запуск из корня репозитория:
+
+    python benchmarks/bench_outbox_relay.py [--events 50000] [--url sqlite:///bench.db] [--rtt-ms 1]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import models
+from broker import InMemoryPublisher
+from database import Base
+from services.outbox_service import relay_batch
+
+
+def fill_outbox(session, events: int) -> None:
+    payload = json.dumps({"event": "like.created", "from_user_tg_id": "1", "to_user_tg_id": "2", "is_like": True})
+    session.execute(
+        insert(models.Outbox),
+        [{"routing_key": "like_events", "payload": payload} for _ in range(events)],
+    )
+    session.commit()
+
+
+def run(url: str, events: int, batch_sizes, rtt_ms: float = 0.0) -> None:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"broker round-trip: {rtt_ms} ms per batch")
+    print(f"{'batch':>8} {'events':>8} {'trips':>7} {'seconds':>9} {'events/s':>10}")
+    for batch_size in batch_sizes:
+        session = Session()
+        fill_outbox(session, events)
+        publisher = InMemoryPublisher(round_trip=rtt_ms / 1000)
+        started = time.perf_counter()
+        sent = 0
+        while True:
+            n = relay_batch(session, publisher, batch_size)
+            if not n:
+                break
+            sent += n
+        elapsed = time.perf_counter() - started
+        session.close()
+        print(f"{batch_size:>8} {sent:>8} {publisher.round_trips:>7} {elapsed:>9.3f} {sent / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--url", default="sqlite:///:memory:")
+    parser.add_argument("--batch-sizes", default="1,10,100,500,2000")
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    run(args.url, args.events, [int(x) for x in args.batch_sizes.split(",")], args.rtt_ms)
@@ -0,0 +1,50 @@
+"""
+Накладные расходы и память TokenBucketLimiter.
+
+    python benchmarks/bench_rate_limit.py [--calls 1000000] [--keys 2000000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limit import TokenBucketLimiter
+
+
+def bench_hot_keys(calls: int) -> None:
+    limiter = TokenBucketLimiter(rate=1000, burst=1000)
+    keys = [str(i) for i in range(1000)]
+    started = time.perf_counter()
+    for i in range(calls):
+        limiter.acquire(keys[i % 1000])
+    elapsed = time.perf_counter() - started
+    print(f"hot keys:      {elapsed / calls * 1e6:.2f} us/acquire")
+
+
+def bench_distinct_keys(keys: int, max_keys: int) -> None:
+    limiter = TokenBucketLimiter(rate=1, burst=10, max_keys=max_keys)
+    names = [str(10**9 + i) for i in range(keys)]
+    tracemalloc.start()
+    started = time.perf_counter()
+    for name in names:
+        limiter.acquire(name)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"distinct keys: {elapsed / keys * 1e6:.2f} us/acquire, "
+        f"{len(limiter.buckets)} buckets kept, {current / 2**20:.1f} MiB held by limiter"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=2_000_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    args = parser.parse_args()
+    bench_hot_keys(args.calls)
+    bench_distinct_keys(args.keys, args.max_keys)
@@ -0,0 +1,97 @@
+"""
+Задержка подбора сокомандников (recommendations.py) на большом числе пользователей.
+
+    python benchmarks/bench_recommend.py [--users 100000] [--olymps 3] [--likes 50] [--requests 500] [--db sqlite:///bench_recommend.db]
+
+У каждого пользователя до --olymps олимпиад и --likes оценок. Отчёт: время полной загрузки
+признаков, инкрементального обновления после изменения 1% пользователей и перцентили
+recommend() (оценка всех пользователей, исключение оценённых, top-20).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from recommendations import Recommender
+
+PROFILES = ["Физика", "Математика", "Информатика", "Химия", "Биология", "История", "Литература", "Экономика"]
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург", "Омск"]
+
+
+def populate(db, users: int, olymps: int, likes: int) -> None:
+    rng = random.Random(1)
+    db.execute(insert(models.Users), [
+        {
+            "tg_id": str(i), "goal": rng.randrange(3), "city": rng.choice(CITIES), "age": rng.randrange(14, 25),
+            "gender": rng.random() < 0.5, "who_interested": rng.randrange(3),
+        }
+        for i in range(users)
+    ])
+    db.execute(insert(models.Olymps), [
+        {
+            "name": f"Олимпиада {rng.randrange(200)}", "profile": rng.choice(PROFILES), "level": rng.randrange(4),
+            "user_tg_id": str(i), "result": rng.randrange(4), "year": "2025",
+        }
+        for i in range(users) for _ in range(rng.randrange(olymps + 1))
+    ])
+    for start in range(0, users, 10_000):
+        db.execute(insert(models.Likes), [
+            {"from_user_tg_id": str(i), "to_user_tg_id": str(rng.randrange(users)), "is_like": rng.random() < 0.7}
+            for i in range(start, min(start + 10_000, users)) for _ in range(likes)
+        ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--olymps", type=int, default=3)
+    parser.add_argument("--likes", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--db", default="sqlite:///bench_recommend.db")
+    args = parser.parse_args()
+
+    if args.db.startswith("sqlite:///") and os.path.exists(args.db[len("sqlite:///"):]):
+        os.remove(args.db[len("sqlite:///"):])
+    engine = create_engine(args.db)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    populate(db, args.users, args.olymps, args.likes)
+
+    recommender = Recommender()
+    started = time.perf_counter()
+    recommender.refresh(db)
+    print(f"full load: {time.perf_counter() - started:.2f} s, {recommender.features.nbytes / 2**20:.1f} MiB")
+
+    db.execute(
+        update(models.Users).where(models.Users.id % 100 == 0).values(age=models.Users.age + 1, version=models.Users.version + 1)
+    )
+    db.commit()
+    started = time.perf_counter()
+    stats = recommender.refresh(db)
+    print(f"incremental refresh {stats}: {time.perf_counter() - started:.2f} s")
+
+    rng = random.Random(2)
+    timings = []
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        recommender.recommend(db, str(rng.randrange(args.users)), 20)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f"recommend top-20 over {args.users:,} users: mean {statistics.mean(timings):.2f} ms, "
+        f"p50 {timings[len(timings) // 2]:.2f} ms, p99 {timings[int(len(timings) * 0.99)]:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Нагрузочный тест запущенного сервера: N соединений шлют запросы в течение T секунд.
+
+    gunicorn main:app -c gunicorn.conf.py
+    python benchmarks/bench_server.py [--url http://127.0.0.1:8005] [--connections 32] [--seconds 10]
+
+Смесь запросов: GET /user/get/{tg_id}, GET /like/get_last/ и поиск /users/search/.
+Пользователи 0..--users-1 создаются перед замером, если их ещё нет.
+--no-keepalive открывает новое соединение на каждый запрос (как клиент без пула).
+Отчёт: запросов в секунду, ошибки и перцентили задержки.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+
+def make_paths(users: int):
+    rng = random.Random(1)
+    while True:
+        tg_id = rng.randrange(users)
+        roll = rng.random()
+        if roll < 0.5:
+            yield f"/user/get/{tg_id}"
+        elif roll < 0.8:
+            yield f"/like/get_last/?user_tg_id={tg_id}&count=10"
+        else:
+            yield "/users/search/?limit=20"
+
+
+async def populate(client: httpx.AsyncClient, users: int) -> None:
+    # повторный запуск по тем же данным: уже существующие пользователи и лайки отвечают 400
+    for i in range(users):
+        await client.post("/user/create/", params={"tg_id": str(i)})
+    for i in range(users):
+        await client.post("/like/create/", json={"from_user_tg_id": str(i), "to_user_tg_id": str((i + 1) % users), "is_like": True})
+
+
+async def worker(url: str, paths, deadline: float, keepalive: bool, latencies: list, errors: list) -> None:
+    limits = httpx.Limits(max_keepalive_connections=1 if keepalive else 0)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(next(paths))
+                if response.status_code >= 500:
+                    errors.append(response.status_code)
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+                continue
+            latencies.append(time.perf_counter() - started)
+
+
+async def run(args) -> None:
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        await populate(client, args.users)
+    paths = make_paths(args.users)
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    await asyncio.gather(
+        *(worker(args.url, paths, deadline, not args.no_keepalive, latencies, errors) for _ in range(args.connections))
+    )
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    print(
+        f"{len(latencies) / elapsed:8.0f} req/s  errors {len(errors)}  "
+        f"p50 {q[49] * 1000:.1f} ms  p90 {q[89] * 1000:.1f} ms  p99 {q[98] * 1000:.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8005")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--no-keepalive", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Латентность поиска команды (search_users_by_olymps) на большом объёме олимпиад.
+
+Генерирует пользователей и олимпиады (по умолчанию 300k строк olymps) и замеряет
+первую и глубокую страницы для нескольких типовых фильтров:
+
+    python benchmarks/bench_team_search.py [--users 100000] [--olymps 300000] [--url sqlite:///bench.db]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from services.catalog_service import resolve_catalog_id
+from services.search_service import search_users_by_olymps
+
+PROFILES = ["физика", "математика", "информатика", "химия", "биология", "экономика", "история", "литература"]
+
+
+def populate(session, users: int, olymps: int, seed: int = 1) -> None:
+    rnd = random.Random(seed)
+    session.execute(insert(models.Users), [{"tg_id": str(10**9 + i)} for i in range(users)])
+    catalog = {profile: resolve_catalog_id(session, "Олимпиада", profile) for profile in PROFILES}
+    rows = []
+    for _ in range(olymps):
+        profile = rnd.choice(PROFILES)
+        rows.append(
+            {
+                "name": "Олимпиада",
+                "profile": profile,
+                "catalog_id": catalog[profile],
+                "level": rnd.randint(0, 3),
+                "user_tg_id": str(10**9 + rnd.randrange(users)),
+                "result": rnd.randint(0, 3),
+                "year": str(rnd.randint(2018, 2025)),
+                "is_approved": rnd.random() < 0.7,
+                "is_displayed": True,
+            }
+        )
+        if len(rows) == 10000:
+            session.execute(insert(models.Olymps), rows)
+            rows = []
+    if rows:
+        session.execute(insert(models.Olymps), rows)
+    session.commit()
+    # планировщику нужна статистика, как и на Postgres после autovacuum
+    session.execute(text("ANALYZE"))
+    session.commit()
+
+
+def timed(fn, repeat: int = 20):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples), result
+
+
+def run(url: str, users: int, olymps: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    started = time.perf_counter()
+    populate(session, users, olymps)
+    print(f"populated {users} users / {olymps} olymps in {time.perf_counter() - started:.1f}s")
+
+    cases = {
+        "physics, level 1, prize+": dict(profile="физика", level=1, max_result=1),
+        "physics, level 1, prize+, approved": dict(profile="физика", level=1, max_result=1, is_approved=True),
+        "informatics, 2025": dict(profile="информатика", year="2025"),
+        "any, winners": dict(max_result=0),
+    }
+    print(f"{'filter':<38} {'page':>6} {'median ms':>10} {'max ms':>8} {'rows':>5}")
+    for title, filters in cases.items():
+        median, worst, page = timed(lambda: search_users_by_olymps(session, limit=50, **filters))
+        print(f"{title:<38} {'first':>6} {median:>10.2f} {worst:>8.2f} {len(page):>5}")
+        after_id = users // 2
+        median, worst, page = timed(lambda: search_users_by_olymps(session, after_id=after_id, limit=50, **filters))
+        print(f"{title:<38} {'middle':>6} {median:>10.2f} {worst:>8.2f} {len(page):>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--olymps", type=int, default=300000)
+    parser.add_argument("--url", default="sqlite:///:memory:")
+    args = parser.parse_args()
+    run(args.url, args.users, args.olymps)
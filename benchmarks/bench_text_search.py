@@ -0,0 +1,93 @@
+"""
+Латентность полнотекстового поиска (search_users_by_text) на 100k+ профилях.
+
+По умолчанию SQLite FTS5; для Postgres передайте --url и примените миграции с GIN-индексами.
+
+    python benchmarks/bench_text_search.py [--users 100000] [--url sqlite:///bench.db]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from services.search_service import index_user_text, init_text_search, search_users_by_text
+
+WORDS = (
+    "ищу команду для хакатона люблю физику математику программирование олимпиады робототехника "
+    "биология химия экономика дизайн backend frontend machine learning data science python golang "
+    "startup team project research music football chess"
+).split()
+OLYMP_NAMES = ["Всесоршь", "Физтех", "Высшая проба", "Ломоносов", "ИТМО", "Курчатов", "Innopolis Open"]
+
+
+def populate(session, users: int, seed: int = 1) -> None:
+    rnd = random.Random(seed)
+    batch_users, batch_olymps = [], []
+    for i in range(users):
+        tg_id = str(10**9 + i)
+        batch_users.append({"tg_id": tg_id, "description": " ".join(rnd.choices(WORDS, k=rnd.randint(5, 25)))})
+        for _ in range(rnd.randint(0, 3)):
+            batch_olymps.append(
+                {"name": rnd.choice(OLYMP_NAMES), "profile": "физика", "level": 1, "user_tg_id": tg_id, "result": 1, "year": "2025"}
+            )
+        if len(batch_users) == 10000:
+            session.execute(insert(models.Users), batch_users)
+            session.execute(insert(models.Olymps), batch_olymps)
+            batch_users, batch_olymps = [], []
+    if batch_users:
+        session.execute(insert(models.Users), batch_users)
+        session.execute(insert(models.Olymps), batch_olymps)
+    session.commit()
+
+
+def timed(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], result
+
+
+def run(url: str, users: int, repeat: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    populate(session, users)
+
+    started = time.perf_counter()
+    init_text_search(engine)
+    print(f"{users} profiles, initial index build {time.perf_counter() - started:.2f}s")
+
+    reindexed = min(users, 1000)
+    started = time.perf_counter()
+    for i in range(reindexed):
+        index_user_text(session, str(10**9 + i))
+    session.commit()
+    print(f"incremental reindex: {(time.perf_counter() - started) * 1000 / reindexed:.3f} ms/profile")
+
+    print(f"{'query':<28} {'median ms':>10} {'p95 ms':>8} {'rows':>5}")
+    for query in ("робототехника", "machine learning", "физтех", "ищу команду хакатона", "chess music football"):
+        median, p95, rows = timed(lambda: search_users_by_text(session, query, limit=20), repeat)
+        print(f"{query:<28} {median:>10.2f} {p95:>8.2f} {len(rows):>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--url", default="sqlite:///:memory:")
+    args = parser.parse_args()
+    run(args.url, args.users, args.repeat)
@@ -0,0 +1,193 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import models
+from logger_config import logger
+
+LIKES_BLOOM_ENABLED = os.getenv("LIKES_BLOOM_ENABLED", "0") == "1"
+# на сколько лайков рассчитан фильтр и какая доля ложных «может быть» допустима при таком числе
+LIKES_BLOOM_CAPACITY = int(os.getenv("LIKES_BLOOM_CAPACITY", 1_000_000))
+LIKES_BLOOM_ERROR_RATE = float(os.getenv("LIKES_BLOOM_ERROR_RATE", 0.01))
+# как долго фильтр может не видеть лайки, вставленные другими процессами (воркеры, consumer.py)
+LIKES_BLOOM_MAX_LAG = float(os.getenv("LIKES_BLOOM_MAX_LAG", 1.0))
+# догрузка перечитывает лайки с created_at не старше последнего увиденного минус это окно (секунды).
+# На Postgres created_at — время начала транзакции, и лайк медленной транзакции (/batch, consumer.py)
+# становится виден позже более новых; окно должно быть длиннее самой долгой транзакции с лайками.
+# Каждая догрузка перечитывает лайки за окно, поэтому её цена растёт с потоком лайков.
+LIKES_BLOOM_CATCHUP_WINDOW = float(os.getenv("LIKES_BLOOM_CATCHUP_WINDOW", 60))
+LIKES_BLOOM_SCAN_BATCH = int(os.getenv("LIKES_BLOOM_SCAN_BATCH", 10_000))
+
+
+class BloomFilter:
+    """
+    Фильтр Блума: «точно нет» или «может быть».
+
+    Размер и число хэшей считаются по capacity и error_rate; позиции битов — двойное
+    хэширование по одному blake2b. Удалять элементы нельзя: удалённый лайк остаётся
+    ложным «может быть» до перестройки.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        new = False
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                new = True
+        # повторное добавление (догрузка с запасом) не меняет битов и не считается
+        if new:
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def expected_error_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+def like_key(from_user_tg_id: str, to_user_tg_id: str, is_like: bool) -> str:
+    return f"{from_user_tg_id}\x00{to_user_tg_id}\x00{int(bool(is_like))}"
+
+
+class LikesBloom:
+    """
+    Фильтр Блума по ключам (from, to, is_like) таблицы likes на процесс.
+
+    Строится потоковым сканированием likes, пополняется при каждой вставке в этом процессе
+    и не реже раза в max_lag секунд догружает лайки, вставленные другими процессами: всё, что
+    создано не раньше window секунд до последнего увиденного created_at. like_exists идёт в БД
+    только при ответе «может быть». Лайк другого процесса до догрузки (до max_lag секунд) фильтр
+    считает отсутствующим. Переполненный фильтр перестраивается в фоновом потоке.
+    """
+
+    def __init__(
+        self,
+        capacity: int = LIKES_BLOOM_CAPACITY,
+        error_rate: float = LIKES_BLOOM_ERROR_RATE,
+        max_lag: float = LIKES_BLOOM_MAX_LAG,
+        window: float = LIKES_BLOOM_CATCHUP_WINDOW,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_lag = max_lag
+        self.window = timedelta(seconds=window)
+        self.filter: Optional[BloomFilter] = None
+        # самый поздний created_at среди загруженных лайков (время БД)
+        self.watermark: Optional[datetime] = None
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+        self.builder: Optional[threading.Thread] = None
+        self.build_seconds = 0.0
+        self.lookups = 0
+        self.negatives = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.filter is not None
+
+    def _scan(self, db: Session, bloom: BloomFilter, since: Optional[datetime]) -> Optional[datetime]:
+        stmt = select(
+            models.Likes.created_at, models.Likes.from_user_tg_id, models.Likes.to_user_tg_id, models.Likes.is_like
+        ).execution_options(yield_per=LIKES_BLOOM_SCAN_BATCH)
+        if since is not None:
+            stmt = stmt.where(models.Likes.created_at >= since)
+        watermark = since
+        for created_at, from_user_tg_id, to_user_tg_id, is_like in db.execute(stmt):
+            bloom.add(like_key(from_user_tg_id, to_user_tg_id, is_like))
+            if watermark is None or created_at > watermark:
+                watermark = created_at
+        return watermark
+
+    def build(self, db: Session) -> dict:
+        """Построить фильтр заново по всей таблице likes. Возвращает stats()."""
+        started = time.perf_counter()
+        total = db.execute(select(func.count(models.Likes.id))).scalar()
+        # запас на рост, чтобы до следующей перестройки фильтр не переполнился
+        capacity = max(self.capacity, total * 2)
+        bloom = BloomFilter(capacity, self.error_rate)
+        watermark = self._scan(db, bloom, None)
+        self.filter, self.watermark, self.capacity = bloom, watermark, capacity
+        self.refreshed_at = time.monotonic()
+        self.build_seconds = time.perf_counter() - started
+        stats = self.stats()
+        logger.info(f"Фильтр Блума лайков построен: {stats}")
+        return stats
+
+    def _build_and_unlock(self, bind) -> None:
+        try:
+            with Session(bind=bind) as db:
+                self.build(db)
+        except Exception:
+            logger.exception("Не удалось перестроить фильтр Блума лайков, остаётся прежний")
+        finally:
+            self.lock.release()
+
+    def catch_up(self, db: Session) -> None:
+        bloom, watermark = self.filter, self.watermark
+        if bloom.count > bloom.capacity and self.lock.acquire(blocking=False):
+            # полное сканирование не блокирует запрос: до подмены работает переполненный фильтр,
+            # у него только выше доля ложных «может быть»
+            self.builder = threading.Thread(
+                target=self._build_and_unlock, args=(db.get_bind(),), name="likes-bloom", daemon=True
+            )
+            self.builder.start()
+        watermark = self._scan(db, bloom, None if watermark is None else watermark - self.window)
+        # пока шло сканирование, фоновая перестройка могла подменить фильтр со своей отметкой
+        if self.filter is bloom:
+            self.watermark = watermark
+        self.refreshed_at = time.monotonic()
+
+    def add(self, from_user_tg_id: str, to_user_tg_id: str, is_like: bool) -> None:
+        if self.filter is not None:
+            self.filter.add(like_key(from_user_tg_id, to_user_tg_id, is_like))
+
+    def definitely_absent(self, db: Session, from_user_tg_id: str, to_user_tg_id: str, is_like: bool) -> bool:
+        """True, если такого лайка точно нет; False — нужно спросить БД."""
+        if self.filter is None:
+            return False
+        if time.monotonic() - self.refreshed_at > self.max_lag:
+            self.catch_up(db)
+        self.lookups += 1
+        if like_key(from_user_tg_id, to_user_tg_id, is_like) in self.filter:
+            return False
+        self.negatives += 1
+        return True
+
+    def stats(self) -> dict:
+        bloom = self.filter
+        return {
+            "items": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else self.capacity,
+            "hashes": bloom.hashes if bloom else 0,
+            "memory_bytes": len(bloom.bits) if bloom else 0,
+            "expected_error_rate": round(bloom.expected_error_rate(), 6) if bloom else None,
+            "build_seconds": round(self.build_seconds, 3),
+            "lookups": self.lookups,
+            "db_skipped": self.negatives,
+        }
+
+
+likes_bloom = LikesBloom()
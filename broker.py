@@ -0,0 +1,199 @@
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Tuple
+import os
+import time
+
+from dotenv import load_dotenv
+from pika import BasicProperties, BlockingConnection, ConnectionParameters, PlainCredentials
+from pika.exceptions import ChannelClosedByBroker
+
+load_dotenv()
+
+RMQ_USER = os.getenv("RMQ_USER")
+RMQ_PASS = os.getenv("RMQ_PASS")
+RMQ_HOST = os.getenv("RMQ_HOST", "localhost")
+RMQ_PORT = int(os.getenv("RMQ_PORT", 5672))
+
+credentials = PlainCredentials(RMQ_USER, RMQ_PASS)
+
+connection_params = ConnectionParameters(
+    host=RMQ_HOST,
+    port=RMQ_PORT,
+    credentials=credentials,
+)
+
+# очереди, которые прежние версии создавали без durable. RabbitMQ не даёт переобъявить
+# существующую очередь с другой durability (406 PRECONDITION_FAILED), поэтому они такими и остаются
+NON_DURABLE_QUEUES = frozenset({"likes"})
+
+# сообщение для публикации: (routing_key, body)
+Message = Tuple[str, bytes]
+
+
+def queue_durable(queue: str) -> bool:
+    return queue not in NON_DURABLE_QUEUES
+
+
+class RabbitMQPublisher:
+    """
+    Публикация пачек сообщений в RabbitMQ через default exchange.
+
+    Канал в транзакционном режиме (tx_select): пачка публикуется без ожидания и фиксируется
+    одним tx_commit, так что на пачку приходится один round-trip до брокера, а не по одному на
+    сообщение, как у publisher confirms на BlockingChannel. publish_batch возвращает управление
+    после Commit-Ok, то есть когда брокер принял все сообщения, иначе бросает исключение.
+    """
+
+    def __init__(self, params: ConnectionParameters = connection_params):
+        self.params = params
+        self.connection = None
+        self.channel = None
+        self.declared = set()
+
+    def _ensure_channel(self):
+        if self.channel is None or self.channel.is_closed:
+            self.connection = BlockingConnection(self.params)
+            self.channel = self.connection.channel()
+            self.channel.tx_select()
+            self.declared = set()
+        return self.channel
+
+    def publish_batch(self, messages: Iterable[Message]) -> None:
+        ch = self._ensure_channel()
+        try:
+            for routing_key, body in messages:
+                if routing_key not in self.declared:
+                    ch.queue_declare(queue=routing_key, durable=queue_durable(routing_key))
+                    self.declared.add(routing_key)
+                ch.basic_publish(
+                    exchange="",
+                    routing_key=routing_key,
+                    body=body,
+                    properties=BasicProperties(delivery_mode=2),
+                )
+            ch.tx_commit()
+        except Exception:
+            # неподтверждённая часть пачки не должна уйти со следующим commit
+            if ch.is_open:
+                ch.tx_rollback()
+            raise
+
+    def close(self) -> None:
+        if self.connection is not None and self.connection.is_open:
+            self.connection.close()
+        self.connection = None
+        self.channel = None
+
+
+class InMemoryPublisher:
+    """
+    Подмена брокера для тестов и бенчмарков: сообщения складываются в списки по routing_key.
+
+    round_trip — имитируемая задержка до брокера в секундах, одна на пачку, как у tx_commit
+    RabbitMQPublisher.
+    """
+
+    def __init__(self, round_trip: float = 0.0):
+        self.queues: Dict[str, List[bytes]] = defaultdict(list)
+        self.fail_next = False
+        self.round_trip = round_trip
+        self.round_trips = 0
+
+    def publish_batch(self, messages: Iterable[Message]) -> None:
+        if self.fail_next:
+            self.fail_next = False
+            raise ConnectionError("In-memory broker is unavailable")
+        for routing_key, body in messages:
+            self.queues[routing_key].append(body)
+        self.round_trips += 1
+        if self.round_trip:
+            time.sleep(self.round_trip)
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryDelivery:
+    __slots__ = ("delivery_tag", "routing_key")
+
+    def __init__(self, delivery_tag: int, routing_key: str):
+        self.delivery_tag = delivery_tag
+        self.routing_key = routing_key
+
+
+class InMemoryChannel:
+    """
+    Подмена канала pika (BlockingChannel) в памяти — то подмножество, которым пользуется consumer.py.
+
+    Очереди — deque сообщений (body, properties). start_consuming доставляет сообщения
+    подписчикам, пока очереди не опустеют, и возвращает управление (у pika цикл бесконечный).
+    TTL очередей повторов не отсчитывается: expire() сразу перекладывает их сообщения
+    по x-dead-letter-routing-key.
+    """
+
+    def __init__(self):
+        self.queues: Dict[str, deque] = defaultdict(deque)
+        self.arguments: Dict[str, dict] = {}
+        self.durable: Dict[str, bool] = {}
+        self.consumers: Dict[str, object] = {}
+        self.unacked: Dict[int, Tuple[str, bytes, BasicProperties]] = {}
+        self.next_tag = 1
+        self.published = 0
+
+    def queue_declare(self, queue: str, durable: bool = False, arguments: dict = None, passive: bool = False):
+        if not passive:
+            if self.durable.get(queue, durable) != durable:
+                # как RabbitMQ: канал закрывается, очередь остаётся прежней
+                raise ChannelClosedByBroker(406, f"PRECONDITION_FAILED - inequivalent arg 'durable' for queue '{queue}'")
+            self.arguments[queue] = arguments or {}
+            self.durable[queue] = durable
+        self.queues.setdefault(queue, deque())
+        return SimpleNamespace(method=SimpleNamespace(queue=queue, message_count=len(self.queues[queue])))
+
+    def confirm_delivery(self) -> None:
+        pass
+
+    def basic_qos(self, prefetch_count: int = 0) -> None:
+        pass
+
+    def basic_publish(self, exchange: str, routing_key: str, body: bytes, properties: BasicProperties = None) -> None:
+        self.queues[routing_key].append((body, properties or BasicProperties()))
+        self.published += 1
+
+    def basic_ack(self, delivery_tag: int) -> None:
+        self.unacked.pop(delivery_tag)
+
+    def _deliver(self, queue: str):
+        body, properties = self.queues[queue].popleft()
+        tag = self.next_tag
+        self.next_tag += 1
+        self.unacked[tag] = (queue, body, properties)
+        return InMemoryDelivery(tag, queue), properties, body
+
+    def basic_get(self, queue: str):
+        if not self.queues[queue]:
+            return None, None, None
+        return self._deliver(queue)
+
+    def basic_consume(self, queue: str, on_message_callback) -> None:
+        self.consumers[queue] = on_message_callback
+
+    def start_consuming(self) -> None:
+        while True:
+            ready = [queue for queue in self.consumers if self.queues[queue]]
+            if not ready:
+                return
+            for queue in ready:
+                method, properties, body = self._deliver(queue)
+                self.consumers[queue](self, method, properties, body)
+
+    def expire(self) -> int:
+        """Переложить сообщения из очередей с dead-letter в их целевые очереди. Возвращает количество."""
+        moved = 0
+        for queue, arguments in self.arguments.items():
+            target = arguments.get("x-dead-letter-routing-key")
+            while target and self.queues[queue]:
+                self.queues[target].append(self.queues[queue].popleft())
+                moved += 1
+        return moved
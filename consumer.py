@@ -1,26 +1,76 @@
-from pika import ConnectionParameters, BlockingConnection, PlainCredentials
+from pika import BasicProperties, BlockingConnection
 import models
 from database import engine, SessionLocal
-from main import LikesBase
+from schemas import LikesBase
+from services.likes_service import create_like
+from broker import connection_params, queue_durable
 from logger_config import logger
-import os
-from dotenv import load_dotenv
+from sharding import LIKES_SHARDS, shard_for, shard_queue
+import argparse
 import json
+import os
+
+LIKES_QUEUE = "likes"
+# сколько раз пытаться сохранить лайк, прежде чем отправить его в DLQ
+LIKES_MAX_ATTEMPTS = int(os.getenv("LIKES_MAX_ATTEMPTS", 5))
+# задержка перед n-й повторной попыткой: base * 2^(n-1)
+LIKES_RETRY_BASE_DELAY_MS = int(os.getenv("LIKES_RETRY_BASE_DELAY_MS", 1000))
+
 
-load_dotenv()
+def retry_queue_name(queue: str, attempt: int) -> str:
+    return f"{queue}.retry.{attempt}"
 
-RMQ_USER = os.getenv("RMQ_USER")
-RMQ_PASS = os.getenv("RMQ_PASS")
-RMQ_HOST = os.getenv("RMQ_HOST")
-RMQ_PORT = int(os.getenv("RMQ_PORT", 5672))
 
-credentials = PlainCredentials(RMQ_USER, RMQ_PASS)
+def dlq_name(queue: str) -> str:
+    return f"{queue}.dlq"
+
+
+def declare_queues(ch, queue: str = LIKES_QUEUE):
+    """
+    Объявить основную очередь, очереди отложенных повторов и DLQ.
+
+    Очередь повтора n держит сообщение base * 2^(n-1) мс (x-message-ttl) и затем
+    через dead-letter возвращает его в основную очередь. TTL задан на очередь, а не на
+    сообщение, поэтому сообщения в каждой очереди истекают строго по порядку.
+    Общая очередь likes остаётся недолговечной, как её создавали прежние версии (broker.NON_DURABLE_QUEUES).
+    """
+    ch.queue_declare(queue=queue, durable=queue_durable(queue))
+    for attempt in range(1, LIKES_MAX_ATTEMPTS):
+        ch.queue_declare(
+            queue=retry_queue_name(queue, attempt),
+            durable=True,
+            arguments={
+                "x-message-ttl": LIKES_RETRY_BASE_DELAY_MS * 2 ** (attempt - 1),
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue,
+            },
+        )
+    ch.queue_declare(queue=dlq_name(queue), durable=True)
+
+
+def schedule_retry(ch, method, properties, body, error: Exception):
+    """
+    Переложить сообщение в очередь отложенного повтора или, если попытки кончились, в DLQ.
+
+    Основной поток не ждёт: сообщение публикуется и сразу подтверждается вызывающим кодом.
+    """
+    queue = method.routing_key
+    headers = dict((properties.headers if properties else None) or {})
+    attempt = int(headers.get("x-attempt", 0)) + 1
+    headers["x-attempt"] = attempt
+    headers["x-last-error"] = str(error)[:500]
+    if attempt < LIKES_MAX_ATTEMPTS:
+        target = retry_queue_name(queue, attempt)
+    else:
+        target = dlq_name(queue)
+        logger.error(f"Лайк отправлен в DLQ после {attempt} попыток: {error}")
+    ch.basic_publish(
+        exchange="",
+        routing_key=target,
+        body=body,
+        properties=BasicProperties(headers=headers, delivery_mode=2),
+    )
 
-connection_params = ConnectionParameters(
-    host=RMQ_HOST,
-    port=RMQ_PORT,
-    credentials=credentials,
-)
 
 def callback(ch, method, properties, body):
     try:
@@ -36,51 +86,145 @@ def callback(ch, method, properties, body):
 
     db = SessionLocal()
     try:
-        from_user = (
-            db.query(models.Users)
-            .filter(models.Users.tg_id == like.from_user_tg_id)
-            .first()
-        )
-        to_user = (
-            db.query(models.Users)
-            .filter(models.Users.tg_id == like.to_user_tg_id)
-            .first()
-        )
-        if not from_user or not to_user:
-            logger.error("Один из пользователей не найден")
-            ch.basic_ack(delivery_tag=method.delivery_tag)
-            return
-
-        # Явно не передаём id при создании лайка
-        db_like = models.Likes(
-            from_user_tg_id=like.from_user_tg_id,
-            to_user_tg_id=like.to_user_tg_id,
-            text=like.text,
-            is_like=like.is_like,
-            is_readed=like.is_readed,
-        )
-        db.add(db_like)
-        db.commit()
-        db.refresh(db_like)
+        # лайк и событие outbox сохраняются одной транзакцией
+        db_like = create_like(db, like)
         logger.info(f"Лайк сохранён: id {db_like.id}")
         ch.basic_ack(delivery_tag=method.delivery_tag)
+    except ValueError:
+        db.rollback()
+        logger.error("Один из пользователей не найден")
+        ch.basic_ack(delivery_tag=method.delivery_tag)
     except Exception as e:
         db.rollback()
         logger.error(f"Ошибка при сохранении лайка: {e}")
+        schedule_retry(ch, method, properties, body, e)
         ch.basic_ack(delivery_tag=method.delivery_tag)
     finally:
         db.close()
 
+
+def replay_dlq(ch, queue: str = LIKES_QUEUE, limit: int = None) -> int:
+    """
+    Вернуть сообщения из DLQ в основную очередь со сброшенным счётчиком попыток.
+
+    Возвращает количество перемещённых сообщений.
+    """
+    moved = 0
+    while limit is None or moved < limit:
+        method, properties, body = ch.basic_get(queue=dlq_name(queue))
+        if method is None:
+            break
+        headers = dict((properties.headers if properties else None) or {})
+        headers.pop("x-attempt", None)
+        headers.pop("x-last-error", None)
+        ch.basic_publish(
+            exchange="",
+            routing_key=queue,
+            body=body,
+            properties=BasicProperties(headers=headers, delivery_mode=2),
+        )
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        moved += 1
+    return moved
+
+
+def make_router(shards: int, queue: str = LIKES_QUEUE):
+    """
+    Обработчик общей очереди, раскладывающий сообщения по очередям шардов по from_user_tg_id.
+
+    Нужен для продюсеров, которые публикуют в общую очередь likes. Роутер — единственный
+    consumer общей очереди, поэтому порядок лайков одного пользователя сохраняется.
+    Сообщение подтверждается только после публикации в шард (канал в режиме confirm).
+    """
+
+    def route(ch, method, properties, body):
+        try:
+            from_user_tg_id = str(json.loads(body.decode())["from_user_tg_id"])
+        except Exception as e:
+            logger.warning(f"Ошибка входных данных: {e}")
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
+        ch.basic_publish(
+            exchange="",
+            routing_key=shard_queue(shard_for(from_user_tg_id, shards), queue),
+            body=body,
+            properties=properties or BasicProperties(delivery_mode=2),
+        )
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+    return route
+
+
+def queue_depths(ch, shards: int, queue: str = LIKES_QUEUE) -> dict:
+    """Количество сообщений в общей очереди и в очередях шардов вместе с их очередями повторов."""
+    names = [queue] + [shard_queue(shard, queue) for shard in range(shards)]
+    depths = {}
+    for name in names:
+        for q in [name] + [retry_queue_name(name, attempt) for attempt in range(1, LIKES_MAX_ATTEMPTS)]:
+            depths[q] = ch.queue_declare(queue=q, passive=True).method.message_count
+    return depths
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "command", nargs="?", default="consume", choices=["consume", "route", "shard-status", "replay-dlq"]
+    )
+    parser.add_argument("--limit", type=int, default=None, help="сколько сообщений вернуть из DLQ")
+    parser.add_argument("--shards", type=int, default=LIKES_SHARDS, help="количество шардов (0 — без шардирования)")
+    parser.add_argument("--shard", type=int, default=None, help="номер шарда для consume и replay-dlq")
+    return parser
+
+
+def run(ch, args) -> None:
+    """
+    Выполнить команду на открытом канале.
+
+    Канал — pika BlockingChannel или broker.InMemoryChannel (тесты и benchmarks/bench_consumer.py).
+    """
+    queue = LIKES_QUEUE if args.shard is None else shard_queue(args.shard)
+    declare_queues(ch)
+    for shard in range(args.shards):
+        declare_queues(ch, shard_queue(shard))
+
+    if args.command == "replay-dlq":
+        ch.confirm_delivery()
+        moved = replay_dlq(ch, queue, limit=args.limit)
+        logger.info(f"Из DLQ {dlq_name(queue)} возвращено сообщений: {moved}")
+        return
+
+    if args.command == "shard-status":
+        for name, count in queue_depths(ch, args.shards).items():
+            print(f"{name}\t{count}")
+        return
+
+    if args.command == "route":
+        ch.confirm_delivery()
+        ch.basic_qos(prefetch_count=100)
+        ch.basic_consume(queue=LIKES_QUEUE, on_message_callback=make_router(args.shards))
+        ch.start_consuming()
+        return
+
+    # один consumer на очередь (шард): лайки одного пользователя обрабатываются по порядку
+    ch.basic_consume(
+        queue=queue,
+        on_message_callback=callback,
+    )
+    ch.start_consuming()
+
+
 def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.shard is not None and not 0 <= args.shard < args.shards:
+        parser.error("--shard должен быть в диапазоне [0, --shards)")
+    if args.command == "route" and not args.shards:
+        parser.error("для route нужно --shards > 0")
+
+    models.Base.metadata.create_all(bind=engine)
     with BlockingConnection(connection_params) as conn:
         with conn.channel() as ch:
-            ch.queue_declare(queue="likes")
-
-            ch.basic_consume(
-                queue="likes",
-                on_message_callback=callback,
-            )
-            ch.start_consuming()
+            run(ch, args)
 
 if __name__ == "__main__":
     main()
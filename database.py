@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.orm import declarative_base
+from collections import OrderedDict
+from itertools import cycle
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,8 +25,149 @@ else:
     URL_DATABASE = "sqlite:///:memory:"
     
 
-engine = create_engine(URL_DATABASE)
+# пул соединений процесса к каждой БД; столько запросов с сессией воркер обслуживает одновременно
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_CONNECTIONS = DB_POOL_SIZE + DB_MAX_OVERFLOW
+# сколько запросов воркера одновременно держат сессию (main.db_slot), остальные ждут слота
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", DB_POOL_CONNECTIONS))
+
+
+def _create_engine(url: str):
+    # у SQLite свои пулы (для :memory: — одно соединение на поток), размер задаётся только серверным БД
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_engine(url)
+    return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+
+
+engine = _create_engine(URL_DATABASE)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Реплики только для чтения: полные URL через запятую. Без них все запросы идут в основную БД.
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+# сколько секунд после записи читать данные пользователя из основной БД (запас на лаг реплики)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
+replica_engines = [_create_engine(url) for url in DB_REPLICA_URLS]
+
 Base = declarative_base()
+
+
+# Колбэки «после фактического коммита»: обновление кэшей в памяти и т.п.
+# Если сессия работает внутри внешней транзакции (info["external_transaction"], см. /batch в main.py),
+# session.commit() ещё ничего не фиксирует — колбэки запускает владелец транзакции через run_after_commit.
+
+def after_commit(session: Session, callback) -> None:
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+def run_after_commit(session: Session) -> None:
+    for callback in session.info.pop("after_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    if not session.info.get("external_transaction"):
+        run_after_commit(session)
+
+
+def is_outer_rollback(transaction) -> bool:
+    """
+    Откатилась ли внешняя транзакция сессии. after_rollback срабатывает и на откате SAVEPOINT
+    (begin_nested), после которого внешняя транзакция продолжается и может закоммититься, поэтому
+    состояние «до коммита» в session.info сбрасывают в after_soft_rollback по этой проверке.
+    """
+    return transaction.parent is None
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_commit(session: Session, previous_transaction) -> None:
+    if is_outer_rollback(previous_transaction):
+        session.info.pop("after_commit", None)
+
+
+# Маршрутизация чтения на реплики
+
+# атрибуты моделей, по которым запись относится к пользователю
+TG_ID_ATTRS = ("tg_id", "user_tg_id", "from_user_tg_id", "to_user_tg_id")
+
+
+class ReadRouter:
+    """
+    Выбор сессии для чтения: реплика по кругу или основная БД.
+
+    Основная БД выбирается, если реплик нет или если кто-то из переданных tg_id менялся
+    за последние window секунд (read-your-writes). Отметки о записях хранятся в памяти
+    процесса и упорядочены по времени истечения, поэтому устаревшие снимаются с начала.
+    get_read_db выполняется в потоках threadpool, а отметки ставятся после коммитов в других
+    потоках, поэтому recent меняется только под lock.
+    """
+
+    def __init__(self, primary: sessionmaker, replicas=(), window: float = READ_YOUR_WRITES_SECONDS):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._next_replica = cycle(self.replicas)
+        self.window = window
+        self.recent: "OrderedDict[str, float]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def mark_written(self, tg_ids, now: float = None) -> None:
+        if not self.replicas:
+            return
+        expires = (time.monotonic() if now is None else now) + self.window
+        with self.lock:
+            for tg_id in tg_ids:
+                self.recent[tg_id] = expires
+                self.recent.move_to_end(tg_id)
+
+    def is_recent(self, tg_id: str, now: float = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            while self.recent:
+                oldest, expires = next(iter(self.recent.items()))
+                if expires > now:
+                    break
+                self.recent.pop(oldest, None)
+            return tg_id in self.recent
+
+    def session(self, tg_ids=(), now: float = None) -> Session:
+        if not self.replicas or any(self.is_recent(tg_id, now) for tg_id in tg_ids):
+            return self.primary()
+        return next(self._next_replica)()
+
+
+read_router = ReadRouter(
+    SessionLocal,
+    [sessionmaker(autocommit=False, autoflush=False, bind=replica) for replica in replica_engines],
+)
+
+
+def pin_written(session: Session, tg_ids) -> None:
+    """
+    Отметить, что транзакция session меняет данные пользователей tg_ids: после коммита их чтения
+    на window секунд идут в основную БД. Объекты ORM отмечает after_flush, а Core
+    UPDATE/INSERT/DELETE вызывают это сами.
+    """
+    written = session.info.get("written_tg_ids")
+    if written is None:
+        written = session.info["written_tg_ids"] = set()
+        # через after_commit, чтобы в /batch отметки появились только после общего коммита
+        after_commit(session, lambda: read_router.mark_written(session.info.pop("written_tg_ids", ())))
+    written.update(tg_id for tg_id in tg_ids if tg_id is not None)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tg_ids(session: Session, flush_context) -> None:
+    pin_written(
+        session,
+        [getattr(obj, attr, None) for obj in (*session.new, *session.dirty, *session.deleted) for attr in TG_ID_ATTRS],
+    )
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_written_tg_ids(session: Session, previous_transaction) -> None:
+    if is_outer_rollback(previous_transaction):
+        session.info.pop("written_tg_ids", None)
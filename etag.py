@@ -0,0 +1,63 @@
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import models
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка If-None-Match по правилам слабого сравнения (RFC 9110, 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def olymps_version(db: Session, user_tg_id: str) -> str:
+    """
+    Версия набора олимпиад пользователя без загрузки строк: агрегат по индексу olymps.user_tg_id.
+
+    Меняется при создании и удалении олимпиады (количество и id) и при изменении строки (version).
+    Олимпиады удалённого пользователя не учитываются: для чтений их уже нет.
+    """
+    row = db.execute(
+        select(
+            func.count(models.Olymps.id),
+            func.coalesce(func.max(models.Olymps.id), 0),
+            func.coalesce(func.sum(models.Olymps.id), 0),
+            func.coalesce(func.sum(models.Olymps.version), 0),
+        )
+        .join(models.Users, models.Users.tg_id == models.Olymps.user_tg_id)
+        .where(models.Olymps.user_tg_id == user_tg_id, models.Users.deleted_at.is_(None))
+    ).one()
+    return ".".join(str(value) for value in row)
+
+
+def user_version(db: Session, tg_id: str) -> Optional[str]:
+    """
+    Версия строки пользователя или None, если пользователя нет или он удалён.
+
+    Кроме version учитываются счётчики лайков: они меняются без увеличения version.
+    """
+    row = db.execute(
+        select(
+            models.Users.id, models.Users.version, models.Users.likes_received, models.Users.dislikes_received
+        ).where(
+            models.Users.tg_id == tg_id, models.Users.deleted_at.is_(None)
+        )
+    ).first()
+    if row is None:
+        return None
+    return f"{row.id}.{row.version}.{row.likes_received}.{row.dislikes_received}"
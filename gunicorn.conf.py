@@ -0,0 +1,64 @@
+# Конфигурация gunicorn: gunicorn main:app -c gunicorn.conf.py
+# Все параметры задаются переменными окружения; обоснование значений по умолчанию — README, раздел «Server configuration».
+import math
+import os
+
+from database import DB_POOL_CONNECTIONS
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8005")
+
+# Сколько соединений с основной БД может занять весь сервер: max_connections Postgres (100 по умолчанию)
+# за вычетом consumer.py, фоновых задач и ручного доступа. Реплики получают столько же пулов.
+GUNICORN_DB_CONNECTIONS = int(os.getenv("GUNICORN_DB_CONNECTIONS", 80))
+
+
+def available_cpus() -> int:
+    """Ядра, доступные контейнеру: affinity (--cpuset-cpus) и квота CPU cgroup v2 (--cpus), а не все ядра хоста."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def max_workers(connections: int = GUNICORN_DB_CONNECTIONS) -> int:
+    # на воркер — полный пул и соединение LISTEN потока лайков
+    return max(1, connections // (DB_POOL_CONNECTIONS + 1))
+
+
+# Воркер асинхронный: одного процесса на ядро хватает, лишние процессы только делят то же CPU
+workers = int(os.getenv("GUNICORN_WORKERS", 0)) or min(available_cpus(), max_workers())
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gunicorn_worker.TunedUvicornWorker")
+
+# Приложение импортируется один раз в мастере (create_all, прогрев справочника, фильтр Блума),
+# воркеры получают его через fork и делят неизменённую память
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Перезапуск воркера после N запросов (с разбросом, чтобы не все сразу) — против роста памяти.
+# Открытые SSE-потоки при этом закрываются, клиенты переподключаются с Last-Event-ID.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# Сколько секунд держать простаивающее keep-alive соединение (у бота — пул httpx-соединений)
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+backlog = int(os.getenv("GUNICORN_BACKLOG", 2048))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def post_fork(server, worker):
+    # соединения пула, открытые мастером при preload, нельзя делить между процессами:
+    # воркер забывает их, не закрывая (close=False), и открывает свои
+    from database import engine, replica_engines
+
+    for db_engine in [engine, *replica_engines]:
+        # in-memory SQLite живёт только в своём соединении — его сбрасывать нельзя
+        if db_engine.url.database not in (None, "", ":memory:"):
+            db_engine.dispose(close=False)
@@ -0,0 +1,18 @@
+import os
+
+from uvicorn_worker import UvicornWorker
+
+# Event loop и HTTP-парсер воркера: "auto" берёт uvloop и httptools, если они установлены,
+# иначе asyncio и h11. Явные значения: UVICORN_LOOP=asyncio|uvloop, UVICORN_HTTP=h11|httptools.
+UVICORN_LOOP = os.getenv("UVICORN_LOOP", "auto")
+UVICORN_HTTP = os.getenv("UVICORN_HTTP", "auto")
+# Сколько соединений воркер держит одновременно, сверх — сразу 503. Считаются и простаивающие
+# keep-alive, и потоки /like/stream/, поэтому по умолчанию без ограничения; число запросов к БД
+# ограничивает DB_CONCURRENCY (main.db_slot). См. README, раздел «Server configuration».
+UVICORN_LIMIT_CONCURRENCY = int(os.getenv("UVICORN_LIMIT_CONCURRENCY", 0)) or None
+
+
+class TunedUvicornWorker(UvicornWorker):
+    """UvicornWorker с настройками uvicorn из окружения; keep-alive и max-requests берутся из gunicorn.conf.py."""
+
+    CONFIG_KWARGS = {"loop": UVICORN_LOOP, "http": UVICORN_HTTP, "limit_concurrency": UVICORN_LIMIT_CONCURRENCY}
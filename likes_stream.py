@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import exists, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+
+import models
+from database import after_commit, engine
+from logger_config import logger
+from services.outbox_service import like_event
+
+# канал Postgres LISTEN/NOTIFY, через который лайки доходят до всех воркеров
+LIKES_NOTIFY_CHANNEL = os.getenv("LIKES_NOTIFY_CHANNEL", "likes")
+# как часто слать комментарий-пинг в простаивающий поток, чтобы прокси не закрыли соединение
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", 15))
+# сколько непрочитанных событий держать на подписку; при переполнении подписка закрывается
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 100))
+STREAM_MAX_TG_IDS = int(os.getenv("STREAM_MAX_TG_IDS", 100))
+
+
+class Subscription:
+    __slots__ = ("tg_ids", "queue", "overflowed")
+
+    def __init__(self, tg_ids: Iterable[str], queue_size: int):
+        self.tg_ids = frozenset(tg_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+
+class LikesHub:
+    """
+    Раздача событий о новых лайках подписчикам одного процесса.
+
+    Простаивающая подписка — это очередь asyncio и ссылки на неё в словаре tg_id -> подписки.
+    Если клиент не успевает читать и очередь переполняется, подписка закрывается: клиент
+    переподключается с Last-Event-ID и дочитывает пропущенное из БД.
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, tg_ids: Iterable[str]) -> Subscription:
+        self.loop = asyncio.get_running_loop()
+        sub = Subscription(tg_ids, self.queue_size)
+        for tg_id in sub.tg_ids:
+            self.subscribers[tg_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        for tg_id in sub.tg_ids:
+            subs = self.subscribers.get(tg_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self.subscribers[tg_id]
+
+    def dispatch(self, payload: str) -> int:
+        """Разослать событие подписчикам получателя лайка. Выполняется в потоке event loop."""
+        event = json.loads(payload)
+        delivered = 0
+        for sub in list(self.subscribers.get(event["to_user_tg_id"], ())):
+            try:
+                sub.queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                self.unsubscribe(sub)
+        return delivered
+
+    def publish(self, payload: str) -> None:
+        """Передать событие в event loop подписчиков; можно вызывать из любого потока."""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.dispatch, payload)
+
+
+hub = LikesHub()
+
+
+class PgListener:
+    """
+    Поток, слушающий LISTEN на отдельном соединении Postgres и передающий события в hub.
+
+    Соединение создаётся мимо пула engine, чтобы не занимать в нём место. При обрыве
+    поток переподключается; лайки за время обрыва клиенты дочитывают по Last-Event-ID.
+    """
+
+    def __init__(self, engine, hub: LikesHub, channel: str = LIKES_NOTIFY_CHANNEL):
+        self.engine = engine
+        self.hub = hub
+        self.channel = channel
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="likes-listener", daemon=True)
+            self.thread.start()
+
+    def run(self) -> None:
+        dialect = self.engine.dialect
+        cargs, cparams = dialect.create_connect_args(self.engine.url)
+        while True:
+            try:
+                conn = dialect.connect(*cargs, **cparams)
+                try:
+                    conn.autocommit = True
+                    with conn.cursor() as cur:
+                        cur.execute(f'LISTEN "{self.channel}"')
+                    while True:
+                        if select.select([conn], [], [], 5) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            self.hub.publish(conn.notifies.pop(0).payload)
+                finally:
+                    conn.close()
+            except Exception:
+                logger.exception("Слушатель лайков отключился, переподключение")
+                time.sleep(1)
+
+
+listener = PgListener(engine, hub)
+
+
+def ensure_listener() -> None:
+    # без Postgres (SQLite, один процесс) события публикуются в hub напрямую после коммита
+    if engine.dialect.name == "postgresql":
+        listener.start()
+
+
+def notify_like(db: Session, like: models.Likes) -> None:
+    """
+    Оповестить подписчиков о новом лайке, когда транзакция будет закоммичена.
+
+    На Postgres это pg_notify в той же транзакции: уведомление уходит всем воркерам (и из
+    consumer.py) только при коммите. На SQLite событие публикуется в hub этого процесса
+    через database.after_commit. Не коммитит.
+    """
+    if not like.is_like:
+        return
+    payload = json.dumps(like_event(like), ensure_ascii=False)
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(sql_select(func.pg_notify(LIKES_NOTIFY_CHANNEL, payload)))
+    else:
+        after_commit(db, lambda: hub.publish(payload))
+
+
+def missed_likes(db: Session, tg_ids: Iterable[str], last_event_id: int, limit: int = STREAM_QUEUE_SIZE) -> List[dict]:
+    """Лайки получателям tg_ids с id больше last_event_id — догрузка после переподключения."""
+    likes = db.execute(
+        sql_select(models.Likes)
+        .where(
+            models.Likes.to_user_tg_id.in_(list(tg_ids)),
+            models.Likes.is_like == True,
+            models.Likes.id > last_event_id,
+            exists().where(models.Users.tg_id == models.Likes.from_user_tg_id, models.Users.deleted_at.is_(None)),
+        )
+        .order_by(models.Likes.id)
+        .limit(limit)
+    ).scalars().all()
+    return [like_event(like) for like in likes]
+
+
+def format_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: like\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def like_events(
+    sub: Subscription, backlog: List[dict] = (), heartbeat: float = STREAM_HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """
+    Поток text/event-stream: сначала backlog, затем новые лайки из подписки.
+
+    Подписка оформляется до чтения backlog, поэтому лайк, закоммиченный между ними, может
+    прийти дважды — такие повторы отбрасываются по id. При отключении клиента Starlette
+    отменяет генератор, и подписка снимается в finally.
+    """
+    try:
+        sent = set()
+        for event in backlog:
+            sent.add(event["id"])
+            yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event["id"] not in sent:
+                yield format_event(event)
+            if sub.overflowed and sub.queue.empty():
+                return
+    finally:
+        hub.unsubscribe(sub)
@@ -1,27 +1,76 @@
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Annotated
+from fastapi import FastAPI, HTTPException, Depends, Query, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter, ValidationError
+import inspect
+import anyio
+from typing import List, Annotated, Literal
 import models
-from database import engine, SessionLocal
+import queries
+from database import engine, SessionLocal, run_after_commit, read_router, replica_engines, TG_ID_ATTRS, DB_CONCURRENCY
 from sqlalchemy.orm import Session
 from typing import Optional
 from logger import logger, validation_exception_handler, http_exception_handler
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
-from schemas import OlympsBase, UsersBase, LikesBase
-from services.likes_service import create_like as service_create_like, get_last_likes as service_get_last_likes, like_exists as service_like_exists
+from schemas import OlympsBase, UsersBase, LikesBase, BatchRequest, OlympModerationRequest
+from services.likes_service import create_like as service_create_like, get_last_likes as service_get_last_likes, like_exists as service_like_exists, page_likes, next_cursors, from_active_user
+from services.purge_service import soft_delete_user
+from services.popularity_service import adjust_counter, leaderboard
+from services.moderation_service import list_pending, moderate_olymps
+from services.import_service import OlympImport, iter_line_batches
+from services.verification_service import diploma_registry, verify_olymp
+from services.search_service import search_users_by_olymps, search_users_by_text, init_text_search, index_user_text
+from services.catalog_service import resolve_catalog_id, load_catalog, list_catalog, get_participants
+from etag import make_etag, etag_matches, not_modified, olymps_version, user_version
+from rate_limit import RateLimitMiddleware, RATE_LIMIT_ENABLED
+from bloom import likes_bloom, LIKES_BLOOM_ENABLED
+from profiling import ProfilingMiddleware, PROFILING_ENABLED
+from recommendations import recommender
+from likes_stream import hub, ensure_listener, missed_likes, like_events, STREAM_MAX_TG_IDS
+from fastapi.responses import StreamingResponse
 
 
 app = FastAPI()
 models.Base.metadata.create_all(bind=engine)
+init_text_search(engine)
+for replica in replica_engines:
+    if replica.dialect.name == "sqlite":
+        # локальная SQLite вместо реплики: схему некому реплицировать
+        models.Base.metadata.create_all(bind=replica)
+        init_text_search(replica)
+with SessionLocal() as startup_db:
+    load_catalog(startup_db)
+    if LIKES_BLOOM_ENABLED:
+        likes_bloom.build(startup_db)
+# при preload_app реестр читается один раз в мастере, воркеры получают его через fork
+diploma_registry.refresh(force=True)
 logger.info("Application startup: tables ensured and exception handlers registered")
 
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+# добавлен последним — внешний слой, в профиль попадает и rate limit
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# слоты сессий БД. Async-маршруты ходят в БД прямо из event loop, и checkout из исчерпанного
+# пула остановил бы весь воркер; лишние запросы ждут слота здесь, не блокируя loop.
+# Потоки SSE и keep-alive соединения без сессии слот не занимают
+db_slots = anyio.Semaphore(DB_CONCURRENCY)
+
+
+async def db_slot():
+    async with db_slots:
+        yield
+
+
 # короткоживущая сессия БД на каждый запрос
 
-def get_db():
+def get_db(_slot: None = Depends(db_slot)):
     db = SessionLocal()
     try:
         yield db
@@ -29,32 +78,136 @@ def get_db():
         db.close()
 
 
+# сессия для маршрутов только на чтение: реплика, либо основная БД, если пользователь из
+# параметров запроса недавно что-то менял (read-your-writes, см. database.ReadRouter)
+
+def get_read_db(request: Request, _slot: None = Depends(db_slot)):
+    params = {**request.query_params, **request.path_params}
+    db = read_router.session([params[name] for name in TG_ID_ATTRS if name in params])
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# сессия для /batch: все операции в одной транзакции соединения; commit() внутри маршрутов
+# её не фиксирует (join_transaction_mode="rollback_only"), фиксирует сам /batch
+
+def get_batch_db(_slot: None = Depends(db_slot)):
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode="rollback_only",
+        info={"external_transaction": transaction},
+    )
+    try:
+        yield db
+    finally:
+        db.close()
+        if transaction.is_active:
+            transaction.rollback()
+        connection.close()
+
+
+
+
+
+
+
+# объявлен до /olymp/{user_tg_id}, иначе "pending" примется за user_tg_id
+@app.get("/olymp/pending")
+async def get_pending_olymps(
+    after_id: Optional[int] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Очередь модерации: олимпиады, которые ещё не одобрены и не отклонены.
+
+    Аргументы:
+        after_id: id последней олимпиады предыдущей страницы.
+        limit: размер страницы.
+
+    Возвращает:
+        Список олимпиад по возрастанию id.
+    """
+    return list_pending(db, after_id, limit)
+
+
+@app.post("/olymp/moderate/")
+async def moderate_olymps_route(moderation: OlympModerationRequest, db: Session = Depends(get_db)):
+    """
+    Одобрить или отклонить сразу много олимпиад одним запросом к БД.
+
+    Аргументы:
+        moderation (OlympModerationRequest): ids (до 5000) и action — approve или reject.
+        db (Session): Сессия базы данных.
+
+    Возвращает:
+        results: список {id, status} в порядке ids без повторов; status — approved/rejected,
+        unchanged (уже в этом состоянии) или not_found.
+    """
+    outcomes = moderate_olymps(db, moderation.ids, approve=moderation.action == "approve")
+    db.commit()
+    return {"results": [{"id": olymp_id, "status": status} for olymp_id, status in outcomes.items()]}
+
 
+@app.post("/olymp/import/")
+async def import_olymps(
+    request: Request,
+    fmt: Literal["csv", "jsonl"] = Query(default="csv", alias="format"),
+    db: Session = Depends(get_db),
+):
+    """
+    Импортировать олимпиады из тела запроса: CSV с заголовком или JSON Lines (?format=jsonl).
 
+    Тело читается потоком; каждая строка проверяется OlympsBase, запись идёт пачками по
+    OLYMPS_IMPORT_CHUNK_SIZE строк (COPY на Postgres), дубликаты по естественному ключу и
+    олимпиады несуществующих пользователей пропускаются. Разбор и запись пачки выполняются
+    в пуле потоков, чтобы не блокировать event loop. Каждая пачка коммитится отдельно:
+    после сбоя импорт можно повторить целиком, записанные строки станут дубликатами.
 
+    Возвращает:
+        lines, accepted, duplicates, rejected и errors — первые ошибки с номером строки.
+    """
+    job = OlympImport(db, fmt)
+    async for lines in iter_line_batches(request.stream(), job.chunk_size):
+        await run_in_threadpool(job.feed, lines)
+    await run_in_threadpool(job.flush)
+    return job.summary()
 
 
 @app.get("/olymp/{user_tg_id}")
-async def get_user_olymps(user_tg_id: str, db: Session = Depends(get_db)):
+async def get_user_olymps(
+    user_tg_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db),
+):
     """
     Получить все олимпиады пользователя по его user_tg_id.
 
     Аргументы:
         user_tg_id (str): Telegram ID пользователя.
+        if_none_match: ETag из предыдущего ответа (заголовок If-None-Match).
         db (Session): Сессия базы данных.
 
     Возвращает:
-        Список олимпиад пользователя.
+        Список олимпиад пользователя с заголовком ETag или 304, если список не изменился.
 
     Исключения:
         404: Если олимпиады не найдены.
     """
-    result = (
-        db.query(models.Olymps).filter(models.Olymps.user_tg_id == user_tg_id).all()
-    )
+    etag = make_etag("o", olymps_version(db, user_tg_id))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    result = queries.user_olymps(db, user_tg_id)
     if not result:
         logger.warning(f"Ошибка Olymp is not found")
         raise HTTPException(status_code=404, detail="Olymp is not found")
+    response.headers["ETag"] = etag
     return result
 
 
@@ -70,13 +223,12 @@ async def create_olymp(olymp: OlympsBase, db: Session = Depends(get_db)):
     Возвращает:
         Созданная запись олимпиады или сообщение об ошибке, если запись уже существует.
     """
-    user = db.query(models.Users).filter(models.Users.tg_id == olymp.user_tg_id).first()
-    if not user:
+    if not queries.user_exists(db, olymp.user_tg_id):
         raise HTTPException(status_code=404, detail="User is not found")
     
+    catalog_id = resolve_catalog_id(db, olymp.name, olymp.profile)
     existing_olymp = db.query(models.Olymps).filter(
-        models.Olymps.name == olymp.name,
-        models.Olymps.profile == olymp.profile,
+        models.Olymps.catalog_id == catalog_id,
         models.Olymps.level == olymp.level,
         models.Olymps.user_tg_id == olymp.user_tg_id,
         models.Olymps.result == olymp.result,
@@ -93,15 +245,54 @@ async def create_olymp(olymp: OlympsBase, db: Session = Depends(get_db)):
         user_tg_id=olymp.user_tg_id,
         result=olymp.result,
         year=olymp.year,
-        is_approved=olymp.is_approved,
+        # диплом из официального реестра одобряется сразу, без модератора
+        is_approved=olymp.is_approved
+        or verify_olymp(db, olymp.user_tg_id, olymp.name, olymp.profile, olymp.year, olymp.result),
         is_displayed=olymp.is_displayed,
+        catalog_id=catalog_id,
     )
     db.add(db_olymp)
+    index_user_text(db, olymp.user_tg_id)
     db.commit()
     db.refresh(db_olymp)
     return db_olymp
 
 
+@app.get("/olymp/catalog/")
+async def get_olymp_catalog(profile: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """
+    Получить справочник олимпиад.
+
+    Аргументы:
+        profile: фильтр по профилю (без учёта регистра и лишних пробелов).
+
+    Возвращает:
+        Список записей справочника (id, name, profile).
+    """
+    return list_catalog(db, profile)
+
+
+@app.get("/olymp/catalog/{catalog_id}/users")
+async def get_olymp_participants(
+    catalog_id: int,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Получить пользователей, участвовавших в олимпиаде из справочника.
+
+    Аргументы:
+        catalog_id: id олимпиады в справочнике.
+        after_id: id последнего пользователя предыдущей страницы.
+        limit: размер страницы.
+
+    Возвращает:
+        Список пользователей, отсортированный по id.
+    """
+    return get_participants(db, catalog_id, after_id, limit)
+
+
 @app.post("/olymp/set_display/")
 async def set_olymp_display(olymp_id: int, db: Session = Depends(get_db)):
     """
@@ -127,6 +318,7 @@ async def set_olymp_display(olymp_id: int, db: Session = Depends(get_db)):
     if not existing_olymp:
         raise HTTPException(status_code=404, detail="Олимпиада не найдена")
     existing_olymp.is_displayed = not existing_olymp.is_displayed
+    existing_olymp.version = models.Olymps.version + 1
     db.commit()
     db.refresh(existing_olymp)
     return existing_olymp
@@ -151,6 +343,7 @@ async def delete_olymp(olymp_id: int, db: Session = Depends(get_db)):
     if not olymp:
         raise HTTPException(status_code=404, detail="Олимпиада не найдена")
     db.delete(olymp)
+    index_user_text(db, olymp.user_tg_id)
     db.commit()
     return {"detail": f"Олимпиада с id {olymp_id} успешно удалена"}
 
@@ -169,8 +362,13 @@ async def create_user(tg_id: str, db: Session = Depends(get_db)):
 
     Исключения:
         400: Если пользователь с таким tg_id уже существует.
+        409: Если пользователь с таким tg_id удалён, но его данные ещё не дочищены.
     """
     existing_user = db.query(models.Users).filter(models.Users.tg_id == tg_id).first()
+    if existing_user and existing_user.deleted_at is not None:
+        raise HTTPException(
+            status_code=409, detail="Пользователь с таким tg_id ещё удаляется, повторите позже"
+        )
     if existing_user:
         raise HTTPException(
             status_code=400, detail="Пользователь с таким tg_id уже существует"
@@ -185,22 +383,35 @@ async def create_user(tg_id: str, db: Session = Depends(get_db)):
 
 
 @app.get("/user/get/{tg_id}")
-async def get_user(tg_id: str, db: Session = Depends(get_db)):
+async def get_user(
+    tg_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db),
+):
     """
     Получить пользователя по tg_id вместе с его олимпиадами.
 
     Аргументы:
         tg_id (int): Telegram ID пользователя.
+        if_none_match: ETag из предыдущего ответа (заголовок If-None-Match).
 
     Возвращает:
-        Данные пользователя с полем olymps (массив его олимпиад).
+        Данные пользователя с полем olymps (массив его олимпиад) и заголовком ETag,
+        или 304, если ни пользователь, ни его олимпиады не изменились.
     """
-    user = db.query(models.Users).filter(models.Users.tg_id == tg_id).first()
+    version = user_version(db, tg_id)
+    if version is None:
+        return None
+    etag = make_etag("u", version, olymps_version(db, tg_id))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    user = db.query(models.Users).filter(models.Users.tg_id == tg_id, models.Users.deleted_at.is_(None)).first()
     if not user:
         return None
-    olymps = db.query(models.Olymps).filter(models.Olymps.user_tg_id == tg_id).all()
     user_data = user.__dict__.copy()
-    user_data["olymps"] = [olymp.__dict__ for olymp in olymps]
+    user_data["olymps"] = queries.user_olymps(db, tg_id)
     return user_data
 
 
@@ -221,7 +432,9 @@ async def update_user(user: UsersBase, db: Session = Depends(get_db)):
         404: Если пользователь не найден.
     """
     existing_user = (
-        db.query(models.Users).filter(models.Users.tg_id == user.tg_id).first()
+        db.query(models.Users)
+        .filter(models.Users.tg_id == user.tg_id, models.Users.deleted_at.is_(None))
+        .first()
     )
     if not existing_user:
         raise HTTPException(
@@ -248,6 +461,9 @@ async def update_user(user: UsersBase, db: Session = Depends(get_db)):
         value = getattr(user, field)
         if value is not None:
             setattr(existing_user, field, value)
+    existing_user.version = models.Users.version + 1
+    if user.description is not None:
+        index_user_text(db, user.tg_id)
     db.commit()
     db.refresh(existing_user)
     return user
@@ -258,6 +474,9 @@ async def delete_user(user_tg_id: str, db: Session = Depends(get_db)):
     """
     Удалить пользователя по tg_id.
 
+    Пользователь только помечается удалённым и сразу пропадает из всех чтений; его лайки
+    и олимпиады пачками удаляет services/purge_service.py.
+
     Аргументы:
         user_tg_id (int): Telegram ID пользователя.
         db (Session): Сессия базы данных.
@@ -268,10 +487,12 @@ async def delete_user(user_tg_id: str, db: Session = Depends(get_db)):
     Исключения:
         404: Если пользователь не найден.
     """
-    user = db.query(models.Users).filter(models.Users.tg_id == user_tg_id).first()
+    user = db.query(models.Users).filter(
+        models.Users.tg_id == user_tg_id, models.Users.deleted_at.is_(None)
+    ).first()
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
-    db.delete(user)
+    soft_delete_user(db, user)
     db.commit()
     return {"detail": f"Пользователь с tg_id {user_tg_id} успешно удален"}
 
@@ -323,6 +544,7 @@ async def delete_like(id: int, db: Session = Depends(get_db)):
     )
     if not like:
         raise HTTPException(status_code=404, detail="Лайк не найден")
+    adjust_counter(db, like.to_user_tg_id, like.is_like, -1)
     db.delete(like)
     db.commit()
     return {"detail": f"Like with id {id} was deleted"}
@@ -357,25 +579,54 @@ async def set_like_readed(from_user_tg_id: str, to_user_tg_id: str, db: Session
         raise HTTPException(status_code=404, detail="Лайк не найден")
     for like in likes:
         like.is_readed = True
-        db.commit()
-        db.refresh(like)
-    return likes
+    # ответ собирается до коммита: после него объекты истекают и перечитывались бы по одному
+    result = jsonable_encoder(likes)
+    db.commit()
+    return result
+
+
+CURSOR_HEADERS = {"since_id": "X-Next-Since-Id", "before_id": "X-Next-Before-Id"}
+
+
+def set_cursor_headers(response: Response, likes, count: int, since_id: Optional[int]) -> None:
+    for name, value in next_cursors(likes, count, since_id).items():
+        response.headers[CURSOR_HEADERS[name]] = str(value)
 
 
 @app.get("/like/get_last/")
-async def get_last_likes(user_tg_id: str, count: int, db: Session = Depends(get_db)):
+async def get_last_likes(
+    user_tg_id: str,
+    count: int,
+    response: Response,
+    since_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+):
     """
     Получить последние X лайков пользователя (кому он понравился).
+
+    since_id — только лайки новее курсора (от старых к новым), before_id — только старше.
+    Курсоры для следующего запроса — в заголовках X-Next-Since-Id и X-Next-Before-Id.
     """
     try:
-        return service_get_last_likes(db, user_tg_id, count)
+        likes = service_get_last_likes(db, user_tg_id, count, since_id, before_id)
+        set_cursor_headers(response, likes, count, since_id)
+        return likes
     except Exception:
         logger.exception("Не удалось получить последние лайки")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
 @app.get("/like/get_incoming/")
-async def get_incoming_likes(user_tg_id: str, only_unread: bool = True, count: int = 50, db: Session = Depends(get_db)):
+async def get_incoming_likes(
+    user_tg_id: str,
+    response: Response,
+    only_unread: bool = True,
+    count: int = 50,
+    since_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+):
     """
     Получить входящие лайки (кому вы понравились).
 
@@ -383,14 +634,65 @@ async def get_incoming_likes(user_tg_id: str, only_unread: bool = True, count: i
         user_tg_id: TG ID пользователя, которому поставили лайк
         only_unread: вернуть только непросмотренные (is_readed=False)
         count: ограничение количества
+        since_id: только лайки с id больше курсора, от старых к новым (опрос новых лайков)
+        before_id: только лайки с id меньше курсора (следующая страница в прошлое)
+
+    Курсоры для следующего запроса — в заголовках X-Next-Since-Id и X-Next-Before-Id.
     """
     q = db.query(models.Likes).filter(
         models.Likes.to_user_tg_id == user_tg_id,
         models.Likes.is_like == True,
-    ).order_by(models.Likes.id.desc())
+        from_active_user(),
+    )
     if only_unread:
         q = q.filter(models.Likes.is_readed == False)
-    return q.limit(count).all()
+    likes = page_likes(q, count, since_id, before_id)
+    set_cursor_headers(response, likes, count, since_id)
+    return likes
+
+
+@app.get("/like/stream/")
+async def stream_incoming_likes(
+    tg_id: Annotated[List[str], Query()],
+    last_event_id: Optional[str] = Header(default=None),
+):
+    """
+    Поток новых входящих лайков (Server-Sent Events) для набора пользователей.
+
+    Аргументы:
+        tg_id: Telegram ID получателей, можно передать несколько раз.
+        last_event_id: заголовок Last-Event-ID — id последнего полученного лайка; пропущенные
+            с тех пор лайки отправляются из БД перед новыми.
+
+    Возвращает:
+        text/event-stream: событие like с JSON лайка на каждый новый лайк и пинг в простое.
+
+    Исключения:
+        400: Если tg_id больше STREAM_MAX_TG_IDS или Last-Event-ID не число.
+    """
+    if len(tg_id) > STREAM_MAX_TG_IDS:
+        raise HTTPException(status_code=400, detail=f"Не больше {STREAM_MAX_TG_IDS} tg_id на поток")
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Last-Event-ID должен быть числом")
+
+    ensure_listener()
+    sub = hub.subscribe(tg_id)
+    backlog = []
+    if last_id is not None:
+        # сессия только на догрузку: поток может жить часами и не должен держать соединение
+        try:
+            with read_router.session(tg_id) as db:
+                backlog = missed_likes(db, tg_id, last_id)
+        except Exception:
+            hub.unsubscribe(sub)
+            raise
+    return StreamingResponse(
+        like_events(sub, backlog),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/test/{test}")
@@ -399,21 +701,203 @@ async def get_test(test: int):
 
 
 @app.get("/users/all")
-async def get_all_users(db: Session = Depends(get_db)):
+async def get_all_users(db: Session = Depends(get_read_db)):
     """
     Получить всех пользователей.
 
     Возвращает:
         Список всех пользователей из базы данных.
     """
-    users = db.query(models.Users).all()
+    users = db.query(models.Users).filter(models.Users.deleted_at.is_(None)).all()
     return users
 
 
+@app.get("/users/leaderboard/")
+async def get_leaderboard(limit: int = Query(default=10, ge=1, le=100), db: Session = Depends(get_read_db)):
+    """
+    Рейтинг пользователей по числу полученных лайков.
+
+    Аргументы:
+        limit: размер топа.
+
+    Возвращает:
+        Список {tg_id, first_name, username, likes_received, dislikes_received} по убыванию
+        likes_received; читается по индексу счётчика, без подсчёта лайков.
+    """
+    return leaderboard(db, limit)
+
+
+@app.get("/users/recommend/{tg_id}")
+def recommend_users(tg_id: str, limit: int = Query(default=20, ge=1, le=100), db: Session = Depends(get_read_db)):
+    """
+    Подбор сокомандников по оценке совместимости.
+
+    Аргументы:
+        tg_id: Telegram ID пользователя, для которого подбираются кандидаты.
+        limit: сколько кандидатов вернуть.
+
+    Возвращает:
+        Список {tg_id, score} по убыванию оценки (общие профили и уровни олимпиад, цель, город,
+        возраст, взаимный интерес) без самого пользователя, удалённых и уже оценённых им.
+
+    Исключения:
+        HTTPException 404: пользователь не найден.
+    """
+    result = recommender.recommend(db, tg_id, limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="User is not found")
+    recommender.maybe_refresh(SessionLocal)
+    return result
+
+
+@app.get("/users/search/")
+async def search_users(
+    profile: Optional[str] = None,
+    level: Optional[int] = Query(default=None, ge=0, le=3),
+    max_result: Optional[int] = Query(default=None, ge=0, le=3),
+    year: Optional[str] = None,
+    is_approved: Optional[bool] = None,
+    is_displayed: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Поиск пользователей по олимпиадам (например, призёры и победители 1 уровня по физике).
+
+    Аргументы:
+        profile: профиль олимпиады (без учёта регистра и лишних пробелов, как в справочнике).
+        level: уровень олимпиады (1,2,3, 0-не рсош).
+        max_result: худший допустимый результат (0-победитель, 1-призер, 2-финалист, 3-участник).
+        year: год олимпиады.
+        is_approved, is_displayed: фильтры по флагам олимпиады.
+        after_id: id последнего пользователя предыдущей страницы.
+        limit: размер страницы.
+
+    Возвращает:
+        Список пользователей без повторов, отсортированный по id.
+    """
+    return search_users_by_olymps(
+        db, profile, level, max_result, year, is_approved, is_displayed, after_id, limit
+    )
+
+
+@app.get("/users/search/text/")
+async def search_users_text(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Полнотекстовый поиск пользователей по описанию профиля и названиям олимпиад.
+
+    Аргументы:
+        q: поисковая строка (русский или английский текст).
+        limit, offset: страница результатов.
+
+    Возвращает:
+        Список пользователей, отсортированный по релевантности.
+    """
+    return search_users_by_text(db, q, limit, offset)
+
+
 @app.get("/like/exists/")
-async def like_exists(from_user_tg_id: str, to_user_tg_id: str, is_like: bool = True, db: Session = Depends(get_db)):
+async def like_exists(from_user_tg_id: str, to_user_tg_id: str, is_like: bool = True, include_archived: bool = False, db: Session = Depends(get_read_db)):
     try:
-        return {"exists": service_like_exists(db, from_user_tg_id, to_user_tg_id, is_like)}
+        return {"exists": service_like_exists(db, from_user_tg_id, to_user_tg_id, is_like, include_archived)}
     except Exception:
         logger.exception("Ошибка проверки существования лайка")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+# операции /batch: имя -> обработчик маршрута. Если у обработчика есть параметр-модель (тело запроса),
+# params операции — это тело; скалярные параметры берутся из params по имени.
+BATCH_OPERATIONS = {
+    "create_user": create_user,
+    "update_user": update_user,
+    "delete_user": delete_user,
+    "create_olymp": create_olymp,
+    "set_olymp_display": set_olymp_display,
+    "delete_olymp": delete_olymp,
+    "moderate_olymps": moderate_olymps_route,
+    "create_like": create_like,
+    "delete_like": delete_like,
+    "set_like_read": set_like_readed,
+}
+
+# операции /batch, которые расходуют лимиты одиночных маршрутов (по ключу и общий), см. rate_limit.py
+BATCH_RATE_LIMITED_ROUTES = {
+    "create_like": "/like/create/",
+    "create_olymp": "/olymp/create/",
+}
+
+_BATCH_SIGNATURES = {
+    name: [
+        (param.name, param.annotation)
+        for param in inspect.signature(handler).parameters.values()
+        if param.name != "db"
+    ]
+    for name, handler in BATCH_OPERATIONS.items()
+}
+
+
+def _batch_kwargs(op: str, params: dict) -> dict:
+    kwargs = {}
+    for name, annotation in _BATCH_SIGNATURES[op]:
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            kwargs[name] = annotation.model_validate(params)
+        else:
+            kwargs[name] = TypeAdapter(annotation).validate_python(params.get(name))
+    return kwargs
+
+
+@app.post("/batch")
+async def run_batch(batch: BatchRequest, request: Request, db: Session = Depends(get_batch_db)):
+    """
+    Выполнить несколько операций по порядку в одной сессии и одной транзакции.
+
+    Аргументы:
+        batch (BatchRequest): список операций {"op": имя, "params": параметры}; имена — ключи BATCH_OPERATIONS.
+        db (Session): Сессия внутри общей транзакции.
+
+    Возвращает:
+        committed: зафиксирована ли транзакция;
+        results: по одному элементу на операцию — status (HTTP-код, как у отдельного маршрута),
+        result или detail. После первой ошибки транзакция откатывается, остальные операции
+        получают status 424 и не выполняются. Операции из BATCH_RATE_LIMITED_ROUTES списывают
+        лимиты своих маршрутов; операция сверх лимита получает status 429.
+    """
+    rate_limiter = getattr(request.state, "rate_limiter", None)
+    results = []
+    failed = False
+    for operation in batch.operations:
+        if failed:
+            results.append({"op": operation.op, "status": 424, "detail": "Skipped: previous operation failed"})
+            continue
+        try:
+            if operation.op not in BATCH_OPERATIONS:
+                raise HTTPException(status_code=400, detail=f"Unknown operation {operation.op}")
+            try:
+                kwargs = _batch_kwargs(operation.op, operation.params)
+            except ValidationError as ve:
+                raise HTTPException(status_code=422, detail=jsonable_encoder(ve.errors(include_url=False)))
+            limited_route = BATCH_RATE_LIMITED_ROUTES.get(operation.op)
+            if rate_limiter is not None and limited_route and rate_limiter.acquire(limited_route, operation.params):
+                raise HTTPException(status_code=429, detail="Too Many Requests")
+            result = await BATCH_OPERATIONS[operation.op](db=db, **kwargs)
+            results.append({"op": operation.op, "status": 200, "result": jsonable_encoder(result)})
+        except HTTPException as he:
+            failed = True
+            results.append({"op": operation.op, "status": he.status_code, "detail": he.detail})
+        except Exception:
+            logger.exception(f"Ошибка операции {operation.op} в /batch")
+            failed = True
+            results.append({"op": operation.op, "status": 500, "detail": "Internal Server Error"})
+
+    if failed:
+        db.info["external_transaction"].rollback()
+    else:
+        db.info["external_transaction"].commit()
+        run_after_commit(db)
+    return {"committed": not failed, "results": results}
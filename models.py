@@ -1,4 +1,5 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, and_, false, func, text
+from sqlalchemy.dialects import postgresql  # noqa: F401  (регистрирует func.to_tsvector с типом REGCONFIG)
 from database import Base
 import uuid
 
@@ -7,6 +8,30 @@ def generate_uuid_str() -> str:
     return str(uuid.uuid4())
 
 
+def tsvector_ru_en(column):
+    # документ полнотекстового поиска Postgres: русская и английская морфология вместе;
+    # выражение должно совпадать в индексе и в запросе (services/search_service.py)
+    document = func.coalesce(column, "")
+    return func.to_tsvector(text("'russian'::regconfig"), document).op("||")(
+        func.to_tsvector(text("'english'::regconfig"), document)
+    )
+
+
+class OlympCatalog(Base):
+    # справочник олимпиад: одна строка на нормализованную пару (название, профиль)
+    __tablename__ = "olymp_catalog"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    profile = Column(String, nullable=False)
+    name_key = Column(String, nullable=False)  # нормализованные значения, см. services/catalog_service.py
+    profile_key = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_olymp_catalog_keys", "name_key", "profile_key", unique=True),
+    )
+
+
 class Olymps(Base):
     __tablename__ = "olymps"
 
@@ -14,13 +39,21 @@ class Olymps(Base):
     name = Column(String, nullable=False)
     profile = Column(String, nullable=False)
     level = Column(Integer, default=0)  # 1,2,3, 0-не рсош
-    user_tg_id = Column(String, ForeignKey("users.tg_id", ondelete="CASCADE"), nullable=False)
+    user_tg_id = Column(String, ForeignKey("users.tg_id", ondelete="CASCADE"), nullable=False, index=True)
     result = Column(
         Integer, nullable=False
     )  # 0-победитель, 1-призер, 2-финалист, 3-участник
     year = Column(String, nullable=False)
     is_approved = Column(Boolean, default=False)
+    is_rejected = Column(Boolean, nullable=False, default=False, server_default=false())  # отклонена модератором
     is_displayed = Column(Boolean, default=False)
+    catalog_id = Column(Integer, ForeignKey("olymp_catalog.id"), nullable=True, index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # для ETag, растёт при каждом изменении
+
+    __table_args__ = (
+        # поиск команды: фильтр по профилю/уровню/результату, user_tg_id — для index-only scan
+        Index("ix_olymps_profile_level_result", "profile", "level", "result", "user_tg_id"),
+    )
 
 
 class Users(Base):
@@ -46,14 +79,69 @@ class Users(Base):
     photo_id = Column(String, nullable=True)
     description = Column(String, nullable=True)
     gender = Column(Boolean, nullable=True) # 0m 1g
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # для ETag, растёт при каждом изменении
+    # мягкое удаление: пользователь скрыт сразу, данные удаляет services/purge_service.py
+    deleted_at = Column(DateTime, nullable=True, index=True)
+    # полученные лайки и дизлайки (включая архив); ведутся в транзакциях вставки и удаления лайков,
+    # пересчитываются python -m services.popularity_service
+    likes_received = Column(Integer, nullable=False, default=0, server_default="0")
+    dislikes_received = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # рейтинг: ORDER BY likes_received DESC, id DESC LIMIT N — обратный проход по индексу
+        Index("ix_users_likes_received", "likes_received", "id"),
+    )
+
+
+# очередь модерации: только олимпиады, которые ещё не одобрены и не отклонены (services/moderation_service.py);
+# условие должно совпадать с PENDING_OLYMP в запросе, иначе планировщик не возьмёт частичный индекс
+PENDING_OLYMP = and_(Olymps.is_approved == False, Olymps.is_rejected == False)
+Index("ix_olymps_pending", Olymps.id, postgresql_where=PENDING_OLYMP, sqlite_where=PENDING_OLYMP)
+
+Index(
+    "ix_users_description_fts", tsvector_ru_en(Users.description), postgresql_using="gin"
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_olymps_name_fts", tsvector_ru_en(Olymps.name), postgresql_using="gin"
+).ddl_if(dialect="postgresql")
 
 
 class Likes(Base):
     __tablename__ = "likes"
 
     id = Column(Integer, primary_key=True, index=True)
-    from_user_tg_id = Column(String, ForeignKey("users.tg_id", ondelete="CASCADE"), nullable=False)
+    from_user_tg_id = Column(String, ForeignKey("users.tg_id", ondelete="CASCADE"), nullable=False, index=True)
     to_user_tg_id = Column(String, ForeignKey("users.tg_id", ondelete="CASCADE"), nullable=False)
     text = Column(String, nullable=True)
     is_like = Column(Boolean, nullable=False)
     is_readed = Column(Boolean, default=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        # входящие лайки пользователя по курсору since_id/before_id — keyset по id внутри получателя
+        Index("ix_likes_to_user_id", "to_user_tg_id", "id"),
+    )
+
+
+class LikesArchive(Base):
+    # прочитанные лайки старше горизонта архивации (см. services/archive_service.py)
+    __tablename__ = "likes_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    from_user_tg_id = Column(String, nullable=False, index=True)
+    to_user_tg_id = Column(String, nullable=False, index=True)
+    text = Column(String, nullable=True)
+    is_like = Column(Boolean, nullable=False)
+    is_readed = Column(Boolean, default=True)
+    created_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class Outbox(Base):
+    # события, записанные в одной транзакции с изменением данных; публикуются relay-процессом
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    routing_key = Column(String, nullable=False)
+    payload = Column(String, nullable=False)  # JSON
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -0,0 +1,87 @@
+import cProfile
+import hmac
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from logger import LOG_DIR, logger
+
+# Профилирование запросов. Middleware подключается в main.py только при PROFILING_ENABLED=1,
+# поэтому в выключенном состоянии оно ничего не стоит.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+# запрос профилируется, если в заголовке PROFILING_HEADER передан этот секрет (пустой — только выборка)
+PROFILING_SECRET = os.getenv("PROFILING_SECRET", "")
+PROFILING_HEADER = os.getenv("PROFILING_HEADER", "x-profile").lower().encode()
+# доля случайно профилируемых запросов, 0..1
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(LOG_DIR, "profiles"))
+
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def profile_filename(method: str, route: str, duration: float, now: Optional[datetime] = None) -> str:
+    """Имя файла профиля: время, метод, шаблон маршрута и длительность, например 20261019-120501-123456_GET_user_get_tg_id_37ms.prof."""
+    stamp = (now or datetime.now()).strftime("%Y%m%d-%H%M%S-%f")
+    slug = _UNSAFE_RE.sub("_", route).strip("_") or "root"
+    return f"{stamp}_{method}_{slug}_{round(duration * 1000)}ms.prof"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware: профилирует запрос cProfile и сохраняет pstats-дамп в PROFILING_DIR.
+
+    Профилируется запрос с секретом в заголовке или попавший в случайную выборку. cProfile
+    детерминированный и видит весь поток event loop, поэтому в профиль попадают и
+    параллельные запросы; одновременно профилируется не больше одного запроса, остальные
+    выполняются как обычно. Потоки threadpool cProfile не видит: от sync-маршрутов
+    (GET /users/recommend/) и sync-зависимостей (get_db) в профиле остаётся только ожидание.
+    Смотреть: python -m pstats <файл> или snakeviz.
+    """
+
+    def __init__(
+        self,
+        app,
+        secret: str = PROFILING_SECRET,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        directory: str = PROFILING_DIR,
+        header: bytes = PROFILING_HEADER,
+    ):
+        self.app = app
+        self.secret = secret.encode()
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.header = header
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _requested(self, scope) -> bool:
+        if self.secret:
+            for name, value in scope.get("headers", ()):
+                if name == self.header:
+                    return hmac.compare_digest(value, self.secret)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope) or not self.lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.disable()
+        finally:
+            self.lock.release()
+            duration = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", scope["path"])
+            path = os.path.join(self.directory, profile_filename(scope["method"], route, duration))
+            profiler.dump_stats(path)
+            logger.info(f"Профиль запроса {scope['method']} {scope['path']} ({duration * 1000:.0f} мс): {path}")
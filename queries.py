@@ -0,0 +1,59 @@
+from typing import List
+
+from sqlalchemy import exists, lambda_stmt, select
+from sqlalchemy.orm import Session
+
+import models
+
+# Горячие запросы на уровне Core.
+# lambda_stmt строит select() один раз на место вызова и кэширует его вместе со скомпилированным
+# SQL; при следующих вызовах из замыкания берутся только значения параметров. Результат —
+# bool или строки колонок, без ORM Query и без создания объектов в identity map.
+
+
+def user_exists(db: Session, tg_id: str) -> bool:
+    """Есть ли пользователь с tg_id (удалённые не считаются)."""
+    stmt = lambda_stmt(
+        lambda: select(exists().where(models.Users.tg_id == tg_id, models.Users.deleted_at.is_(None)))
+    )
+    return db.execute(stmt).scalar()
+
+
+def like_exists(db: Session, from_user_tg_id: str, to_user_tg_id: str, is_like: bool) -> bool:
+    """Есть ли лайк from -> to от неудалённого отправителя."""
+    stmt = lambda_stmt(
+        lambda: select(
+            exists().where(
+                models.Likes.from_user_tg_id == from_user_tg_id,
+                models.Likes.to_user_tg_id == to_user_tg_id,
+                models.Likes.is_like == is_like,
+                exists().where(
+                    models.Users.tg_id == models.Likes.from_user_tg_id, models.Users.deleted_at.is_(None)
+                ),
+            )
+        )
+    )
+    return db.execute(stmt).scalar()
+
+
+def archived_like_exists(db: Session, from_user_tg_id: str, to_user_tg_id: str, is_like: bool) -> bool:
+    stmt = lambda_stmt(
+        lambda: select(
+            exists().where(
+                models.LikesArchive.from_user_tg_id == from_user_tg_id,
+                models.LikesArchive.to_user_tg_id == to_user_tg_id,
+                models.LikesArchive.is_like == is_like,
+            )
+        )
+    )
+    return db.execute(stmt).scalar()
+
+
+def user_olymps(db: Session, user_tg_id: str) -> List[dict]:
+    """Олимпиады неудалённого пользователя словарями колонок (те же поля, что у модели Olymps)."""
+    stmt = lambda_stmt(
+        lambda: select(models.Olymps.__table__)
+        .join(models.Users, models.Users.tg_id == models.Olymps.user_tg_id)
+        .where(models.Olymps.user_tg_id == user_tg_id, models.Users.deleted_at.is_(None))
+    )
+    return [dict(row) for row in db.execute(stmt).mappings()]
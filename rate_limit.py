@@ -0,0 +1,168 @@
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+
+# Лимиты по маршрутам: rate — токенов в секунду, burst — ёмкость корзины.
+# key — поле JSON-тела, по которому считается персональный лимит (tg_id отправителя).
+DEFAULT_RATE_LIMITS = {
+    "/like/create/": {"key": "from_user_tg_id", "rate": 2, "burst": 30, "global_rate": 300, "global_burst": 600},
+    "/olymp/create/": {"key": "user_tg_id", "rate": 0.5, "burst": 20, "global_rate": 100, "global_burst": 200},
+    # в /batch нет одного tg_id: общий лимит на запросы, а операции create_like/create_olymp
+    # расходуют корзины своих маршрутов (main.BATCH_RATE_LIMITED_ROUTES)
+    "/batch": {"global_rate": 50, "global_burst": 100},
+}
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000))
+RATE_LIMITS = json.loads(os.getenv("RATE_LIMITS_JSON") or "null") or DEFAULT_RATE_LIMITS
+
+
+class TokenBucketLimiter:
+    """
+    Набор token bucket по ключам с ограниченной памятью.
+
+    Корзины хранятся в OrderedDict в порядке последнего обращения; при превышении
+    max_keys вытесняется самая давняя. Вытесненный ключ при следующем запросе сразу получает
+    полную корзину, даже если его корзина не успела наполниться. Без потерь это только когда
+    за burst / rate секунд обращается меньше max_keys ключей; новые ключи поступают не быстрее
+    общего лимита маршрута (RouteLimit проверяет его первым), отсюда и выбор max_keys.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Взять токен. Возвращает 0, если запрос разрешён, иначе — сколько секунд ждать."""
+        if now is None:
+            now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_keys:
+                self.buckets.popitem(last=False)
+            bucket = self.buckets[key] = [self.burst, now]
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+    def refund(self, key: str) -> None:
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.burst, bucket[0] + 1)
+
+
+class RouteLimit:
+    def __init__(self, key: Optional[str], rate: float, burst: float, global_rate: float, global_burst: float, max_keys: int):
+        self.key = key
+        self.per_key = TokenBucketLimiter(rate, burst, max_keys)
+        self.global_ = TokenBucketLimiter(global_rate, global_burst, 1)
+
+    def acquire(self, key: Optional[str], now: Optional[float] = None) -> float:
+        """
+        Взять токен из общей корзины, затем из корзины key. Возвращает 0 или сколько секунд ждать.
+
+        Общий лимит проверяется первым: отклонённый по нему запрос не заводит корзину для key
+        и не вытесняет чужие, поэтому перебор tg_id не сбрасывает корзины настоящих пользователей.
+        """
+        if now is None:
+            now = time.monotonic()
+        retry_after = self.global_.acquire("*", now)
+        if retry_after or key is None:
+            return retry_after
+        retry_after = self.per_key.acquire(key, now)
+        if retry_after:
+            self.global_.refund("*")
+        return retry_after
+
+
+class RateLimitMiddleware:
+    """
+    ASGI-middleware: персональный (по tg_id из тела запроса) и глобальный лимит на маршрут.
+
+    Тело читается только у лимитируемых маршрутов и передаётся приложению без изменений.
+    При превышении лимита отвечает 429 с заголовком Retry-After. Сам middleware доступен
+    обработчикам как request.state.rate_limiter — /batch списывает через него лимиты операций.
+    """
+
+    def __init__(self, app, limits: Dict[str, dict] = RATE_LIMITS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.app = app
+        self.routes = {
+            path: RouteLimit(
+                cfg.get("key"),
+                cfg.get("rate", 1),
+                cfg.get("burst", 1),
+                cfg.get("global_rate", float("inf")),
+                cfg.get("global_burst", float("inf")),
+                max_keys,
+            )
+            for path, cfg in limits.items()
+        }
+
+    def acquire(self, path: str, params: dict) -> float:
+        """Списать лимиты маршрута path за операцию с телом params. Возвращает 0 или сколько секунд ждать."""
+        route = self.routes.get(path)
+        if route is None:
+            return 0.0
+        value = params.get(route.key) if route.key else None
+        return route.acquire(str(value) if value is not None else None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["rate_limiter"] = self
+        route = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                await self.app(scope, receive, send)
+                return
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        retry_after = route.acquire(_extract_key(body, route.key))
+        if retry_after:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too Many Requests"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
+
+
+def _extract_key(body: bytes, field: Optional[str]) -> Optional[str]:
+    if not field:
+        return None
+    try:
+        value = json.loads(body).get(field)
+    except (ValueError, AttributeError):
+        return None
+    return str(value) if value is not None else None
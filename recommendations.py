@@ -0,0 +1,294 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+
+import models
+from logger_config import logger
+from services.catalog_service import normalize
+
+# как часто проверять, изменились ли пользователи и их олимпиады (сверка идёт в фоновом потоке)
+RECOMMEND_REFRESH_SECONDS = float(os.getenv("RECOMMEND_REFRESH_SECONDS", 30))
+RECOMMEND_LOAD_BATCH = int(os.getenv("RECOMMEND_LOAD_BATCH", 1000))
+# разница в возрасте, при которой вклад возраста падает до нуля
+RECOMMEND_AGE_SPAN = float(os.getenv("RECOMMEND_AGE_SPAN", 5))
+
+# веса составляющих оценки совместимости
+SCORE_WEIGHTS = {
+    "profile": 1.0,  # за каждый общий профиль олимпиад
+    "level": 0.5,  # за каждую общую пару (профиль, уровень)
+    "goal": 2.0,
+    "city": 1.0,
+    "age": 1.0,  # линейно от 1 при равном возрасте до 0 при разнице RECOMMEND_AGE_SPAN
+    "interest": 1.0,  # взаимный who_interested / gender
+}
+
+# who_interested (0-ж, 1-м, 2-все) -> подходящий gender (True=ж, False=м); -1 — любой.
+# Индекс сдвинут на 1, чтобы «не заполнено» (-1) попадало в нулевую ячейку.
+_WANTED_GENDER = np.array([-1, 1, 0, -1], dtype=np.int8)
+
+
+def _code(value: Optional[int]) -> int:
+    return -1 if value is None else int(value)
+
+
+class Features:
+    """
+    Признаки всех пользователей в столбцах NumPy, одна строка на пользователя.
+
+    После публикации объект не изменяется: обновление строит копию и подменяет ссылку,
+    поэтому запросы читают его без блокировок.
+    """
+
+    __slots__ = (
+        "tg_ids", "row_of", "signatures", "active", "profiles", "levels", "goal", "city", "age", "gender", "who",
+    )
+
+    def __init__(self, size: int = 0):
+        self.tg_ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.signatures = np.zeros(size, dtype=np.int64)
+        self.active = np.zeros(size, dtype=bool)
+        self.profiles = np.zeros(size, dtype=np.uint64)  # битовая маска профилей олимпиад
+        # маски профилей отдельно для каждого уровня 0..3 (строка на уровень): пары (профиль, уровень)
+        # совпадают только при общем профиле
+        self.levels = np.zeros((4, size), dtype=np.uint64)
+        self.goal = np.full(size, -1, dtype=np.int8)
+        self.city = np.full(size, -1, dtype=np.int32)
+        self.age = np.full(size, -1, dtype=np.int16)
+        self.gender = np.full(size, -1, dtype=np.int8)
+        self.who = np.full(size, -1, dtype=np.int8)
+
+    def copy(self, size: int) -> "Features":
+        new = Features(size)
+        new.tg_ids = list(self.tg_ids)
+        new.row_of = dict(self.row_of)
+        n = len(self.tg_ids)
+        for name in ("signatures", "active", "profiles", "levels", "goal", "city", "age", "gender", "who"):
+            getattr(new, name)[..., :n] = getattr(self, name)
+        return new
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            getattr(self, name).nbytes
+            for name in ("signatures", "active", "profiles", "levels", "goal", "city", "age", "gender", "who")
+        )
+
+
+class Recommender:
+    """
+    Подбор сокомандников: оценка совместимости со всеми пользователями сразу и top-K.
+
+    Признаки живут в Features процесса. refresh() сверяет подпись каждого пользователя
+    (users.version и агрегат по его олимпиадам, как в ETag) и перечитывает только строки
+    изменившихся, новых и удалённых пользователей. Запросы не ждут обновления: оно идёт
+    в фоновом потоке не чаще раза в refresh_seconds, синхронно строится только первая версия.
+    """
+
+    def __init__(self, refresh_seconds: float = RECOMMEND_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.features: Optional[Features] = None
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+        self.refresher: Optional[threading.Thread] = None
+        self.cities: Dict[str, int] = {}
+        self.profile_bits: Dict[str, int] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.features is not None
+
+    def _profile_bit(self, profile: str) -> int:
+        # первые 64 профиля получают собственные биты, следующие делят их по хэшу
+        key = normalize(profile)
+        bit = self.profile_bits.get(key)
+        if bit is None:
+            bit = len(self.profile_bits) if len(self.profile_bits) < 64 else hash(key) % 64
+            self.profile_bits[key] = bit
+        return bit
+
+    def _city_code(self, city: Optional[str]) -> int:
+        if not city or not city.strip():
+            return -1
+        return self.cities.setdefault(normalize(city), len(self.cities))
+
+    def _signatures(self, db: Session, tg_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        olymps = (
+            select(
+                models.Olymps.user_tg_id,
+                func.count(models.Olymps.id).label("count"),
+                func.sum(models.Olymps.id).label("ids"),
+                func.sum(models.Olymps.version).label("versions"),
+            )
+            .group_by(models.Olymps.user_tg_id)
+            .subquery()
+        )
+        stmt = (
+            select(models.Users.tg_id, models.Users.version, olymps.c.count, olymps.c.ids, olymps.c.versions)
+            .outerjoin(olymps, olymps.c.user_tg_id == models.Users.tg_id)
+            .where(models.Users.deleted_at.is_(None))
+        )
+        if tg_ids is not None:
+            stmt = stmt.where(models.Users.tg_id.in_(tg_ids))
+        rows = db.execute(stmt)
+        return {tg_id: hash((version, count, ids, versions)) for tg_id, version, count, ids, versions in rows}
+
+    def _load_rows(self, db: Session, features: Features, tg_ids: List[str]) -> None:
+        users = db.execute(
+            select(
+                models.Users.tg_id, models.Users.goal, models.Users.city, models.Users.age,
+                models.Users.gender, models.Users.who_interested,
+            ).where(models.Users.tg_id.in_(tg_ids))
+        ).all()
+        profiles = dict.fromkeys(tg_ids, 0)
+        levels = {tg_id: [0, 0, 0, 0] for tg_id in tg_ids}
+        for tg_id, profile, level in db.execute(
+            select(models.Olymps.user_tg_id, models.Olymps.profile, models.Olymps.level).where(
+                models.Olymps.user_tg_id.in_(tg_ids)
+            )
+        ):
+            bit = self._profile_bit(profile)
+            profiles[tg_id] |= 1 << bit
+            levels[tg_id][(level or 0) % 4] |= 1 << bit
+        for tg_id, goal, city, age, gender, who in users:
+            row = features.row_of[tg_id]
+            features.active[row] = True
+            features.profiles[row] = profiles[tg_id]
+            features.levels[:, row] = levels[tg_id]
+            features.goal[row] = _code(goal)
+            features.city[row] = self._city_code(city)
+            features.age[row] = _code(age)
+            features.gender[row] = _code(gender)
+            features.who[row] = _code(who)
+
+    def refresh(self, db: Session, tg_ids: Optional[List[str]] = None) -> dict:
+        """
+        Синхронно привести признаки к данным БД. Возвращает счётчики изменённых строк.
+
+        tg_ids — сверить только этих пользователей (удалённые при этом не ищутся).
+        """
+        started = time.perf_counter()
+        old = self.features or Features()
+        signatures = self._signatures(db, tg_ids)
+        changed = [
+            tg_id for tg_id, signature in signatures.items()
+            if tg_id not in old.row_of or old.signatures[old.row_of[tg_id]] != signature
+        ]
+        removed = [] if tg_ids is not None else [
+            row for tg_id, row in old.row_of.items() if tg_id not in signatures and old.active[row]
+        ]
+        if self.features is not None and not changed and not removed:
+            if tg_ids is None:
+                self.refreshed_at = time.monotonic()
+            return {"changed": 0, "removed": 0}
+
+        added = [tg_id for tg_id in changed if tg_id not in old.row_of]
+        features = old.copy(len(old.tg_ids) + len(added))
+        for tg_id in added:
+            features.row_of[tg_id] = len(features.tg_ids)
+            features.tg_ids.append(tg_id)
+        # удалённые пользователи остаются строками, но больше не рекомендуются
+        features.active[removed] = False
+        for tg_id in changed:
+            features.signatures[features.row_of[tg_id]] = signatures[tg_id]
+        for start in range(0, len(changed), RECOMMEND_LOAD_BATCH):
+            self._load_rows(db, features, changed[start:start + RECOMMEND_LOAD_BATCH])
+        db.rollback()
+        self.features = features
+        if tg_ids is None:
+            self.refreshed_at = time.monotonic()
+        stats = {"changed": len(changed), "removed": len(removed)}
+        logger.info(
+            f"Признаки рекомендаций обновлены: {stats}, строк {len(features.tg_ids)}, "
+            f"{features.nbytes / 2**20:.1f} МиБ, {time.perf_counter() - started:.2f} с"
+        )
+        return stats
+
+    def _refresh_and_unlock(self, session_factory) -> None:
+        try:
+            with session_factory() as db:
+                self.refresh(db)
+        except Exception:
+            logger.exception("Не удалось обновить признаки рекомендаций")
+        finally:
+            self.lock.release()
+
+    def maybe_refresh(self, session_factory) -> None:
+        """Запустить обновление в фоне, если признаки старше refresh_seconds и оно ещё не идёт."""
+        if time.monotonic() - self.refreshed_at < self.refresh_seconds or not self.lock.acquire(blocking=False):
+            return
+        self.refresher = threading.Thread(
+            target=self._refresh_and_unlock, args=(session_factory,), name="recommend-refresh", daemon=True
+        )
+        self.refresher.start()
+
+    def scores(self, features: Features, row: int) -> np.ndarray:
+        """Оценки совместимости пользователя row со всеми строками features (float32)."""
+        n = len(features.tg_ids)
+        w = SCORE_WEIGHTS
+        score = w["profile"] * np.bitwise_count(features.profiles[:n] & features.profiles[row]).astype(np.float32)
+        for level, mask in enumerate(features.levels[:, row]):
+            # у большинства олимпиады одного-двух уровней: пустые уровни не считаются
+            if mask:
+                score += w["level"] * np.bitwise_count(features.levels[level, :n] & mask)
+        if features.goal[row] >= 0:
+            score += w["goal"] * (features.goal[:n] == features.goal[row])
+        if features.city[row] >= 0:
+            score += w["city"] * (features.city[:n] == features.city[row])
+        if features.age[row] >= 0:
+            proximity = 1 - np.abs(features.age[:n] - features.age[row]) / RECOMMEND_AGE_SPAN
+            score += w["age"] * np.where(features.age[:n] >= 0, np.clip(proximity, 0, 1), 0)
+        # взаимный интерес: кандидат подходит пользователю и пользователь — кандидату; пусто — подходит
+        wanted = _WANTED_GENDER[features.who[row] + 1]
+        candidate_wanted = _WANTED_GENDER[features.who[:n] + 1]
+        fits = (wanted < 0) | (features.gender[:n] < 0) | (features.gender[:n] == wanted)
+        fits &= (candidate_wanted < 0) | (features.gender[row] < 0) | (candidate_wanted == features.gender[row])
+        score += w["interest"] * fits
+        return score
+
+    def recommend(self, db: Session, tg_id: str, limit: int = 20) -> Optional[List[dict]]:
+        """
+        top-limit кандидатов для tg_id по убыванию оценки, без уже оценённых им пользователей
+        (likes и likes_archive, лайки и дизлайки). None — пользователя нет в признаках.
+        """
+        if self.features is None or tg_id not in self.features.row_of:
+            # первый запрос процесса — полная загрузка; пользователь новее последнего обновления —
+            # только его строка (несуществующий tg_id стоит одного запроса)
+            with self.lock:
+                self.refresh(db, None if self.features is None else [tg_id])
+        features = self.features
+        row = features.row_of.get(tg_id)
+        if row is None or not features.active[row]:
+            return None
+
+        score = self.scores(features, row)
+        excluded = [row]
+        excluded += [features.row_of[rated] for rated in rated_users(db, tg_id) if rated in features.row_of]
+        score[excluded] = -np.inf
+        score[~features.active[: len(score)]] = -np.inf
+
+        k = min(limit, len(score))
+        top = np.argpartition(score, -k)[-k:]
+        top = top[np.lexsort((top, -score[top]))]
+        return [
+            {"tg_id": features.tg_ids[i], "score": round(float(score[i]), 3)}
+            for i in top if score[i] != -np.inf
+        ]
+
+
+def rated_users(db: Session, tg_id: str) -> Iterable[str]:
+    """Кому пользователь уже ставил лайк или дизлайк, включая архив (по индексам from_user_tg_id)."""
+    return db.execute(
+        union(
+            select(models.Likes.to_user_tg_id).where(models.Likes.from_user_tg_id == tg_id),
+            select(models.LikesArchive.to_user_tg_id).where(models.LikesArchive.from_user_tg_id == tg_id),
+        )
+    ).scalars()
+
+
+recommender = Recommender()
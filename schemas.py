@@ -1,4 +1,4 @@
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 
 
@@ -50,4 +50,18 @@ class LikesBase(BaseModel):
         from_user_tg_id = info.data.get("from_user_tg_id")
         if from_user_tg_id and from_user_tg_id == to_user_tg_id:
             raise ValueError("from_user_tg_id and to_user_tg_id must be different")
-        return to_user_tg_id
\ No newline at end of file
+        return to_user_tg_id
+
+
+class OlympModerationRequest(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=5000)
+    action: Literal["approve", "reject"]
+
+
+class BatchOperation(BaseModel):
+    op: str = Field(min_length=1, max_length=64)  # имя операции из main.BATCH_OPERATIONS
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(min_length=1, max_length=50)
@@ -0,0 +1,105 @@
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+import models
+
+LIKES_ARCHIVE_AFTER_DAYS = int(os.getenv("LIKES_ARCHIVE_AFTER_DAYS", 90))
+LIKES_ARCHIVE_BATCH_SIZE = int(os.getenv("LIKES_ARCHIVE_BATCH_SIZE", 1000))
+LIKES_ARCHIVE_INTERVAL = int(os.getenv("LIKES_ARCHIVE_INTERVAL", 3600))
+
+ARCHIVE_COLUMNS = ("id", "from_user_tg_id", "to_user_tg_id", "text", "is_like", "is_readed", "created_at")
+
+
+def archive_cutoff(now: Optional[datetime] = None, days: int = LIKES_ARCHIVE_AFTER_DAYS) -> datetime:
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+
+def archive_batch(db: Session, older_than: datetime, batch_size: int = LIKES_ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Перенести одну пачку прочитанных лайков старше older_than в likes_archive.
+
+    Каждая пачка — отдельная короткая транзакция: блокируются только выбранные строки,
+    а на Postgres уже заблокированные другими транзакциями строки пропускаются (SKIP LOCKED).
+
+    Возвращает количество перенесённых лайков.
+    """
+    ids_stmt = (
+        select(models.Likes.id)
+        .where(models.Likes.is_readed == True, models.Likes.created_at < older_than)
+        .order_by(models.Likes.id)
+        .limit(batch_size)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        ids_stmt = ids_stmt.with_for_update(skip_locked=True)
+    ids = db.execute(ids_stmt).scalars().all()
+    if not ids:
+        db.rollback()
+        return 0
+
+    columns = [getattr(models.Likes, name) for name in ARCHIVE_COLUMNS]
+    db.execute(
+        insert(models.LikesArchive).from_select(
+            list(ARCHIVE_COLUMNS), select(*columns).where(models.Likes.id.in_(ids))
+        )
+    )
+    db.execute(delete(models.Likes).where(models.Likes.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def archive_read_likes(
+    db: Session,
+    older_than: Optional[datetime] = None,
+    batch_size: int = LIKES_ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    pause: float = 0.0,
+) -> int:
+    """
+    Архивировать прочитанные лайки старше горизонта пачками по batch_size.
+
+    Аргументы:
+        older_than: граница по created_at (по умолчанию — LIKES_ARCHIVE_AFTER_DAYS назад).
+        batch_size: размер одной пачки (одной транзакции).
+        max_batches: ограничение числа пачек за один запуск.
+        pause: пауза между пачками в секундах, чтобы не забивать I/O живой таблицы.
+
+    Возвращает общее количество перенесённых лайков.
+    """
+    older_than = older_than or archive_cutoff()
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(db, older_than, batch_size)
+        total += moved
+        batches += 1
+        if moved < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+def main():
+    from database import SessionLocal
+    from logger import logger
+
+    while True:
+        db = SessionLocal()
+        try:
+            moved = archive_read_likes(db, pause=0.05)
+            logger.info(f"Архивация лайков: перенесено {moved}")
+        except Exception:
+            db.rollback()
+            logger.exception("Ошибка архивации лайков")
+        finally:
+            db.close()
+        time.sleep(LIKES_ARCHIVE_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
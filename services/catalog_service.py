@@ -0,0 +1,113 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, exists, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from database import after_commit, is_outer_rollback
+
+CatalogKey = Tuple[str, str]
+
+# кэш справочника на процесс: engine -> {(name_key, profile_key): id}
+_cache: Dict[object, Dict[CatalogKey, int]] = {}
+
+
+def normalize(value: str) -> str:
+    # lower, ё -> е, схлопывание пробелов; ею же заполняет справочник миграция 3fdf5a1b19fe
+    return " ".join(value.lower().replace("ё", "е").split())
+
+
+def catalog_key(name: str, profile: str) -> CatalogKey:
+    return normalize(name), normalize(profile)
+
+
+def _engine_cache(db: Session) -> Dict[CatalogKey, int]:
+    return _cache.setdefault(db.get_bind().engine, {})
+
+
+def resolve_catalog_id(db: Session, name: str, profile: str) -> int:
+    """
+    Получить id записи справочника для названия и профиля олимпиады, создав её при необходимости.
+
+    Обычно это поиск в словаре в памяти. Новые записи попадают в кэш только после коммита
+    транзакции, в которой они созданы (database.after_commit), чтобы откат не оставил в кэше
+    несуществующий id.
+    """
+    key = catalog_key(name, profile)
+    cache = _engine_cache(db)
+    catalog_id = cache.get(key)
+    if catalog_id is not None:
+        return catalog_id
+
+    pending = db.info.setdefault("catalog_pending", {})
+    if key in pending:
+        return pending[key]
+
+    stmt = select(models.OlympCatalog.id).where(
+        models.OlympCatalog.name_key == key[0], models.OlympCatalog.profile_key == key[1]
+    )
+    catalog_id = db.execute(stmt).scalar()
+    if catalog_id is not None:
+        cache[key] = catalog_id
+        return catalog_id
+
+    entry = models.OlympCatalog(name=name.strip(), profile=profile.strip(), name_key=key[0], profile_key=key[1])
+    if db.get_bind().dialect.name == "sqlite":
+        # pysqlite выполняет RELEASE SAVEPOINT как COMMIT; писатель в SQLite один, гонки нет
+        db.add(entry)
+        db.flush()
+    else:
+        try:
+            with db.begin_nested():
+                db.add(entry)
+        except IntegrityError:
+            # запись параллельно создал другой запрос — она уже закоммичена
+            catalog_id = db.execute(stmt).scalar_one()
+            cache[key] = catalog_id
+            return catalog_id
+    if not pending:
+        after_commit(db, lambda: cache.update(db.info.pop("catalog_pending", {})))
+    pending[key] = entry.id
+    return entry.id
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(session: Session, previous_transaction) -> None:
+    # откат SAVEPOINT выше (IntegrityError) не отменяет записи, созданные раньше в этой транзакции
+    if is_outer_rollback(previous_transaction):
+        session.info.pop("catalog_pending", None)
+
+
+def load_catalog(db: Session) -> int:
+    """Прогреть кэш справочника целиком. Возвращает количество записей."""
+    cache = _engine_cache(db)
+    rows = db.execute(
+        select(models.OlympCatalog.id, models.OlympCatalog.name_key, models.OlympCatalog.profile_key)
+    ).all()
+    cache.update({(row.name_key, row.profile_key): row.id for row in rows})
+    return len(rows)
+
+
+def list_catalog(db: Session, profile: Optional[str] = None) -> List[models.OlympCatalog]:
+    q = db.query(models.OlympCatalog)
+    if profile is not None:
+        q = q.filter(models.OlympCatalog.profile_key == normalize(profile))
+    return q.order_by(models.OlympCatalog.id).all()
+
+
+def get_participants(
+    db: Session, catalog_id: int, after_id: Optional[int] = None, limit: int = 50
+) -> List[models.Users]:
+    """
+    Пользователи, участвовавшие в олимпиаде из справочника (по индексу olymps.catalog_id).
+
+    Сортировка по Users.id, следующая страница — after_id равный id последнего пользователя.
+    """
+    stmt = select(models.Users).where(
+        models.Users.deleted_at.is_(None),
+        exists().where(models.Olymps.user_tg_id == models.Users.tg_id, models.Olymps.catalog_id == catalog_id),
+    )
+    if after_id is not None:
+        stmt = stmt.where(models.Users.id > after_id)
+    return db.execute(stmt.order_by(models.Users.id).limit(limit)).scalars().all()
@@ -0,0 +1,258 @@
+import argparse
+import codecs
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Iterable, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import Boolean, Column, Integer, MetaData, String, Table, and_, exists, insert, select
+from sqlalchemy.orm import Session
+
+import models
+from database import pin_written
+from schemas import OlympsBase
+from services.catalog_service import resolve_catalog_id
+from services.search_service import index_users_text
+
+OLYMPS_IMPORT_CHUNK_SIZE = int(os.getenv("OLYMPS_IMPORT_CHUNK_SIZE", 5000))
+# сколько ошибок по строкам возвращать в сводке; остальные только считаются
+OLYMPS_IMPORT_MAX_ERRORS = int(os.getenv("OLYMPS_IMPORT_MAX_ERRORS", 100))
+
+IMPORT_FORMATS = ("csv", "jsonl")
+IMPORT_COLUMNS = ("name", "profile", "level", "user_tg_id", "result", "year", "is_approved", "is_displayed", "catalog_id")
+# естественный ключ олимпиады — та же проверка дубликата, что в POST /olymp/create/
+NATURAL_KEY = ("catalog_id", "level", "user_tg_id", "result", "year")
+
+# временная таблица одной пачки: на Postgres заполняется COPY, на SQLite — executemany
+_staging_metadata = MetaData()
+staging = Table(
+    "olymps_import",
+    _staging_metadata,
+    Column("line", Integer, nullable=False),
+    Column("name", String),
+    Column("profile", String),
+    Column("level", Integer),
+    Column("user_tg_id", String),
+    Column("result", Integer),
+    Column("year", String),
+    Column("is_approved", Boolean),
+    Column("is_displayed", Boolean),
+    Column("catalog_id", Integer),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _error_text(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors(include_url=False))
+    return str(e)
+
+
+class OlympImport:
+    """
+    Потоковый импорт олимпиад из CSV (первая строка — заголовок) или JSON Lines.
+
+    Строки подаются по одной через add(); каждая проверяется OlympsBase, корректные копятся
+    в пачку до chunk_size и пишутся flush() одной транзакцией: пачка загружается во временную
+    таблицу и переносится в olymps одним INSERT ... SELECT, который пропускает дубликаты по
+    естественному ключу и строки несуществующих пользователей. В памяти только текущая
+    пачка и первые max_errors ошибок, поэтому память не зависит от размера файла.
+    Одна запись CSV — одна строка файла (переносы строк внутри полей не поддерживаются).
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        fmt: str,
+        chunk_size: int = OLYMPS_IMPORT_CHUNK_SIZE,
+        max_errors: int = OLYMPS_IMPORT_MAX_ERRORS,
+    ):
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unknown import format {fmt}, expected one of {IMPORT_FORMATS}")
+        self.db = db
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.header: Optional[List[str]] = None
+        self.rows: List[dict] = []
+        self.keys = set()
+        self.lines = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.errors: List[dict] = []
+
+    @property
+    def full(self) -> bool:
+        return len(self.rows) >= self.chunk_size
+
+    def _reject(self, line: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error})
+
+    def _parse(self, text: str) -> Optional[dict]:
+        if self.fmt == "jsonl":
+            row = json.loads(text)
+            if not isinstance(row, dict):
+                raise ValueError("Expected a JSON object")
+            return row
+        values = next(csv.reader([text]))
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"Expected {len(self.header)} fields, got {len(values)}")
+        # пустое поле CSV — значение не задано
+        return {name: value for name, value in zip(self.header, values) if value != ""}
+
+    def add(self, text: str) -> None:
+        """Разобрать и проверить одну строку файла; пустые строки пропускаются."""
+        self.lines += 1
+        text = text.rstrip("\r\n")
+        if not text.strip():
+            return
+        try:
+            row = self._parse(text)
+            if row is None:
+                return
+            olymp = OlympsBase.model_validate(row)
+        except (ValueError, csv.Error) as e:
+            self._reject(self.lines, _error_text(e))
+            return
+        self.rows.append({"line": self.lines, **olymp.model_dump(include=set(IMPORT_COLUMNS))})
+
+    def feed(self, lines: Iterable[str]) -> None:
+        """Добавить строки, записывая пачки по мере заполнения."""
+        for line in lines:
+            self.add(line)
+            if self.full:
+                self.flush()
+
+    def flush(self) -> None:
+        """Записать накопленную пачку и закоммитить. Ничего не делает, если пачка пуста."""
+        if not self.rows:
+            return
+        db = self.db
+        chunk = []
+        for row in self.rows:
+            row["catalog_id"] = resolve_catalog_id(db, row["name"], row["profile"])
+            row["is_approved"] = bool(row["is_approved"])
+            row["is_displayed"] = bool(row["is_displayed"])
+            key = tuple(row[name] for name in NATURAL_KEY)
+            # дубликаты внутри файла; с уже записанными строками сравнивает INSERT ... SELECT
+            if key in self.keys:
+                self.duplicates += 1
+                continue
+            self.keys.add(key)
+            chunk.append(row)
+        self.rows = []
+        self.keys = set()
+
+        connection = db.connection()
+        staging.create(connection, checkfirst=True)
+        if connection.dialect.name == "postgresql":
+            self._copy(connection, chunk)
+        else:
+            connection.execute(insert(staging), chunk)
+
+        s = staging.c
+        active_user = and_(models.Users.tg_id == s.user_tg_id, models.Users.deleted_at.is_(None))
+        duplicate = exists().where(*(getattr(models.Olymps, name) == getattr(s, name) for name in NATURAL_KEY))
+        inserted_users = db.execute(
+            insert(models.Olymps)
+            .from_select(
+                list(IMPORT_COLUMNS),
+                select(*(getattr(s, name) for name in IMPORT_COLUMNS)).where(exists().where(active_user), ~duplicate),
+            )
+            .returning(models.Olymps.user_tg_id)
+        ).scalars().all()
+        unknown = db.execute(select(s.line, s.user_tg_id).where(~exists().where(active_user)).order_by(s.line)).all()
+        for line, user_tg_id in unknown:
+            self._reject(line, f"User {user_tg_id} is not found")
+        self.accepted += len(inserted_users)
+        self.duplicates += len(chunk) - len(inserted_users) - len(unknown)
+        index_users_text(db, set(inserted_users))
+        pin_written(db, set(inserted_users))
+        staging.drop(connection)
+        db.commit()
+
+    @staticmethod
+    def _copy(connection, chunk: List[dict]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        columns = ("line", *IMPORT_COLUMNS)
+        for row in chunk:
+            writer.writerow([row[name] for name in columns])
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {staging.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def summary(self) -> dict:
+        return {
+            "lines": self.lines,
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            # ошибки разбора известны сразу, а неизвестные пользователи — при записи пачки
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+
+def import_olymps(
+    db: Session, lines: Iterable[str], fmt: str, chunk_size: int = OLYMPS_IMPORT_CHUNK_SIZE
+) -> dict:
+    """
+    Импортировать олимпиады из итератора строк файла.
+
+    Аргументы:
+        lines: строки файла (например, открытый файл) — читаются по одной.
+        fmt: "csv" или "jsonl".
+        chunk_size: строк в одной транзакции.
+
+    Возвращает сводку: lines, accepted, duplicates, rejected и errors (номер строки и причина).
+    """
+    job = OlympImport(db, fmt, chunk_size)
+    job.feed(lines)
+    job.flush()
+    return job.summary()
+
+
+async def iter_line_batches(chunks: AsyncIterator[bytes], batch_size: int) -> AsyncIterator[List[str]]:
+    """Разрезать поток байтов (тело запроса) на строки UTF-8 и отдавать их списками по batch_size."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    batch: List[str] = []
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        batch.extend(lines)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        batch.append(tail)
+    if batch:
+        yield batch
+
+
+def main():
+    from database import SessionLocal
+    from logger import logger
+
+    parser = argparse.ArgumentParser(description="Импорт олимпиад из CSV или JSON Lines")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="по умолчанию — по расширению файла")
+    parser.add_argument("--chunk-size", type=int, default=OLYMPS_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "jsonl")
+    with open(args.path, encoding="utf-8-sig", newline="") as lines, SessionLocal() as db:
+        summary = import_olymps(db, lines, fmt, args.chunk_size)
+    logger.info(f"Импорт олимпиад из {args.path}: {json.dumps(summary, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
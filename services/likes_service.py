@@ -1,21 +1,22 @@
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import models
 from schemas import LikesBase
+from services.outbox_service import add_like_event
+from services.popularity_service import adjust_counter
+from likes_stream import notify_like
+import queries
+from bloom import likes_bloom
+
+
+def from_active_user():
+    # лайки от удалённых пользователей скрыты до их удаления purge_service
+    return exists().where(models.Users.tg_id == models.Likes.from_user_tg_id, models.Users.deleted_at.is_(None))
 
 
 def create_like(db: Session, like: LikesBase) -> models.Likes:
-    from_user = (
-        db.query(models.Users)
-        .filter(models.Users.tg_id == like.from_user_tg_id)
-        .first()
-    )
-    to_user = (
-        db.query(models.Users)
-        .filter(models.Users.tg_id == like.to_user_tg_id)
-        .first()
-    )
-    if not from_user or not to_user:
+    if not queries.user_exists(db, like.from_user_tg_id) or not queries.user_exists(db, like.to_user_tg_id):
         raise ValueError("Either from_user or to_user does not exist")
 
     db_like = models.Likes(
@@ -26,29 +27,56 @@ def create_like(db: Session, like: LikesBase) -> models.Likes:
         is_readed=like.is_readed,
     )
     db.add(db_like)
+    db.flush()
+    # до коммита: при откате в фильтре останется лишнее «может быть», что безопасно
+    likes_bloom.add(db_like.from_user_tg_id, db_like.to_user_tg_id, db_like.is_like)
+    adjust_counter(db, db_like.to_user_tg_id, db_like.is_like, 1)
+    add_like_event(db, db_like)
+    notify_like(db, db_like)
     db.commit()
     db.refresh(db_like)
     return db_like
 
 
-def get_last_likes(db: Session, user_tg_id: str, count: int) -> List[models.Likes]:
-    return (
-        db.query(models.Likes)
-        .filter(models.Likes.from_user_tg_id == user_tg_id)
-        .order_by(models.Likes.id.desc())
-        .limit(count)
-        .all()
-    )
+def page_likes(q, count: int, since_id: Optional[int] = None, before_id: Optional[int] = None) -> List[models.Likes]:
+    """
+    Страница лайков по курсору id (keyset по индексу likes (to_user_tg_id, id)).
 
+    Без since_id — самые новые лайки, от новых к старым; before_id ограничивает их сверху
+    (следующая страница в прошлое — before_id равный наименьшему id страницы).
+    С since_id — лайки новее курсора от старых к новым, чтобы при опросе ни один не пропал:
+    следующий since_id — наибольший id страницы.
+    """
+    if before_id is not None:
+        q = q.filter(models.Likes.id < before_id)
+    if since_id is not None:
+        return q.filter(models.Likes.id > since_id).order_by(models.Likes.id.asc()).limit(count).all()
+    return q.order_by(models.Likes.id.desc()).limit(count).all()
 
-def like_exists(db: Session, from_user_tg_id: str, to_user_tg_id: str, is_like: bool) -> bool:
-    like = (
-        db.query(models.Likes)
-        .filter(
-            models.Likes.from_user_tg_id == from_user_tg_id,
-            models.Likes.to_user_tg_id == to_user_tg_id,
-            models.Likes.is_like == is_like,
-        )
-        .first()
-    )
-    return like is not None
\ No newline at end of file
+
+def next_cursors(likes: List[models.Likes], count: int, since_id: Optional[int] = None) -> dict:
+    """
+    Курсоры для следующего запроса: since_id — для опроса новых лайков, before_id — для
+    следующей страницы в прошлое (только если страница заполнена и идёт от новых к старым).
+    """
+    ids = [like.id for like in likes]
+    cursors = {"since_id": max(ids, default=since_id or 0)}
+    if since_id is None and ids and len(ids) == count:
+        cursors["before_id"] = min(ids)
+    return cursors
+
+
+def get_last_likes(
+    db: Session, user_tg_id: str, count: int, since_id: Optional[int] = None, before_id: Optional[int] = None
+) -> List[models.Likes]:
+    q = db.query(models.Likes).filter(models.Likes.to_user_tg_id == user_tg_id, from_active_user())
+    return page_likes(q, count, since_id, before_id)
+
+
+def like_exists(db: Session, from_user_tg_id: str, to_user_tg_id: str, is_like: bool, include_archived: bool = False) -> bool:
+    # большинство проверок отрицательные: фильтр Блума отвечает «точно нет» без запроса к БД
+    if not include_archived and likes_bloom.definitely_absent(db, from_user_tg_id, to_user_tg_id, is_like):
+        return False
+    if queries.like_exists(db, from_user_tg_id, to_user_tg_id, is_like):
+        return True
+    return include_archived and queries.archived_like_exists(db, from_user_tg_id, to_user_tg_id, is_like)
@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+import models
+from database import pin_written
+
+# итог по каждому id в ответе moderate_olymps
+APPROVED = "approved"
+REJECTED = "rejected"
+UNCHANGED = "unchanged"  # олимпиада уже в этом состоянии
+NOT_FOUND = "not_found"
+
+
+def list_pending(db: Session, after_id: Optional[int] = None, limit: int = 100) -> List[dict]:
+    """
+    Страница очереди модерации: неодобренные и неотклонённые олимпиады по возрастанию id.
+
+    Идёт по частичному индексу ix_olymps_pending (keyset по id), так что стоимость страницы
+    не зависит ни от числа уже проверенных олимпиад, ни от номера страницы.
+    Олимпиады удалённых пользователей не показываются.
+    """
+    stmt = (
+        select(models.Olymps.__table__)
+        .join(models.Users, models.Users.tg_id == models.Olymps.user_tg_id)
+        .where(models.PENDING_OLYMP, models.Users.deleted_at.is_(None))
+        .order_by(models.Olymps.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        stmt = stmt.where(models.Olymps.id > after_id)
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+def moderate_olymps(db: Session, ids: List[int], approve: bool, only_pending: bool = False) -> Dict[int, str]:
+    """
+    Одобрить или отклонить олимпиады ids одним UPDATE.
+
+    Меняются только строки, состояние которых отличается от нужного; у них растёт version
+    (ETag списка олимпиад пользователя). Ранее отклонённую олимпиаду можно одобрить, и наоборот.
+    only_pending — менять только олимпиады из очереди (models.PENDING_OLYMP): решение, принятое
+    модератором после выборки очереди, не перезаписывается, такие id получают unchanged.
+    Не коммитит.
+
+    Возвращает {id: итог}: approved / rejected, unchanged или not_found.
+    """
+    ids = list(dict.fromkeys(ids))
+    target = {"is_approved": approve, "is_rejected": not approve}
+    conditions = [
+        models.Olymps.id.in_(ids),
+        or_(models.Olymps.is_approved.is_not(approve), models.Olymps.is_rejected.is_not(not approve)),
+    ]
+    if only_pending:
+        conditions.append(models.PENDING_OLYMP)
+    rows = db.execute(
+        update(models.Olymps)
+        .where(*conditions)
+        .values(**target, version=models.Olymps.version + 1)
+        .returning(models.Olymps.id, models.Olymps.user_tg_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    pin_written(db, [row.user_tg_id for row in rows])
+    changed = {row.id for row in rows}
+    rest = [olymp_id for olymp_id in ids if olymp_id not in changed]
+    existing = set(db.execute(select(models.Olymps.id).where(models.Olymps.id.in_(rest))).scalars()) if rest else set()
+    done = APPROVED if approve else REJECTED
+    return {
+        olymp_id: done if olymp_id in changed else UNCHANGED if olymp_id in existing else NOT_FOUND
+        for olymp_id in ids
+    }
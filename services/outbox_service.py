@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+import models
+
+OUTBOX_LIKES_ROUTING_KEY = os.getenv("OUTBOX_LIKES_ROUTING_KEY", "like_events")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+OUTBOX_IDLE_INTERVAL = float(os.getenv("OUTBOX_IDLE_INTERVAL", 0.5))
+
+
+def like_event(like: models.Likes) -> dict:
+    return {
+        "event": "like.created",
+        "id": like.id,
+        "from_user_tg_id": like.from_user_tg_id,
+        "to_user_tg_id": like.to_user_tg_id,
+        "text": like.text,
+        "is_like": like.is_like,
+    }
+
+
+def add_like_event(db: Session, like: models.Likes) -> models.Outbox:
+    """
+    Записать событие о новом лайке в outbox.
+
+    Не коммитит: событие должно попасть в ту же транзакцию, что и сам лайк.
+    """
+    event = models.Outbox(
+        routing_key=OUTBOX_LIKES_ROUTING_KEY,
+        payload=json.dumps(like_event(like), ensure_ascii=False),
+    )
+    db.add(event)
+    return event
+
+
+def relay_batch(db: Session, publisher, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Опубликовать одну пачку событий из outbox и удалить отправленные строки.
+
+    Строки удаляются только после успешной публикации всей пачки, поэтому при сбое
+    брокера или процесса события будут отправлены повторно (at-least-once).
+    На Postgres строки захватываются с SKIP LOCKED, так что можно запускать несколько relay.
+
+    Возвращает количество опубликованных событий.
+    """
+    stmt = (
+        select(models.Outbox.id, models.Outbox.routing_key, models.Outbox.payload)
+        .order_by(models.Outbox.id)
+        .limit(batch_size)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = stmt.with_for_update(skip_locked=True)
+    rows = db.execute(stmt).all()
+    if not rows:
+        db.rollback()
+        return 0
+    try:
+        publisher.publish_batch((row.routing_key, row.payload.encode()) for row in rows)
+    except Exception:
+        db.rollback()
+        raise
+    db.execute(delete(models.Outbox).where(models.Outbox.id.in_([row.id for row in rows])))
+    db.commit()
+    return len(rows)
+
+
+def main():
+    from broker import RabbitMQPublisher
+    from database import SessionLocal
+    from logger import logger
+
+    publisher = RabbitMQPublisher()
+    while True:
+        db = SessionLocal()
+        try:
+            sent = relay_batch(db, publisher)
+        except Exception:
+            logger.exception("Ошибка публикации событий outbox")
+            publisher.close()
+            sent = 0
+        finally:
+            db.close()
+        if sent < OUTBOX_BATCH_SIZE:
+            time.sleep(OUTBOX_IDLE_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
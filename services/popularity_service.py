@@ -0,0 +1,119 @@
+import argparse
+import os
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import models
+from database import pin_written
+
+POPULARITY_REBUILD_BATCH_SIZE = int(os.getenv("POPULARITY_REBUILD_BATCH_SIZE", 1000))
+
+# счётчик получателя по is_like
+COUNTER_COLUMNS = {True: "likes_received", False: "dislikes_received"}
+
+
+def adjust_counter(db: Session, to_user_tg_id: str, is_like: bool, delta: int) -> None:
+    """
+    Изменить счётчик полученных лайков (или дизлайков) на delta одним UPDATE.
+
+    Прибавление выполняет сама БД, поэтому параллельные лайки одному пользователю не теряются.
+    Вызывается в транзакции вставки или удаления лайка; не коммитит.
+    """
+    column = COUNTER_COLUMNS[bool(is_like)]
+    db.execute(
+        update(models.Users)
+        .where(models.Users.tg_id == to_user_tg_id)
+        .values({column: getattr(models.Users, column) + delta})
+        .execution_options(synchronize_session=False)
+    )
+    pin_written(db, [to_user_tg_id])
+
+
+def subtract_likes(db: Session, model, ids: Iterable[int]) -> None:
+    """Уменьшить счётчики получателей лайков ids таблицы model (likes или likes_archive) перед их удалением."""
+    rows = db.execute(
+        select(model.to_user_tg_id, model.is_like, func.count())
+        .where(model.id.in_(list(ids)))
+        .group_by(model.to_user_tg_id, model.is_like)
+    ).all()
+    for to_user_tg_id, is_like, count in rows:
+        adjust_counter(db, to_user_tg_id, is_like, -count)
+
+
+def leaderboard(db: Session, limit: int = 10) -> List[dict]:
+    """Топ пользователей по числу полученных лайков; удалённые не участвуют."""
+    rows = db.execute(
+        select(
+            models.Users.tg_id,
+            models.Users.first_name,
+            models.Users.username,
+            models.Users.likes_received,
+            models.Users.dislikes_received,
+        )
+        .where(models.Users.deleted_at.is_(None))
+        .order_by(models.Users.likes_received.desc(), models.Users.id.desc())
+        .limit(limit)
+    ).mappings()
+    return [dict(row) for row in rows]
+
+
+def _received(model, is_like: bool):
+    return (
+        select(func.count(model.id))
+        .where(model.to_user_tg_id == models.Users.tg_id, model.is_like == is_like)
+        .scalar_subquery()
+    )
+
+
+def rebuild_batch(db: Session, after_id: int, batch_size: int = POPULARITY_REBUILD_BATCH_SIZE) -> Tuple[int, int]:
+    """
+    Пересчитать счётчики пользователей с id > after_id (не больше batch_size) одной транзакцией.
+
+    Счётчик — число строк likes и likes_archive с этим получателем; подзапросы идут по
+    индексам to_user_tg_id. Возвращает (количество пользователей, последний id).
+    """
+    ids = db.execute(
+        select(models.Users.id).where(models.Users.id > after_id).order_by(models.Users.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        db.rollback()
+        return 0, after_id
+    db.execute(
+        update(models.Users)
+        .where(models.Users.id.in_(ids))
+        .values(
+            likes_received=_received(models.Likes, True) + _received(models.LikesArchive, True),
+            dislikes_received=_received(models.Likes, False) + _received(models.LikesArchive, False),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(ids), ids[-1]
+
+
+def rebuild_counters(db: Session, batch_size: int = POPULARITY_REBUILD_BATCH_SIZE) -> int:
+    """Пересчитать счётчики всех пользователей пачками. Возвращает количество пользователей."""
+    total, after_id = 0, 0
+    while True:
+        count, after_id = rebuild_batch(db, after_id, batch_size)
+        if not count:
+            return total
+        total += count
+
+
+def main():
+    from database import SessionLocal
+    from logger import logger
+
+    parser = argparse.ArgumentParser(description="Пересчёт счётчиков полученных лайков")
+    parser.add_argument("--batch-size", type=int, default=POPULARITY_REBUILD_BATCH_SIZE)
+    args = parser.parse_args()
+    with SessionLocal() as db:
+        total = rebuild_counters(db, args.batch_size)
+    logger.info(f"Счётчики лайков пересчитаны у {total} пользователей")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import Session
+
+import models
+from database import pin_written
+from services.popularity_service import subtract_likes
+from services.search_service import index_user_text
+
+USERS_PURGE_BATCH_SIZE = int(os.getenv("USERS_PURGE_BATCH_SIZE", 1000))
+USERS_PURGE_INTERVAL = int(os.getenv("USERS_PURGE_INTERVAL", 60))
+
+# строки, которые удаляются вместе с пользователем; у каждой колонки есть индекс
+PURGE_TARGETS = (
+    (models.Likes, models.Likes.from_user_tg_id),
+    (models.Likes, models.Likes.to_user_tg_id),
+    (models.LikesArchive, models.LikesArchive.from_user_tg_id),
+    (models.LikesArchive, models.LikesArchive.to_user_tg_id),
+    (models.Olymps, models.Olymps.user_tg_id),
+)
+
+
+def soft_delete_user(db: Session, user: models.Users) -> None:
+    """
+    Пометить пользователя удалённым: он сразу пропадает из всех чтений, а лайки и олимпиады
+    потом удаляет purge_deleted_users. Не коммитит.
+    """
+    user.deleted_at = datetime.utcnow()
+    user.version = models.Users.version + 1
+    # документ удалённого пользователя не попадает в FTS (см. _SQLITE_DOCUMENTS_SELECT)
+    index_user_text(db, user.tg_id)
+
+
+def purge_batch(db: Session, tg_id: str, batch_size: int = USERS_PURGE_BATCH_SIZE) -> int:
+    """
+    Удалить одну пачку строк, связанных с пользователем, отдельной короткой транзакцией.
+
+    Возвращает количество удалённых строк. 0 — ничего не удалено: связанных строк не осталось
+    или на Postgres все они заняты чужими транзакциями (SKIP LOCKED); различает has_related_rows.
+    """
+    for model, column in PURGE_TARGETS:
+        ids_stmt = select(model.id).where(column == tg_id).limit(batch_size)
+        if db.get_bind().dialect.name == "postgresql":
+            ids_stmt = ids_stmt.with_for_update(skip_locked=True)
+        ids = db.execute(ids_stmt).scalars().all()
+        if ids:
+            if column.key == "from_user_tg_id":
+                # лайки удалённого пользователя другим: у получателей они больше не считаются
+                subtract_likes(db, model, ids)
+            db.execute(delete(model).where(model.id.in_(ids)))
+            pin_written(db, [tg_id])
+            db.commit()
+            return len(ids)
+    db.rollback()
+    return 0
+
+
+def has_related_rows(db: Session, tg_id: str) -> bool:
+    """Остались ли строки пользователя, включая заблокированные другими транзакциями (без SKIP LOCKED)."""
+    found = any(db.execute(select(exists().where(column == tg_id))).scalar() for _, column in PURGE_TARGETS)
+    db.rollback()
+    return found
+
+
+def purge_user(
+    db: Session, tg_id: str, batch_size: int = USERS_PURGE_BATCH_SIZE, pause: float = 0.0
+) -> Optional[int]:
+    """
+    Удалить лайки, архив лайков и олимпиады удалённого пользователя пачками, затем саму строку.
+
+    Возвращает количество удалённых связанных строк или None, если часть строк занята чужими
+    транзакциями: тогда строка пользователя остаётся, и его дочистит следующий запуск.
+    """
+    total = 0
+    while True:
+        removed = purge_batch(db, tg_id, batch_size)
+        if not removed:
+            break
+        total += removed
+        if pause:
+            time.sleep(pause)
+    if has_related_rows(db, tg_id):
+        return None
+    db.execute(
+        delete(models.Users).where(models.Users.tg_id == tg_id, models.Users.deleted_at.is_not(None))
+    )
+    db.commit()
+    return total
+
+
+def purge_deleted_users(
+    db: Session,
+    batch_size: int = USERS_PURGE_BATCH_SIZE,
+    max_users: Optional[int] = None,
+    pause: float = 0.0,
+) -> int:
+    """
+    Дочистить всех помеченных удалёнными пользователей, начиная с самых давних.
+
+    Аргументы:
+        batch_size: размер одной пачки удаления (одной транзакции).
+        max_users: ограничение числа пользователей за один запуск.
+        pause: пауза между пачками в секундах.
+
+    Возвращает количество полностью удалённых пользователей.
+    """
+    stmt = select(models.Users.tg_id).where(models.Users.deleted_at.is_not(None)).order_by(models.Users.deleted_at)
+    if max_users is not None:
+        stmt = stmt.limit(max_users)
+    tg_ids = db.execute(stmt).scalars().all()
+    db.rollback()
+    return sum(purge_user(db, tg_id, batch_size, pause) is not None for tg_id in tg_ids)
+
+
+def main():
+    from database import SessionLocal
+    from logger import logger
+
+    while True:
+        db = SessionLocal()
+        try:
+            purged = purge_deleted_users(db, pause=0.05)
+            if purged:
+                logger.info(f"Удаление пользователей: дочищено {purged}")
+        except Exception:
+            db.rollback()
+            logger.exception("Ошибка удаления пользователей")
+        finally:
+            db.close()
+        time.sleep(USERS_PURGE_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
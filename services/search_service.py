@@ -0,0 +1,209 @@
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam, exists, func, select, text, union_all
+from sqlalchemy.orm import Session
+
+import models
+from services.catalog_service import normalize
+
+
+def search_users_by_olymps(
+    db: Session,
+    profile: Optional[str] = None,
+    level: Optional[int] = None,
+    max_result: Optional[int] = None,
+    year: Optional[str] = None,
+    is_approved: Optional[bool] = None,
+    is_displayed: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    limit: int = 50,
+) -> List[models.Users]:
+    """
+    Найти пользователей, у которых есть хотя бы одна олимпиада под фильтры.
+
+    max_result — худший допустимый результат (0-победитель, 1-призер, ...), то есть
+    max_result=1 означает «призёр или победитель». profile сравнивается по ключу справочника
+    (catalog_service.normalize), а не с olymps.profile, где он записан как введён: «Физика »
+    и «физика» — один профиль. Каждый пользователь возвращается один раз (полусоединение
+    через EXISTS), сортировка по Users.id; следующая страница — after_id равный id
+    последнего пользователя предыдущей.
+    """
+    conditions = [models.Olymps.user_tg_id == models.Users.tg_id]
+    if profile is not None:
+        conditions.append(
+            models.Olymps.catalog_id.in_(
+                select(models.OlympCatalog.id).where(models.OlympCatalog.profile_key == normalize(profile))
+            )
+        )
+    if level is not None:
+        conditions.append(models.Olymps.level == level)
+    if max_result is not None:
+        conditions.append(models.Olymps.result <= max_result)
+    if year is not None:
+        conditions.append(models.Olymps.year == year)
+    if is_approved is not None:
+        conditions.append(models.Olymps.is_approved == is_approved)
+    if is_displayed is not None:
+        conditions.append(models.Olymps.is_displayed == is_displayed)
+
+    stmt = select(models.Users).where(models.Users.deleted_at.is_(None), exists().where(*conditions))
+    if after_id is not None:
+        stmt = stmt.where(models.Users.id > after_id)
+    stmt = stmt.order_by(models.Users.id).limit(limit)
+    return db.execute(stmt).scalars().all()
+
+
+# SQLite: полнотекстовый индекс FTS5, один документ на пользователя (описание + названия олимпиад)
+SQLITE_FTS_TABLE = "users_fts"
+_fts_ready = set()
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _is_sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+_SQLITE_DOCUMENTS_SELECT = (
+    "SELECT u.id, u.tg_id, coalesce(u.description, '') || ' ' || "
+    "coalesce((SELECT group_concat(o.name, ' ') FROM olymps o WHERE o.user_tg_id = u.tg_id), '') "
+    "FROM users u WHERE u.deleted_at IS NULL"
+)
+
+
+def init_text_search(engine) -> None:
+    """
+    Подготовить полнотекстовый поиск для engine; вызывается при старте после create_all.
+
+    На SQLite создаёт FTS5-таблицу и заполняет её по существующим данным (только при первом
+    создании). На Postgres индексы — обычные GIN-индексы по выражению (см. models.tsvector_ru_en).
+    """
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            exists_ = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SQLITE_FTS_TABLE}
+            ).first()
+            if not exists_:
+                conn.execute(
+                    text(
+                        f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} "
+                        "USING fts5(tg_id UNINDEXED, body, tokenize = 'unicode61 remove_diacritics 2')"
+                    )
+                )
+                conn.execute(text(f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, tg_id, body) {_SQLITE_DOCUMENTS_SELECT}"))
+    _fts_ready.add(engine)
+
+
+def _sqlite_fts_ready(db: Session) -> bool:
+    if not _is_sqlite(db):
+        return False
+    if db.get_bind().engine not in _fts_ready:
+        raise RuntimeError("Full-text search is not initialized: call init_text_search(engine) at startup")
+    return True
+
+
+def index_user_text(db: Session, tg_id: str) -> None:
+    """
+    Обновить поисковый документ пользователя после изменения описания или олимпиад.
+
+    На Postgres ничего не делает: GIN-индексы по выражению обновляются самой БД.
+    На SQLite переписывает строку пользователя в FTS5-таблице. Не коммитит — вызывается
+    в транзакции изменения, чтобы индекс и данные не расходились.
+    """
+    if not _sqlite_fts_ready(db):
+        return
+    # строка FTS5 адресуется rowid = users.id: удаление по UNINDEXED-колонке было бы полным сканом
+    old_id = db.execute(select(models.Users.id).where(models.Users.tg_id == tg_id)).scalar()
+    db.flush()
+    if old_id is not None:
+        db.execute(text(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = :id"), {"id": old_id})
+    db.execute(
+        text(f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, tg_id, body) {_SQLITE_DOCUMENTS_SELECT} AND u.tg_id = :tg_id"),
+        {"tg_id": tg_id},
+    )
+
+
+def index_users_text(db: Session, tg_ids: Iterable[str], batch_size: int = 500) -> None:
+    """
+    То же, что index_user_text, для многих пользователей сразу: по два запроса на batch_size
+    пользователей вместо двух на каждого (массовый импорт олимпиад). Не коммитит.
+    """
+    if not _sqlite_fts_ready(db):
+        return
+    tg_ids = list(tg_ids)
+    db.flush()
+    delete_stmt = text(
+        f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid IN (SELECT id FROM users WHERE tg_id IN :tg_ids)"
+    ).bindparams(bindparam("tg_ids", expanding=True))
+    insert_stmt = text(
+        f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, tg_id, body) {_SQLITE_DOCUMENTS_SELECT} AND u.tg_id IN :tg_ids"
+    ).bindparams(bindparam("tg_ids", expanding=True))
+    for start in range(0, len(tg_ids), batch_size):
+        part = tg_ids[start:start + batch_size]
+        db.execute(delete_stmt, {"tg_ids": part})
+        db.execute(insert_stmt, {"tg_ids": part})
+
+
+def _pg_tsquery(query: str):
+    return func.plainto_tsquery(text("'russian'::regconfig"), query).op("||")(
+        func.plainto_tsquery(text("'english'::regconfig"), query)
+    )
+
+
+def _sqlite_match_expr(query: str) -> Optional[str]:
+    # каждое слово — префиксный поиск в кавычках: синтаксис FTS5 из пользовательского ввода не исполняется,
+    # а префикс частично заменяет отсутствующий в unicode61 стемминг
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_users_by_text(db: Session, query: str, limit: int = 20, offset: int = 0) -> List[models.Users]:
+    """
+    Полнотекстовый поиск пользователей по описанию и названиям их олимпиад.
+
+    Postgres: tsvector (русская + английская конфигурации) по GIN-индексам, ранжирование ts_rank,
+    совпадения в описании и в олимпиадах суммируются. SQLite: FTS5 и bm25.
+
+    Возвращает пользователей в порядке убывания релевантности.
+    """
+    if _sqlite_fts_ready(db):
+        match = _sqlite_match_expr(query)
+        if match is None:
+            return []
+        rows = db.execute(
+            text(
+                f"SELECT tg_id FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :match "
+                f"ORDER BY bm25({SQLITE_FTS_TABLE}) LIMIT :limit OFFSET :offset"
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        ).scalars().all()
+    else:
+        tsquery = _pg_tsquery(query)
+        user_doc = models.tsvector_ru_en(models.Users.description)
+        olymp_doc = models.tsvector_ru_en(models.Olymps.name)
+        matches = union_all(
+            select(models.Users.tg_id.label("tg_id"), func.ts_rank(user_doc, tsquery).label("rank")).where(
+                user_doc.op("@@")(tsquery)
+            ),
+            select(models.Olymps.user_tg_id.label("tg_id"), func.ts_rank(olymp_doc, tsquery).label("rank")).where(
+                olymp_doc.op("@@")(tsquery)
+            ),
+        ).subquery()
+        rank = func.sum(matches.c.rank)
+        deleted = exists().where(models.Users.tg_id == matches.c.tg_id, models.Users.deleted_at.is_not(None))
+        rows = db.execute(
+            select(matches.c.tg_id)
+            .where(~deleted)
+            .group_by(matches.c.tg_id)
+            .order_by(rank.desc(), matches.c.tg_id)
+            .limit(limit)
+            .offset(offset)
+        ).scalars().all()
+
+    if not rows:
+        return []
+    users = {u.tg_id: u for u in db.query(models.Users).filter(models.Users.tg_id.in_(rows)).all()}
+    return [users[tg_id] for tg_id in rows if tg_id in users]
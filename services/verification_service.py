@@ -0,0 +1,226 @@
+import csv
+import glob
+import hashlib
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+from logger_config import logger
+from services.catalog_service import catalog_key, normalize
+from services.moderation_service import APPROVED, moderate_olymps
+
+# файл реестра победителей и призёров или каталог с *.csv; колонки: name, profile, year, result,
+# last_name, first_name (result — код 0..3 или слово: победитель, призёр, ...)
+DIPLOMA_REGISTRY_PATH = os.getenv("DIPLOMA_REGISTRY_PATH", "registry")
+# как часто проверять mtime файлов реестра; изменённый реестр перечитывается без перезапуска
+DIPLOMA_REGISTRY_CHECK_SECONDS = float(os.getenv("DIPLOMA_REGISTRY_CHECK_SECONDS", 30))
+DIPLOMA_VERIFY_BATCH_SIZE = int(os.getenv("DIPLOMA_VERIFY_BATCH_SIZE", 1000))
+DIPLOMA_VERIFY_INTERVAL = int(os.getenv("DIPLOMA_VERIFY_INTERVAL", 3600))
+
+RESULT_CODES = {"победитель": 0, "призер": 1, "финалист": 2, "участник": 3}
+
+
+def parse_result(value: str) -> int:
+    value = normalize(value)
+    if value.isdigit():
+        return int(value)
+    return RESULT_CODES[value]
+
+
+def diploma_key(
+    name: str, profile: str, year: str, result: int, last_name: Optional[str], first_name: Optional[str]
+) -> Optional[int]:
+    """
+    64-битный ключ диплома: олимпиада и профиль (нормализованы как в справочнике), год, результат,
+    фамилия и имя. None, если у пользователя не заполнены фамилия или имя — сверять не с чем.
+    """
+    if not last_name or not first_name:
+        return None
+    parts = (*catalog_key(name, profile), normalize(str(year)), str(result), normalize(last_name), normalize(first_name))
+    return int.from_bytes(hashlib.blake2b("\x00".join(parts).encode(), digest_size=8).digest(), "little")
+
+
+class DiplomaRegistry:
+    """
+    Официальный реестр дипломов в памяти процесса: множество 64-битных ключей diploma_key.
+
+    Проверка диплома — одно обращение к множеству, O(1), около 70 байт на запись. Не чаще
+    раза в check_seconds сравниваются mtime и размеры файлов реестра; изменённый реестр
+    читается в фоновом потоке и подменяется целиком, а до подмены проверки идут по прежней
+    версии — запрос, заметивший изменение, не ждёт перечитывания. Коллизия 64-битных ключей
+    при миллионах записей практически невозможна.
+    """
+
+    def __init__(self, path: str = DIPLOMA_REGISTRY_PATH, check_seconds: float = DIPLOMA_REGISTRY_CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self.keys: set = set()
+        self.signature: Optional[Tuple] = None
+        self.checked_at: Optional[float] = None
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.loader: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.keys)
+
+    def _files(self) -> List[str]:
+        if os.path.isdir(self.path):
+            return sorted(glob.glob(os.path.join(self.path, "*.csv")))
+        return [self.path] if os.path.isfile(self.path) else []
+
+    def _signature(self, files: List[str]) -> Tuple:
+        signature = []
+        for path in files:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def load(self) -> int:
+        """Прочитать реестр заново. Возвращает количество ключей; строки с ошибками пропускаются."""
+        started = time.perf_counter()
+        files = self._files()
+        signature = self._signature(files)
+        keys, skipped = set(), 0
+        for path in files:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        key = diploma_key(
+                            row["name"], row["profile"], row["year"], parse_result(row["result"]),
+                            row["last_name"], row["first_name"],
+                        )
+                    except (KeyError, TypeError, AttributeError, ValueError):
+                        # ValueError — например, «²»: isdigit() его пропускает, а int() — нет
+                        key = None
+                    if key is None:
+                        skipped += 1
+                    else:
+                        keys.add(key)
+        # множество после подмены не изменяется, поэтому читать его можно из любых потоков
+        self.keys, self.signature, self.skipped = keys, signature, skipped
+        logger.info(
+            f"Реестр дипломов загружен: {len(keys)} записей из {len(files)} файлов, "
+            f"пропущено {skipped}, {time.perf_counter() - started:.2f} с"
+        )
+        return len(keys)
+
+    def _load_and_unlock(self) -> None:
+        try:
+            self.load()
+        except Exception:
+            logger.exception("Не удалось прочитать реестр дипломов, остаётся прежняя версия")
+        finally:
+            self.lock.release()
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Перечитать реестр, если файлы изменились; проверка не чаще раза в check_seconds.
+
+        force — прочитать сразу и синхронно (при старте). Иначе чтение идёт в потоке self.loader.
+        """
+        now = time.monotonic()
+        if not force and self.checked_at is not None and now - self.checked_at < self.check_seconds:
+            return
+        # проверяет и перечитывает один поток, остальные пока сверяют по текущей версии
+        if not self.lock.acquire(blocking=False):
+            return
+        self.checked_at = now
+        try:
+            changed = force or self._signature(self._files()) != self.signature
+        except OSError:
+            logger.exception("Не удалось проверить файлы реестра дипломов")
+            changed = False
+        if not changed:
+            self.lock.release()
+        elif force:
+            self._load_and_unlock()
+        else:
+            self.loader = threading.Thread(target=self._load_and_unlock, name="diploma-registry", daemon=True)
+            self.loader.start()
+
+    def matches(
+        self, name: str, profile: str, year: str, result: int, last_name: Optional[str], first_name: Optional[str]
+    ) -> bool:
+        self.refresh()
+        key = diploma_key(name, profile, year, result, last_name, first_name)
+        return key is not None and key in self.keys
+
+
+diploma_registry = DiplomaRegistry()
+
+
+def verify_olymp(db: Session, user_tg_id: str, name: str, profile: str, year: str, result: int) -> bool:
+    """Подтверждает ли реестр диплом пользователя. Без загруженного реестра — False без запросов к БД."""
+    diploma_registry.refresh()
+    if not diploma_registry.ready:
+        return False
+    user = db.execute(
+        select(models.Users.last_name, models.Users.first_name).where(models.Users.tg_id == user_tg_id)
+    ).first()
+    return user is not None and diploma_registry.matches(name, profile, year, result, user.last_name, user.first_name)
+
+
+def verify_pending(db: Session, batch_size: int = DIPLOMA_VERIFY_BATCH_SIZE) -> int:
+    """
+    Одобрить олимпиады из очереди модерации, подтверждённые реестром.
+
+    Проходит очередь по частичному индексу ix_olymps_pending пачками по batch_size; совпавшие
+    одобряются одним UPDATE на пачку (moderate_olymps) и коммитятся. Отклонённые модератором
+    олимпиады не трогаются. Возвращает количество одобренных.
+    """
+    diploma_registry.refresh()
+    if not diploma_registry.ready:
+        return 0
+    approved, after_id = 0, 0
+    while True:
+        rows = db.execute(
+            select(
+                models.Olymps.id, models.Olymps.name, models.Olymps.profile, models.Olymps.year,
+                models.Olymps.result, models.Users.last_name, models.Users.first_name,
+            )
+            .join(models.Users, models.Users.tg_id == models.Olymps.user_tg_id)
+            .where(models.PENDING_OLYMP, models.Users.deleted_at.is_(None), models.Olymps.id > after_id)
+            .order_by(models.Olymps.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            db.rollback()
+            return approved
+        after_id = rows[-1].id
+        ids = [
+            row.id for row in rows
+            if diploma_registry.matches(row.name, row.profile, row.year, row.result, row.last_name, row.first_name)
+        ]
+        if ids:
+            # модератор мог отклонить олимпиаду после выборки: одобряются только оставшиеся в очереди
+            outcomes = moderate_olymps(db, ids, approve=True, only_pending=True)
+            approved += sum(outcome == APPROVED for outcome in outcomes.values())
+        db.commit()
+
+
+def main():
+    from database import SessionLocal
+
+    while True:
+        db = SessionLocal()
+        try:
+            approved = verify_pending(db)
+            if approved:
+                logger.info(f"Проверка дипломов: одобрено по реестру {approved}")
+        except Exception:
+            db.rollback()
+            logger.exception("Ошибка проверки дипломов")
+        finally:
+            db.close()
+        time.sleep(DIPLOMA_VERIFY_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import hashlib
+import os
+
+from pika import BasicProperties
+
+# Количество шардов очереди лайков. 0 — без шардирования: одна очередь likes и один consumer.
+LIKES_SHARDS = int(os.getenv("LIKES_SHARDS", 0))
+
+
+def stable_hash(key: str) -> int:
+    # hash() в Python рандомизирован между процессами, поэтому blake2b
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping, Veach, 2014).
+
+    При переходе с N на N+1 шардов на новый шард переезжает ~1/(N+1) ключей,
+    остальные остаются на своих шардах.
+    """
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_for(tg_id: str, shards: int) -> int:
+    return jump_hash(stable_hash(tg_id), shards)
+
+
+def shard_queue(shard: int, queue: str = "likes") -> str:
+    return f"{queue}.{shard}"
+
+
+def publish_like(ch, body: bytes, from_user_tg_id: str, shards: int = LIKES_SHARDS, queue: str = "likes") -> str:
+    """
+    Опубликовать сообщение о лайке в очередь шарда отправителя (или в общую очередь без шардирования).
+
+    Все лайки одного from_user_tg_id попадают в одну очередь и обрабатываются одним consumer,
+    поэтому их порядок сохраняется. Возвращает имя очереди.
+    """
+    target = shard_queue(shard_for(from_user_tg_id, shards), queue) if shards else queue
+    ch.basic_publish(
+        exchange="",
+        routing_key=target,
+        body=body,
+        properties=BasicProperties(delivery_mode=2),
+    )
+    return target
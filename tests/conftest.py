@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import database
+import main
+from database import Base, ReadRouter
+from recommendations import Recommender
+from services.search_service import init_text_search
+
+
+@pytest.fixture()
+def test_engine():
+    # одно соединение на все сессии и потоки: in-memory SQLite иначе у каждого соединения своя
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    init_text_search(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def test_session_factory(test_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+
+@pytest.fixture()
+def db_session(test_session_factory):
+    """Сессия на пустой in-memory SQLite со схемой и FTS. Файлы с общими данными переопределяют её: db_session(db_session)."""
+    session = test_session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture()
+def api(test_engine, test_session_factory, monkeypatch):
+    """TestClient приложения, все сессии которого (get_db, get_read_db, /batch) идут в test_engine."""
+    router = ReadRouter(test_session_factory)
+    monkeypatch.setattr(main, "engine", test_engine)
+    monkeypatch.setattr(main, "SessionLocal", test_session_factory)
+    monkeypatch.setattr(main, "read_router", router)
+    monkeypatch.setattr(database, "read_router", router)
+    # признаки рекомендаций строятся по базе конкретного теста
+    monkeypatch.setattr(main, "recommender", Recommender())
+    # стек middleware пересобирается при первом запросе: у каждого теста свои корзины rate limit
+    monkeypatch.setattr(main.app, "middleware_stack", None)
+    with TestClient(main.app) as client:
+        yield client
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def __repr__(self):
+        return "\n".join(self.statements)
+
+
+@pytest.fixture()
+def count_queries(test_engine):
+    """
+    Контекстный менеджер, собирающий SQL, выполненный на test_engine внутри блока.
+
+        with count_queries() as queries:
+            api.get(...)
+        assert len(queries) <= 3, queries
+    """
+
+    @contextmanager
+    def counting():
+        counter = QueryCounter()
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            counter.statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+    return counting
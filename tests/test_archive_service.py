@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import models
+from services.archive_service import archive_read_likes
+from services.likes_service import like_exists
+
+
+def add_like(session, from_id, to_id, is_readed, created_at):
+    like = models.Likes(
+        from_user_tg_id=from_id,
+        to_user_tg_id=to_id,
+        is_like=True,
+        is_readed=is_readed,
+        created_at=created_at,
+    )
+    session.add(like)
+    session.commit()
+    return like
+
+
+def test_archive_moves_only_old_read_likes(db_session):
+    for tg_id in ("u1", "u2", "u3"):
+        db_session.add(models.Users(tg_id=tg_id))
+    db_session.commit()
+
+    old = datetime.utcnow() - timedelta(days=200)
+    add_like(db_session, "u1", "u2", True, old)
+    add_like(db_session, "u1", "u3", True, old)
+    add_like(db_session, "u2", "u3", True, old)
+    add_like(db_session, "u3", "u1", False, old)  # не прочитан — остаётся
+    add_like(db_session, "u3", "u2", True, datetime.utcnow())  # свежий — остаётся
+
+    moved = archive_read_likes(db_session, datetime.utcnow() - timedelta(days=90), batch_size=2)
+
+    assert moved == 3
+    assert db_session.query(models.Likes).count() == 2
+    assert db_session.query(models.LikesArchive).count() == 3
+    assert like_exists(db_session, "u1", "u2", True) is False
+    assert like_exists(db_session, "u1", "u2", True, include_archived=True) is True
+
+
+def test_archive_respects_max_batches(db_session):
+    for tg_id in ("u1", "u2"):
+        db_session.add(models.Users(tg_id=tg_id))
+    db_session.commit()
+
+    old = datetime.utcnow() - timedelta(days=200)
+    for _ in range(5):
+        add_like(db_session, "u1", "u2", True, old)
+
+    moved = archive_read_likes(db_session, datetime.utcnow(), batch_size=2, max_batches=1)
+
+    assert moved == 2
+    assert db_session.query(models.Likes).count() == 3
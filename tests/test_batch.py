@@ -0,0 +1,87 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import main
+import models
+from database import Base
+from services.search_service import init_text_search
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    init_text_search(engine)
+    monkeypatch.setattr(main, "engine", engine)
+    yield TestClient(main.app), sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def test_batch_commits_all_operations(client):
+    http, Session = client
+    response = http.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "create_user", "params": {"tg_id": "u1"}},
+                {"op": "create_user", "params": {"tg_id": "u2"}},
+                {"op": "update_user", "params": {"tg_id": "u1", "city": "Москва"}},
+                {"op": "create_olymp", "params": {"name": "Физтех", "profile": "физика", "level": 1, "user_tg_id": "u1", "result": 0, "year": "2025"}},
+                {"op": "create_like", "params": {"from_user_tg_id": "u1", "to_user_tg_id": "u2", "is_like": True}},
+            ]
+        },
+    )
+    body = response.json()
+    assert response.status_code == 200
+    assert body["committed"] is True
+    assert [r["status"] for r in body["results"]] == [200] * 5
+    assert body["results"][3]["result"]["name"] == "Физтех"
+
+    db = Session()
+    assert db.query(models.Users).filter(models.Users.tg_id == "u1").one().city == "Москва"
+    assert db.query(models.Likes).count() == 1
+
+
+def test_batch_rolls_back_on_first_error(client):
+    http, Session = client
+    body = http.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "create_user", "params": {"tg_id": "u1"}},
+                {"op": "create_like", "params": {"from_user_tg_id": "u1", "to_user_tg_id": "missing", "is_like": True}},
+                {"op": "create_user", "params": {"tg_id": "u2"}},
+            ]
+        },
+    ).json()
+
+    assert body["committed"] is False
+    assert [r["status"] for r in body["results"]] == [200, 400, 424]
+    assert Session().query(models.Users).count() == 0
+
+
+def test_batch_reports_invalid_params_and_unknown_ops(client):
+    http, _ = client
+    body = http.post(
+        "/batch",
+        json={"operations": [{"op": "set_olymp_display", "params": {"olymp_id": "x"}}]},
+    ).json()
+    assert body["results"][0]["status"] == 422
+
+    body = http.post("/batch", json={"operations": [{"op": "drop_everything"}]}).json()
+    assert body["results"][0]["status"] == 400
+
+
+def test_batch_operations_spend_route_rate_limits(api):
+    # у /olymp/create/ корзина на пользователя — 20 олимпиад сразу, дальше 0.5 в секунду
+    assert api.post("/user/create/", params={"tg_id": "u1"}).status_code == 200
+    olymp = {"profile": "физика", "level": 1, "user_tg_id": "u1", "result": 0, "year": "2025"}
+    operations = [{"op": "create_olymp", "params": {**olymp, "name": f"Олимпиада {n}"}} for n in range(21)]
+    body = api.post("/batch", json={"operations": operations}).json()
+    assert body["committed"] is False
+    assert [r["status"] for r in body["results"]] == [200] * 20 + [429]
+
+    # откат транзакции не возвращает токены: лимит общий с одиночным маршрутом
+    assert api.post("/olymp/create/", json={**olymp, "name": "Ещё одна"}).status_code == 429
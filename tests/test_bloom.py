@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+import models
+from bloom import BloomFilter, LikesBloom
+from schemas import LikesBase
+from services import likes_service
+
+
+@pytest.fixture()
+def db_session(db_session):
+    db_session.add_all([models.Users(tg_id=tg_id) for tg_id in ("u1", "u2", "u3")])
+    db_session.commit()
+    return db_session
+
+
+def test_false_positive_rate_within_target():
+    bloom = BloomFilter(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(f"in-{i}")
+    assert all(f"in-{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"out-{i}" in bloom for i in range(10_000))
+    assert false_positives < 200
+    assert bloom.expected_error_rate() == pytest.approx(0.01, rel=0.2)
+
+
+def test_like_exists_skips_db_for_negatives(db_session, monkeypatch):
+    bloom = LikesBloom(capacity=1000, max_lag=3600)
+    monkeypatch.setattr(likes_service, "likes_bloom", bloom)
+    likes_service.create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+    bloom.build(db_session)
+
+    # вставка через create_like в этом процессе видна сразу
+    likes_service.create_like(db_session, LikesBase(from_user_tg_id="u2", to_user_tg_id="u3", is_like=True))
+    assert likes_service.like_exists(db_session, "u1", "u2", True) is True
+    assert likes_service.like_exists(db_session, "u2", "u3", True) is True
+    assert likes_service.like_exists(db_session, "u3", "u1", True) is False
+    assert bloom.stats()["db_skipped"] == 1
+
+
+def test_catch_up_sees_likes_from_other_processes(db_session):
+    bloom = LikesBloom(capacity=1000, max_lag=0)
+    bloom.build(db_session)
+    # лайк вставлен мимо create_like этого процесса (другой воркер или consumer.py)
+    db_session.add(models.Likes(from_user_tg_id="u3", to_user_tg_id="u1", is_like=False))
+    db_session.commit()
+
+    assert bloom.definitely_absent(db_session, "u3", "u1", False) is False
+    assert bloom.definitely_absent(db_session, "u3", "u1", True) is True
+    # повторная догрузка с запасом не раздувает счётчик
+    bloom.catch_up(db_session)
+    assert bloom.stats()["items"] == 1
+
+
+def test_catch_up_sees_late_commits_within_window(db_session):
+    bloom = LikesBloom(capacity=1000, max_lag=0, window=60)
+    db_session.add(models.Likes(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True, created_at=datetime(2026, 1, 1, 12)))
+    db_session.commit()
+    bloom.build(db_session)
+    # медленная транзакция коммитит лайки с created_at раньше уже увиденных, каким бы ни был их id
+    db_session.add_all([
+        models.Likes(from_user_tg_id="u2", to_user_tg_id="u3", is_like=True, created_at=datetime(2026, 1, 1, 11, 59, 30)),
+        models.Likes(from_user_tg_id="u3", to_user_tg_id="u1", is_like=True, created_at=datetime(2026, 1, 1, 11, 58)),
+    ])
+    db_session.commit()
+
+    assert bloom.definitely_absent(db_session, "u2", "u3", True) is False
+    # старше окна — такой транзакции окно не покрывает
+    assert bloom.definitely_absent(db_session, "u3", "u1", True) is True
+    assert bloom.watermark == datetime(2026, 1, 1, 12)
+
+
+def test_full_filter_is_rebuilt_in_background(db_session):
+    bloom = LikesBloom(capacity=2, max_lag=0)
+    bloom.build(db_session)
+    full = bloom.filter
+    db_session.add_all([
+        models.Likes(from_user_tg_id=a, to_user_tg_id=b, is_like=True)
+        for a, b in [("u1", "u2"), ("u1", "u3"), ("u2", "u1"), ("u2", "u3")]
+    ])
+    db_session.commit()
+    bloom.catch_up(db_session)
+    assert bloom.filter is full and full.count > full.capacity
+
+    # запрос не ждёт перестройки и отвечает по переполненному фильтру
+    assert bloom.definitely_absent(db_session, "u3", "u1", True) is True
+    bloom.builder.join()
+    assert bloom.filter is not full
+    assert bloom.stats()["capacity"] == 8
+    assert bloom.definitely_absent(db_session, "u1", "u2", True) is False
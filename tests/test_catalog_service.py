@@ -0,0 +1,52 @@
+import models
+from services.catalog_service import _engine_cache, get_participants, resolve_catalog_id
+
+
+def test_resolve_normalizes_and_reuses_ids(db_session):
+    first = resolve_catalog_id(db_session, "Физтех", "Физика")
+    db_session.commit()
+    same = resolve_catalog_id(db_session, "  физтех ", "ФИЗИКА")
+    other = resolve_catalog_id(db_session, "Физтех", "Математика")
+    db_session.commit()
+
+    assert first == same
+    assert other != first
+    assert db_session.query(models.OlympCatalog).count() == 2
+
+
+def test_rolled_back_entry_is_not_cached(db_session):
+    resolve_catalog_id(db_session, "Ломоносов", "Химия")
+    db_session.rollback()
+    assert db_session.query(models.OlympCatalog).count() == 0
+
+    catalog_id = resolve_catalog_id(db_session, "Ломоносов", "Химия")
+    db_session.commit()
+    assert db_session.get(models.OlympCatalog, catalog_id) is not None
+
+
+def test_savepoint_rollback_keeps_pending_entries(db_session):
+    # как ветка IntegrityError на Postgres: откат SAVEPOINT, внешняя транзакция продолжается
+    first = resolve_catalog_id(db_session, "Ломоносов", "Химия")
+    db_session.begin_nested().rollback()
+    second = resolve_catalog_id(db_session, "Ломоносов", "Физика")
+    cache = _engine_cache(db_session)
+    assert cache == {}
+    db_session.commit()
+    assert cache == {("ломоносов", "химия"): first, ("ломоносов", "физика"): second}
+
+
+def test_participants_by_catalog_id(db_session):
+    for tg_id in ("u1", "u2", "u3"):
+        db_session.add(models.Users(tg_id=tg_id))
+    catalog_id = resolve_catalog_id(db_session, "Высшая проба", "Экономика")
+    for tg_id in ("u1", "u3", "u3"):
+        db_session.add(
+            models.Olymps(
+                name="Высшая проба", profile="Экономика", level=1, user_tg_id=tg_id,
+                result=1, year="2025", catalog_id=catalog_id,
+            )
+        )
+    db_session.commit()
+
+    assert [u.tg_id for u in get_participants(db_session, catalog_id)] == ["u1", "u3"]
+    assert [u.tg_id for u in get_participants(db_session, catalog_id, limit=1)] == ["u1"]
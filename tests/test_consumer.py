@@ -0,0 +1,166 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import consumer
+import models
+
+
+class FakeChannel:
+    def __init__(self):
+        self.acked = []
+        self.published = []
+        self.queues = {}
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        self.published.append((routing_key, body, properties))
+        self.queues.setdefault(routing_key, []).append((body, properties))
+
+    def basic_get(self, queue):
+        messages = self.queues.get(queue)
+        if not messages:
+            return None, None, None
+        body, properties = messages.pop(0)
+        return SimpleNamespace(delivery_tag=len(self.acked) + 1), properties, body
+
+
+def delivery(tag=1, queue="likes"):
+    return SimpleNamespace(delivery_tag=tag, routing_key=queue)
+
+
+@pytest.fixture(autouse=True)
+def consumer_db(test_session_factory, monkeypatch):
+    """consumer пишет в базу теста из conftest; в ней пользователи u1 и u2."""
+    monkeypatch.setattr(consumer, "SessionLocal", test_session_factory)
+    with test_session_factory() as session:
+        session.add_all([models.Users(tg_id="u1"), models.Users(tg_id="u2")])
+        session.commit()
+
+
+def like_body():
+    return json.dumps({"from_user_tg_id": "u1", "to_user_tg_id": "u2", "is_like": True}).encode()
+
+
+def test_callback_saves_like(test_session_factory):
+    ch = FakeChannel()
+    consumer.callback(ch, delivery(), SimpleNamespace(headers=None), like_body())
+    assert ch.acked == [1]
+    assert ch.published == []
+    assert test_session_factory().query(models.Likes).count() == 1
+
+
+def test_db_error_goes_to_retry_then_dlq(monkeypatch):
+    def broken_create_like(db, like):
+        raise OperationalError("INSERT", {}, Exception("db is down"))
+
+    monkeypatch.setattr(consumer, "create_like", broken_create_like)
+    ch = FakeChannel()
+    properties = SimpleNamespace(headers=None)
+    for attempt in range(1, consumer.LIKES_MAX_ATTEMPTS + 1):
+        consumer.callback(ch, delivery(attempt), properties, like_body())
+        routing_key, _, properties = ch.published[-1]
+        assert properties.headers["x-attempt"] == attempt
+        if attempt < consumer.LIKES_MAX_ATTEMPTS:
+            assert routing_key == consumer.retry_queue_name("likes", attempt)
+        else:
+            assert routing_key == consumer.dlq_name("likes")
+    assert len(ch.acked) == consumer.LIKES_MAX_ATTEMPTS
+
+
+def test_replay_dlq_resets_attempts():
+    ch = FakeChannel()
+    ch.queues["likes.dlq"] = [(like_body(), SimpleNamespace(headers={"x-attempt": 5}))] * 3
+
+    assert consumer.replay_dlq(ch) == 3
+    assert len(ch.queues["likes"]) == 3
+    assert "x-attempt" not in ch.queues["likes"][0][1].headers
+
+
+def test_shards_are_balanced_and_stable():
+    from sharding import shard_for
+
+    senders = [str(tg_id) for tg_id in range(10_000)]
+    counts = [0] * 8
+    for tg_id in senders:
+        counts[shard_for(tg_id, 8)] += 1
+    assert min(counts) > 1_000
+
+    moved = sum(shard_for(tg_id, 8) != shard_for(tg_id, 9) for tg_id in senders)
+    # при добавлении шарда переезжает ~1/9 отправителей и только на новый шард
+    assert moved < 1_500
+    assert all(shard_for(tg_id, 9) == 8 for tg_id in senders if shard_for(tg_id, 8) != shard_for(tg_id, 9))
+
+
+def test_router_keeps_sender_in_one_shard():
+    from sharding import shard_for, shard_queue
+
+    ch = FakeChannel()
+    route = consumer.make_router(4)
+    bodies = [
+        json.dumps({"from_user_tg_id": sender, "to_user_tg_id": "u2", "text": str(n)}).encode()
+        for n in range(20) for sender in ("u1", "u3")
+    ]
+    for tag, body in enumerate(bodies, start=1):
+        route(ch, delivery(tag), None, body)
+    route(ch, delivery(len(bodies) + 1), None, b"not json")
+
+    assert len(ch.acked) == len(bodies) + 1
+    for sender in ("u1", "u3"):
+        queue = ch.queues[shard_queue(shard_for(sender, 4))]
+        texts = [json.loads(body)["text"] for body, _ in queue if json.loads(body)["from_user_tg_id"] == sender]
+        assert texts == [str(n) for n in range(20)]
+
+
+def test_shard_retry_returns_to_shard_queue(monkeypatch):
+    def broken_create_like(db, like):
+        raise OperationalError("INSERT", {}, Exception("db is down"))
+
+    monkeypatch.setattr(consumer, "create_like", broken_create_like)
+    ch = FakeChannel()
+    consumer.callback(ch, delivery(queue="likes.3"), SimpleNamespace(headers=None), like_body())
+    assert ch.published[-1][0] == "likes.3.retry.1"
+
+
+def test_queues_keep_their_durability():
+    from broker import InMemoryChannel
+    from pika.exceptions import ChannelClosedByBroker
+
+    ch = InMemoryChannel()
+    # likes уже есть на брокере: её объявляли без durable
+    ch.queue_declare(queue="likes")
+    consumer.run(ch, consumer.build_parser().parse_args(["shard-status", "--shards", "2"]))
+    assert ch.durable.pop("likes") is False
+    assert {"likes.0", "likes.1", "likes.1.retry.1", "likes.1.dlq"} <= set(ch.durable)
+    assert all(ch.durable.values())
+
+    with pytest.raises(ChannelClosedByBroker):
+        ch.queue_declare(queue="likes.0")
+
+
+def test_consume_through_in_memory_channel(test_session_factory, monkeypatch):
+    from broker import InMemoryChannel
+
+    ch = InMemoryChannel()
+    bodies = [like_body(), b"not json", json.dumps({"from_user_tg_id": "u1", "to_user_tg_id": "nope", "is_like": True}).encode()]
+    for body in bodies:
+        ch.basic_publish(exchange="", routing_key="likes", body=body)
+    consumer.run(ch, consumer.build_parser().parse_args([]))
+
+    assert ch.unacked == {}
+    assert test_session_factory().query(models.Likes).count() == 1
+
+    def broken_create_like(db, like):
+        raise OperationalError("INSERT", {}, Exception("db is down"))
+
+    monkeypatch.setattr(consumer, "create_like", broken_create_like)
+    ch.basic_publish(exchange="", routing_key="likes", body=like_body())
+    for _ in range(consumer.LIKES_MAX_ATTEMPTS):
+        ch.start_consuming()
+        ch.expire()
+    assert len(ch.queues["likes.dlq"]) == 1
+    assert ch.queues["likes.dlq"][0][1].headers["x-attempt"] == consumer.LIKES_MAX_ATTEMPTS
@@ -0,0 +1,45 @@
+import models
+from etag import etag_matches, make_etag, olymps_version, user_version
+
+
+def test_etag_matching():
+    etag = make_etag("u", "1.2")
+    assert etag == 'W/"u-1.2"'
+    assert etag_matches(etag, etag)
+    assert etag_matches('"u-1.2"', etag)
+    assert etag_matches('W/"other", W/"u-1.2"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('W/"u-1.3"', etag)
+
+
+def add_olymp(session, name):
+    olymp = models.Olymps(name=name, profile="физика", level=1, user_tg_id="u1", result=0, year="2025")
+    session.add(olymp)
+    session.commit()
+    return olymp
+
+
+def test_versions_change_on_writes(db_session):
+    assert user_version(db_session, "u1") is None
+    user = models.Users(tg_id="u1")
+    db_session.add(user)
+    db_session.commit()
+
+    before = user_version(db_session, "u1")
+    user.version = models.Users.version + 1
+    db_session.commit()
+    assert user_version(db_session, "u1") != before
+
+    seen = {olymps_version(db_session, "u1")}
+    first = add_olymp(db_session, "A")
+    seen.add(olymps_version(db_session, "u1"))
+    second = add_olymp(db_session, "B")
+    seen.add(olymps_version(db_session, "u1"))
+    first.version = models.Olymps.version + 1
+    db_session.commit()
+    seen.add(olymps_version(db_session, "u1"))
+    db_session.delete(second)
+    db_session.commit()
+    seen.add(olymps_version(db_session, "u1"))
+    assert len(seen) == 5
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import models
+from services.catalog_service import resolve_catalog_id
+from services.import_service import import_olymps
+from services.search_service import search_users_by_text
+
+HEADER = "name,profile,level,user_tg_id,result,year,is_approved\n"
+
+
+@pytest.fixture()
+def db_session(db_session):
+    db_session.add_all([models.Users(tg_id="u1"), models.Users(tg_id="u2")])
+    catalog_id = resolve_catalog_id(db_session, "Физтех", "Физика")
+    db_session.add(
+        models.Olymps(name="Физтех", profile="Физика", level=1, user_tg_id="u1", result=0, year="2024", catalog_id=catalog_id)
+    )
+    db_session.commit()
+    return db_session
+
+
+def test_csv_import_skips_duplicates_and_reports_rejects(db_session):
+    lines = [
+        HEADER,
+        "Физтех,Физика,1,u1,0,2024,\n",  # уже есть
+        "Высшая проба,Химия,2,u1,1,2025,true\n",
+        "Высшая проба,Химия,2,u1,1,2025,\n",  # дубликат внутри файла
+        "Высшая проба,Химия,5,u1,1,2025,\n",  # level вне диапазона
+        "\"Турнир городов, весна\",Математика,0,u2,3,2025,\n",
+        "Турнир,Математика,0,ghost,3,2025,\n",
+        "Турнир,Математика\n",
+    ]
+    summary = import_olymps(db_session, lines, "csv", chunk_size=2)
+
+    assert (summary["accepted"], summary["duplicates"], summary["rejected"]) == (2, 2, 3)
+    assert [error["line"] for error in summary["errors"]] == [5, 7, 8]
+    assert "level" in summary["errors"][0]["error"]
+    names = {o.name for o in db_session.query(models.Olymps)}
+    assert names == {"Физтех", "Высшая проба", "Турнир городов, весна"}
+    assert db_session.query(models.Olymps).filter_by(name="Высшая проба").one().is_approved is True
+    assert [u.tg_id for u in search_users_by_text(db_session, "Турнир")] == ["u2"]
+
+
+def test_jsonl_import_is_idempotent(db_session):
+    rows = [
+        {"name": "Всеросс", "profile": "Информатика", "level": 1, "user_tg_id": "u2", "result": n % 4, "year": "2025"}
+        for n in range(4)
+    ]
+    lines = [json.dumps(row, ensure_ascii=False) + "\n" for row in rows] + ["[1, 2]\n", "not json\n"]
+    first = import_olymps(db_session, lines, "jsonl", chunk_size=3)
+    second = import_olymps(db_session, lines, "jsonl", chunk_size=3)
+
+    assert (first["accepted"], first["rejected"]) == (4, 2)
+    assert (second["accepted"], second["duplicates"]) == (0, 4)
+    assert db_session.query(models.Olymps).filter_by(user_tg_id="u2").count() == 4
+
+
+def test_import_endpoint_streams_body(api):
+    api.post("/user/create/", params={"tg_id": "u1"})
+    body = HEADER + "".join(f"Олимпиада {n},Физика,1,u1,0,2025,\n" for n in range(10))
+
+    def chunks():
+        data = body.encode()
+        # границы кусков посреди строк и многобайтовых символов
+        for i in range(0, len(data), 7):
+            yield data[i:i + 7]
+
+    response = api.post("/olymp/import/", content=chunks())
+    assert response.json() == {"lines": 11, "accepted": 10, "duplicates": 0, "rejected": 0, "errors": []}
+    assert len(api.get("/olymp/u1").json()) == 10
+    assert api.post("/olymp/import/", params={"format": "xml"}, content=b"").status_code == 422
@@ -1,26 +1,10 @@
-import os
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 import models
-from database import Base
-from services.likes_service import create_like, get_last_likes, like_exists
+from services.likes_service import create_like, get_last_likes, like_exists, next_cursors
 from schemas import LikesBase
 
 
-@pytest.fixture()
-def db_session():
-    engine = create_engine("sqlite:///:memory:")
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-
-
 def create_user(session, tg_id: str):
     u = models.Users(tg_id=tg_id)
     session.add(u)
@@ -54,4 +38,25 @@ def test_create_like_missing_user(db_session):
     create_user(db_session, "u1")
     like = LikesBase(from_user_tg_id="u1", to_user_tg_id="nope", is_like=True)
     with pytest.raises(ValueError):
-        create_like(db_session, like)
\ No newline at end of file
+        create_like(db_session, like)
+
+
+def test_last_likes_cursors(db_session):
+    create_user(db_session, "u1")
+    create_user(db_session, "u2")
+    ids = [create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True)).id for _ in range(5)]
+
+    page = get_last_likes(db_session, "u2", 2)
+    assert [like.id for like in page] == ids[:-3:-1]
+    cursors = next_cursors(page, 2)
+    assert cursors == {"since_id": ids[4], "before_id": ids[3]}
+
+    older = get_last_likes(db_session, "u2", 2, before_id=cursors["before_id"])
+    assert [like.id for like in older] == [ids[2], ids[1]]
+
+    # опрос: без новых лайков — пустая страница и тот же курсор
+    assert get_last_likes(db_session, "u2", 2, since_id=ids[4]) == []
+    assert next_cursors([], 2, since_id=ids[4]) == {"since_id": ids[4]}
+
+    newer = get_last_likes(db_session, "u2", 10, since_id=ids[1])
+    assert [like.id for like in newer] == ids[2:]
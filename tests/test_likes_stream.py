@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import pytest
+
+import models
+from likes_stream import LikesHub, hub, like_events, missed_likes
+from schemas import LikesBase
+from services.likes_service import create_like
+
+
+@pytest.fixture()
+def db_session(db_session):
+    db_session.add_all([models.Users(tg_id=tg_id) for tg_id in ("u1", "u2", "u3")])
+    db_session.commit()
+    return db_session
+
+
+def parse(chunk):
+    lines = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+    return int(lines["id"]), json.loads(lines["data"])
+
+
+def test_committed_like_reaches_only_recipient_subscribers(db_session):
+    async def scenario():
+        sub_u2 = hub.subscribe(["u2"])
+        sub_u3 = hub.subscribe(["u3"])
+        like = create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+        create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=False))
+        await asyncio.sleep(0)
+
+        stream = like_events(sub_u2, heartbeat=0.01)
+        event_id, data = parse(await stream.__anext__())
+        assert (event_id, data["from_user_tg_id"]) == (like.id, "u1")
+        assert await stream.__anext__() == ": ping\n\n"
+        assert sub_u3.queue.empty()
+
+        await stream.aclose()
+        hub.unsubscribe(sub_u3)
+        assert hub.subscribers == {}
+
+    asyncio.run(scenario())
+
+
+def test_rolled_back_like_is_not_published(db_session):
+    async def scenario():
+        sub = hub.subscribe(["u2"])
+        db_session.add(models.Likes(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+        db_session.flush()
+        db_session.rollback()
+        await asyncio.sleep(0)
+        assert sub.queue.empty()
+        hub.unsubscribe(sub)
+
+    asyncio.run(scenario())
+
+
+def test_backlog_is_sent_once(db_session):
+    first = create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+
+    async def scenario():
+        sub = hub.subscribe(["u2", "u3"])
+        second = create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u3", is_like=True))
+        backlog = missed_likes(db_session, ["u2", "u3"], first.id - 1)
+        await asyncio.sleep(0)
+
+        stream = like_events(sub, backlog, heartbeat=0.01)
+        ids = [parse(await stream.__anext__())[0] for _ in backlog]
+        assert ids == [first.id, second.id]
+        # то же событие пришло и из подписки, но повторно не отправляется
+        assert await stream.__anext__() == ": ping\n\n"
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_is_dropped():
+    async def scenario():
+        local = LikesHub(queue_size=2)
+        sub = local.subscribe(["u2"])
+        for like_id in range(3):
+            local.dispatch(json.dumps({"id": like_id, "to_user_tg_id": "u2"}))
+        assert sub.overflowed
+        assert local.subscribers == {}
+        assert sub.queue.qsize() == 2
+
+    asyncio.run(scenario())
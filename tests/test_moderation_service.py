@@ -0,0 +1,67 @@
+import pytest
+
+import models
+from etag import olymps_version
+from services.moderation_service import list_pending, moderate_olymps
+
+
+@pytest.fixture()
+def populated(db_session):
+    db_session.add_all([models.Users(tg_id="u1"), models.Users(tg_id="u2")])
+    for n in range(6):
+        db_session.add(
+            models.Olymps(name=f"Олимпиада {n}", profile="Физика", level=1, user_tg_id="u1", result=0, year="2025")
+        )
+    db_session.add(models.Olymps(name="Одобрена", profile="Физика", level=1, user_tg_id="u2", result=0, year="2025", is_approved=True))
+    db_session.commit()
+    return db_session
+
+
+def pending_ids(db, **kwargs):
+    return [olymp["id"] for olymp in list_pending(db, **kwargs)]
+
+
+def test_pending_pages_by_id(populated):
+    assert pending_ids(populated, limit=4) == [1, 2, 3, 4]
+    assert pending_ids(populated, after_id=4, limit=4) == [5, 6]
+
+
+def test_bulk_moderation_reports_each_id(populated):
+    before = olymps_version(populated, "u1")
+    outcomes = moderate_olymps(populated, [1, 2, 7, 2, 99], approve=True)
+    populated.commit()
+
+    assert outcomes == {1: "approved", 2: "approved", 7: "unchanged", 99: "not_found"}
+    assert pending_ids(populated) == [3, 4, 5, 6]
+    assert olymps_version(populated, "u1") != before
+
+    assert moderate_olymps(populated, [3, 1], approve=False) == {3: "rejected", 1: "rejected"}
+    populated.commit()
+    assert pending_ids(populated) == [4, 5, 6]
+    assert populated.get(models.Olymps, 1).is_approved is False
+
+
+def test_only_pending_keeps_decided_olymps(populated):
+    assert moderate_olymps(populated, [1], approve=False) == {1: "rejected"}
+    outcomes = moderate_olymps(populated, [1, 2, 7], approve=True, only_pending=True)
+    populated.commit()
+    assert outcomes == {1: "unchanged", 2: "approved", 7: "unchanged"}
+    assert populated.get(models.Olymps, 1).is_rejected is True
+
+
+def test_pending_skips_deleted_users(populated):
+    populated.query(models.Users).filter_by(tg_id="u1").update({"deleted_at": models.func.now()})
+    populated.commit()
+    assert pending_ids(populated) == []
+
+
+def test_moderation_endpoints(api):
+    api.post("/user/create/", params={"tg_id": "u1"})
+    olymp = {"name": "Высшая проба", "profile": "Химия", "level": 2, "user_tg_id": "u1", "result": 1, "year": "2024"}
+    olymp_id = api.post("/olymp/create/", json=olymp).json()["id"]
+    assert [o["id"] for o in api.get("/olymp/pending").json()] == [olymp_id]
+
+    response = api.post("/olymp/moderate/", json={"ids": [olymp_id, 404], "action": "reject"})
+    assert response.json() == {"results": [{"id": olymp_id, "status": "rejected"}, {"id": 404, "status": "not_found"}]}
+    assert api.get("/olymp/pending").json() == []
+    assert api.post("/olymp/moderate/", json={"ids": [], "action": "reject"}).status_code == 422
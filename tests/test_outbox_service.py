@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import models
+from broker import InMemoryPublisher
+from schemas import LikesBase
+from services.likes_service import create_like
+from services.outbox_service import OUTBOX_LIKES_ROUTING_KEY, relay_batch
+
+
+def create_users(session, *tg_ids):
+    for tg_id in tg_ids:
+        session.add(models.Users(tg_id=tg_id))
+    session.commit()
+
+
+def test_create_like_writes_outbox_event(db_session):
+    create_users(db_session, "u1", "u2")
+    created = create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+
+    events = db_session.query(models.Outbox).all()
+    assert len(events) == 1
+    assert json.loads(events[0].payload)["id"] == created.id
+
+
+def test_missing_user_writes_no_event(db_session):
+    create_users(db_session, "u1")
+    with pytest.raises(ValueError):
+        create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="nope", is_like=True))
+    db_session.rollback()
+    assert db_session.query(models.Outbox).count() == 0
+
+
+def test_relay_publishes_in_batches_and_deletes(db_session):
+    create_users(db_session, "u1", "u2", "u3")
+    for to_id in ("u2", "u3", "u2"):
+        create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id=to_id, is_like=True))
+
+    publisher = InMemoryPublisher()
+    assert relay_batch(db_session, publisher, batch_size=2) == 2
+    assert relay_batch(db_session, publisher, batch_size=2) == 1
+    assert relay_batch(db_session, publisher, batch_size=2) == 0
+
+    bodies = [json.loads(b) for b in publisher.queues[OUTBOX_LIKES_ROUTING_KEY]]
+    assert [b["to_user_tg_id"] for b in bodies] == ["u2", "u3", "u2"]
+    assert db_session.query(models.Outbox).count() == 0
+
+
+def test_relay_keeps_rows_when_publish_fails(db_session):
+    create_users(db_session, "u1", "u2")
+    create_like(db_session, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+
+    publisher = InMemoryPublisher()
+    publisher.fail_next = True
+    with pytest.raises(ConnectionError):
+        relay_batch(db_session, publisher)
+    assert db_session.query(models.Outbox).count() == 1
+
+    assert relay_batch(db_session, publisher) == 1
+    assert len(publisher.queues[OUTBOX_LIKES_ROUTING_KEY]) == 1
+
+
+class RecordingChannel:
+    is_closed = False
+    is_open = True
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append(name)
+            if name == self.fail_on:
+                raise ConnectionError(name)
+
+        return call
+
+
+def test_rabbitmq_publisher_commits_batch_once():
+    from broker import RabbitMQPublisher
+
+    publisher = RabbitMQPublisher()
+    publisher.channel = RecordingChannel()
+    publisher.publish_batch([("like_events", b"1"), ("like_events", b"2"), ("like_events", b"3")])
+    # один round-trip на пачку: публикации не ждут подтверждений, ждёт только tx_commit
+    assert publisher.channel.calls == ["queue_declare", "basic_publish", "basic_publish", "basic_publish", "tx_commit"]
+
+    publisher.channel = RecordingChannel(fail_on="tx_commit")
+    with pytest.raises(ConnectionError):
+        publisher.publish_batch([("like_events", b"4")])
+    assert publisher.channel.calls[-2:] == ["tx_commit", "tx_rollback"]
@@ -0,0 +1,70 @@
+import pytest
+
+import models
+from schemas import LikesBase
+from services.archive_service import archive_batch, archive_cutoff
+from services.likes_service import create_like
+from services.popularity_service import leaderboard, rebuild_counters
+from services.purge_service import purge_user, soft_delete_user
+
+
+def like(db, from_user_tg_id, to_user_tg_id, is_like=True):
+    return create_like(db, LikesBase(from_user_tg_id=from_user_tg_id, to_user_tg_id=to_user_tg_id, is_like=is_like))
+
+
+def counters(db):
+    db.expire_all()
+    return {user.tg_id: (user.likes_received, user.dislikes_received) for user in db.query(models.Users)}
+
+
+@pytest.fixture()
+def populated(db_session):
+    db_session.add_all([models.Users(tg_id=tg_id) for tg_id in ("u1", "u2", "u3", "u4")])
+    db_session.commit()
+    for from_user in ("u2", "u3", "u4"):
+        like(db_session, from_user, "u1")
+    like(db_session, "u3", "u2")
+    like(db_session, "u4", "u2", is_like=False)
+    return db_session
+
+
+def test_counters_follow_creates(populated):
+    assert counters(populated) == {"u1": (3, 0), "u2": (1, 1), "u3": (0, 0), "u4": (0, 0)}
+
+
+def test_leaderboard_orders_by_likes_and_skips_deleted(populated):
+    assert [row["tg_id"] for row in leaderboard(populated, 2)] == ["u1", "u2"]
+    soft_delete_user(populated, populated.query(models.Users).filter_by(tg_id="u1").one())
+    populated.commit()
+    assert leaderboard(populated, 1)[0] == {
+        "tg_id": "u2", "first_name": None, "username": None, "likes_received": 1, "dislikes_received": 1,
+    }
+
+
+def test_purge_subtracts_likes_sent_by_deleted_user(populated):
+    soft_delete_user(populated, populated.query(models.Users).filter_by(tg_id="u4").one())
+    populated.commit()
+    purge_user(populated, "u4", batch_size=1)
+    assert counters(populated) == {"u1": (2, 0), "u2": (1, 0), "u3": (0, 0)}
+
+
+def test_rebuild_matches_incremental_counters_including_archive(populated):
+    expected = counters(populated)
+    populated.query(models.Likes).update({"is_readed": True})
+    populated.commit()
+    # архивация переносит лайки, но счётчики получателей не меняет
+    archive_batch(populated, archive_cutoff(days=-1), batch_size=2)
+    populated.query(models.Users).update({"likes_received": 0, "dislikes_received": 7})
+    populated.commit()
+
+    assert rebuild_counters(populated, batch_size=3) == 4
+    assert counters(populated) == expected
+
+
+def test_delete_like_endpoint_decrements(api):
+    for tg_id in ("u1", "u2"):
+        api.post("/user/create/", params={"tg_id": tg_id})
+    like_id = api.post("/like/create/", json={"from_user_tg_id": "u2", "to_user_tg_id": "u1", "is_like": True}).json()["id"]
+    assert api.get("/users/leaderboard/", params={"limit": 1}).json()[0]["likes_received"] == 1
+    assert api.delete("/like/delete/", params={"id": like_id}).status_code == 200
+    assert api.get("/user/get/u1").json()["likes_received"] == 0
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import pstats
+
+from profiling import ProfilingMiddleware, profile_filename
+
+
+async def app(scope, receive, send):
+    scope["route"] = type("Route", (), {"path": "/user/get/{tg_id}"})()
+    sum(range(1000))
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def call(middleware, headers=()):
+    scope = {"type": "http", "method": "GET", "path": "/user/get/42", "headers": list(headers)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def test_profiles_only_with_secret_header(tmp_path):
+    middleware = ProfilingMiddleware(app, secret="s3cret", sample_rate=0, directory=str(tmp_path))
+
+    call(middleware)
+    call(middleware, [(b"x-profile", b"wrong")])
+    assert os.listdir(tmp_path) == []
+
+    sent = call(middleware, [(b"x-profile", b"s3cret")])
+    assert sent[-1]["body"] == b"ok"
+    [name] = os.listdir(tmp_path)
+    assert "_GET_user_get_tg_id_" in name and name.endswith("ms.prof")
+    stats = pstats.Stats(str(tmp_path / name))
+    assert stats.total_calls > 0
+
+
+def test_sampling_without_secret(tmp_path):
+    middleware = ProfilingMiddleware(app, secret="", sample_rate=1.0, directory=str(tmp_path))
+    call(middleware, [(b"x-profile", b"")])
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_profile_filename_is_safe():
+    name = profile_filename("POST", "/olymp/delete/{olymp_id}", 0.0374)
+    assert name.endswith("_POST_olymp_delete_olymp_id_37ms.prof")
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import event
+
+import models
+from etag import olymps_version, user_version
+from schemas import LikesBase
+from services.likes_service import create_like, get_last_likes, like_exists
+from services import purge_service
+from services.purge_service import purge_batch, purge_deleted_users, purge_user, soft_delete_user
+from services.search_service import search_users_by_olymps, search_users_by_text
+
+
+def populate(db):
+    db.add_all([models.Users(tg_id="u1", description="робототехника"), models.Users(tg_id="u2")])
+    for n in range(3):
+        db.add(models.Olymps(name="Физтех", profile="Физика", level=1, user_tg_id="u1", result=0, year=str(2020 + n)))
+    db.commit()
+    for _ in range(4):
+        create_like(db, LikesBase(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+    create_like(db, LikesBase(from_user_tg_id="u2", to_user_tg_id="u1", is_like=True))
+
+
+def delete_user(db, tg_id):
+    user = db.query(models.Users).filter(models.Users.tg_id == tg_id).one()
+    soft_delete_user(db, user)
+    db.commit()
+
+
+def test_soft_deleted_user_is_hidden(db_session):
+    populate(db_session)
+    delete_user(db_session, "u1")
+
+    assert user_version(db_session, "u1") is None
+    assert olymps_version(db_session, "u1") == "0.0.0.0"
+    assert search_users_by_olymps(db_session, profile="Физика") == []
+    assert search_users_by_text(db_session, "робототехника") == []
+    assert get_last_likes(db_session, "u2", 10) == []
+    assert like_exists(db_session, "u1", "u2", True) is False
+    with pytest.raises(ValueError):
+        create_like(db_session, LikesBase(from_user_tg_id="u2", to_user_tg_id="u1", is_like=True))
+    # данные на месте, пока их не удалит purge
+    assert db_session.query(models.Likes).count() == 5
+
+
+def test_purge_removes_rows_in_bounded_batches(db_session):
+    populate(db_session)
+    delete_user(db_session, "u1")
+
+    deletes = []
+    event.listen(
+        db_session.get_bind(), "after_execute",
+        lambda conn, stmt, *args: deletes.append(stmt) if getattr(stmt, "is_delete", False) else None,
+    )
+    assert purge_batch(db_session, "u1", batch_size=3) == 3
+    assert purge_deleted_users(db_session, batch_size=3) == 1
+
+    assert db_session.query(models.Users).filter(models.Users.tg_id == "u1").first() is None
+    assert db_session.query(models.Likes).count() == 0
+    assert db_session.query(models.Olymps).count() == 0
+    # лайки от u1 (4), лайк u2 -> u1 (1), олимпиады (3): пачки не больше 3, плюс строка пользователя
+    assert len(deletes) == 5
+    assert db_session.query(models.Users).filter(models.Users.tg_id == "u2").one().deleted_at is None
+
+
+def test_locked_rows_defer_user_deletion(db_session, monkeypatch):
+    populate(db_session)
+    delete_user(db_session, "u1")
+    # на Postgres пачка пуста, пока строки держит чужая транзакция (SKIP LOCKED)
+    monkeypatch.setattr(purge_service, "purge_batch", lambda db, tg_id, batch_size: 0)
+    assert purge_user(db_session, "u1") is None
+    assert purge_deleted_users(db_session) == 0
+    assert db_session.query(models.Users).filter(models.Users.tg_id == "u1").one().deleted_at is not None
+
+    monkeypatch.undo()
+    assert purge_deleted_users(db_session) == 1
+    assert db_session.query(models.Users).filter(models.Users.tg_id == "u1").first() is None
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import models
+import queries
+
+
+def test_cached_statements_bind_new_values(db_session):
+    db_session.add_all([models.Users(tg_id="u1"), models.Users(tg_id="u2"), models.Users(tg_id="gone", deleted_at=datetime.utcnow())])
+    db_session.add(models.Likes(from_user_tg_id="u1", to_user_tg_id="u2", is_like=True))
+    db_session.add(models.Likes(from_user_tg_id="gone", to_user_tg_id="u2", is_like=True))
+    db_session.add(models.Olymps(name="Физтех", profile="Физика", level=1, user_tg_id="u2", result=0, year="2025"))
+    db_session.commit()
+
+    # один и тот же закэшированный оператор с разными значениями параметров
+    assert [queries.user_exists(db_session, tg_id) for tg_id in ("u1", "nope", "gone", "u2")] == [True, False, False, True]
+    assert queries.like_exists(db_session, "u1", "u2", True) is True
+    assert queries.like_exists(db_session, "u1", "u2", False) is False
+    assert queries.like_exists(db_session, "u2", "u1", True) is False
+    assert queries.like_exists(db_session, "gone", "u2", True) is False
+
+    assert queries.user_olymps(db_session, "u1") == []
+    [olymp] = queries.user_olymps(db_session, "u2")
+    assert olymp["name"] == "Физтех"
+    assert set(olymp) == set(models.Olymps.__table__.columns.keys())
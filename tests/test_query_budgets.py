@@ -0,0 +1,75 @@
+import pytest
+
+# Максимальное число SQL-запросов на вызов эндпоинта при 10 олимпиадах и 10 лайках у пользователя.
+# Бюджет не зависит от объёма данных: если он превышен, скорее всего появился N+1.
+BUDGETS = [
+    ("get", "/user/get/u1", {}, 4),
+    ("get", "/olymp/u1", {}, 2),
+    ("get", "/olymp/pending", {}, 1),
+    ("get", "/users/all", {}, 1),
+    ("get", "/users/leaderboard/", {}, 1),
+    # первый запрос процесса строит признаки (3 запроса), дальше — только оценённые пользователи
+    ("get", "/users/recommend/u2", {}, 4),
+    ("get", "/like/get_incoming/", {"params": {"user_tg_id": "u1"}}, 1),
+    ("get", "/like/get_last/", {"params": {"user_tg_id": "u1", "count": 50}}, 1),
+    ("get", "/like/exists/", {"params": {"from_user_tg_id": "u2", "to_user_tg_id": "u1"}}, 1),
+    ("get", "/users/search/", {"params": {"profile": "Физика"}}, 1),
+    ("get", "/users/search/text/", {"params": {"q": "олимпиада"}}, 2),
+    ("get", "/olymp/catalog/", {}, 1),
+    ("get", "/olymp/catalog/1/users", {}, 1),
+    ("post", "/user/create/", {"params": {"tg_id": "u3"}}, 3),
+    ("put", "/user/update/", {"json": {"tg_id": "u1", "description": "физика и химия"}}, 6),
+    (
+        "post",
+        "/olymp/create/",
+        {"json": {"name": "Высшая проба", "profile": "Химия", "level": 2, "user_tg_id": "u1", "result": 1, "year": "2024"}},
+        9,
+    ),
+    ("post", "/olymp/set_display/", {"params": {"olymp_id": 1}}, 3),
+    ("delete", "/olymp/delete/1", {}, 5),
+    ("post", "/olymp/moderate/", {"json": {"ids": list(range(1, 12)), "action": "approve"}}, 2),
+    ("post", "/like/create/", {"json": {"from_user_tg_id": "u1", "to_user_tg_id": "u2", "is_like": True}}, 6),
+    ("patch", "/like/set_read/", {"params": {"from_user_tg_id": "u2", "to_user_tg_id": "u1"}}, 3),
+    ("delete", "/like/delete/", {"params": {"id": 1}}, 3),
+    ("delete", "/user/delete/u2", {}, 5),
+    (
+        "post",
+        "/batch",
+        {
+            "json": {
+                "operations": [
+                    {"op": "create_user", "params": {"tg_id": "u3"}},
+                    {"op": "create_like", "params": {"from_user_tg_id": "u3", "to_user_tg_id": "u1", "is_like": True}},
+                ]
+            }
+        },
+        9,
+    ),
+]
+
+
+@pytest.fixture()
+def populated(api):
+    for tg_id in ("u1", "u2"):
+        assert api.post("/user/create/", params={"tg_id": tg_id}).status_code == 200
+    for n in range(10):
+        olymp = {"name": f"Олимпиада {n}", "profile": "Физика", "level": 1, "user_tg_id": "u1", "result": 0, "year": "2025"}
+        assert api.post("/olymp/create/", json=olymp).status_code == 200
+        like = {"from_user_tg_id": "u2", "to_user_tg_id": "u1", "is_like": True}
+        assert api.post("/like/create/", json=like).status_code == 200
+    return api
+
+
+@pytest.mark.parametrize("method, url, kwargs, budget", BUDGETS, ids=[f"{m} {u}" for m, u, _, _ in BUDGETS])
+def test_query_budget(populated, count_queries, method, url, kwargs, budget):
+    with count_queries() as queries:
+        response = populated.request(method.upper(), url, **kwargs)
+    assert response.status_code == 200, response.text
+    assert len(queries) <= budget, f"{len(queries)} запросов вместо {budget}:\n{queries!r}"
+
+
+def test_set_read_returns_updated_likes(populated):
+    likes = populated.patch("/like/set_read/", params={"from_user_tg_id": "u2", "to_user_tg_id": "u1"}).json()
+    assert len(likes) == 10
+    assert all(like["is_readed"] for like in likes)
+    assert populated.get("/like/get_incoming/", params={"user_tg_id": "u1"}).json() == []
@@ -0,0 +1,72 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from rate_limit import RateLimitMiddleware, RouteLimit, TokenBucketLimiter
+
+
+def test_bucket_refills_over_time():
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    assert limiter.acquire("u1", now=0.0) == 0
+    assert limiter.acquire("u1", now=0.0) == 0
+    assert limiter.acquire("u1", now=0.0) == 1.0
+    assert limiter.acquire("u1", now=1.0) == 0
+
+
+def test_bucket_memory_is_bounded():
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=3)
+    for i in range(10):
+        limiter.acquire(str(i), now=0.0)
+    assert list(limiter.buckets) == ["7", "8", "9"]
+
+
+def make_client(limits):
+    app = FastAPI()
+
+    @app.post("/like/create/")
+    async def create(payload: dict):
+        return payload
+
+    app.add_middleware(RateLimitMiddleware, limits=limits)
+    return TestClient(app)
+
+
+def test_middleware_limits_per_tg_id_and_passes_body():
+    client = make_client({"/like/create/": {"key": "from_user_tg_id", "rate": 0.001, "burst": 1}})
+
+    ok = client.post("/like/create/", json={"from_user_tg_id": "u1"})
+    assert ok.status_code == 200
+    assert ok.json() == {"from_user_tg_id": "u1"}
+
+    limited = client.post("/like/create/", json={"from_user_tg_id": "u1"})
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+
+    assert client.post("/like/create/", json={"from_user_tg_id": "u2"}).status_code == 200
+
+
+def test_middleware_global_limit():
+    client = make_client(
+        {"/like/create/": {"key": "from_user_tg_id", "rate": 10, "burst": 10, "global_rate": 0.001, "global_burst": 2}}
+    )
+    assert client.post("/like/create/", json={"from_user_tg_id": "u1"}).status_code == 200
+    assert client.post("/like/create/", json={"from_user_tg_id": "u2"}).status_code == 200
+    assert client.post("/like/create/", json={"from_user_tg_id": "u3"}).status_code == 429
+
+
+def test_rejected_by_global_limit_does_not_evict_keys():
+    route = RouteLimit("from_user_tg_id", rate=0.001, burst=1, global_rate=0.001, global_burst=2, max_keys=2)
+    assert route.acquire("u1", now=0.0) == 0
+    assert route.acquire("u1", now=0.0) > 0
+    assert route.acquire("u2", now=0.0) == 0
+    # общая корзина пуста: перебор новых tg_id не заводит корзин и не вытесняет u1 с пустой корзиной
+    for i in range(10):
+        assert route.acquire(f"spam{i}", now=0.0) > 0
+    assert list(route.per_key.buckets) == ["u1", "u2"]
+    assert route.per_key.buckets["u1"][0] == 0
+
+
+def test_per_key_rejection_refunds_global_token():
+    route = RouteLimit("from_user_tg_id", rate=0.001, burst=1, global_rate=0.001, global_burst=2, max_keys=10)
+    assert route.acquire("u1", now=0.0) == 0
+    assert route.acquire("u1", now=0.0) > 0
+    assert route.acquire("u2", now=0.0) == 0
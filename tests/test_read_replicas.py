@@ -0,0 +1,133 @@
+import sys
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import database
+import main
+import models
+from database import Base, ReadRouter
+from services.search_service import init_text_search
+
+
+@pytest.fixture()
+def replicated(tmp_path, monkeypatch):
+    # две независимые БД: «реплика» ничего не получает от основной, как при большом лаге
+    engines = {}
+    for name in ("primary", "replica"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        init_text_search(engine)
+        engines[name] = engine
+    primary = sessionmaker(autocommit=False, autoflush=False, bind=engines["primary"])
+    replica = sessionmaker(autocommit=False, autoflush=False, bind=engines["replica"])
+    router = ReadRouter(primary, [replica], window=60)
+    monkeypatch.setattr(database, "read_router", router)
+    monkeypatch.setattr(main, "read_router", router)
+    monkeypatch.setattr(main, "SessionLocal", primary)
+    monkeypatch.setattr(main, "engine", engines["primary"])
+    yield TestClient(main.app), router, engines
+
+
+def test_reads_after_own_write_go_to_primary(replicated):
+    http, router, engines = replicated
+    assert http.post("/user/create/", params={"tg_id": "u1"}).status_code == 200
+    assert http.get("/user/get/u1").json()["tg_id"] == "u1"
+
+    # запись мимо ORM-сессии не отмечается: чтение уходит на отстающую реплику
+    with engines["primary"].begin() as conn:
+        conn.execute(insert(models.Users).values(tg_id="u2"))
+    assert http.get("/user/get/u2").json() is None
+
+    router.recent.clear()
+    assert http.get("/user/get/u1").json() is None
+
+
+def test_rolled_back_writes_are_not_marked(replicated):
+    _, router, _ = replicated
+    db = main.SessionLocal()
+    db.add(models.Users(tg_id="u3"))
+    db.flush()
+    db.rollback()
+    db.close()
+    assert not router.is_recent("u3")
+
+
+def test_savepoint_rollback_keeps_marks(replicated):
+    _, router, _ = replicated
+    db = main.SessionLocal()
+    db.add(models.Users(tg_id="u4"))
+    db.flush()
+    nested = db.begin_nested()
+    db.add(models.Users(tg_id="u5"))
+    nested.rollback()
+    db.commit()
+    db.close()
+    assert router.is_recent("u4")
+    assert not router.is_recent("u5")
+
+
+def test_core_writes_mark_affected_users(replicated):
+    from services.moderation_service import moderate_olymps
+    from services.popularity_service import adjust_counter
+
+    _, router, _ = replicated
+    db = main.SessionLocal()
+    db.add_all([models.Users(tg_id="u6"), models.Users(tg_id="u7")])
+    db.add(models.Olymps(name="Физтех", profile="Физика", level=1, user_tg_id="u6", result=0, year="2025"))
+    db.commit()
+    router.recent.clear()
+
+    moderate_olymps(db, [1], approve=True)
+    adjust_counter(db, "u7", True, 1)
+    assert not router.is_recent("u6")
+    db.commit()
+    db.close()
+    assert router.is_recent("u6") and router.is_recent("u7")
+
+
+def test_recent_writes_expire():
+    router = ReadRouter(sessionmaker(), [sessionmaker()], window=5)
+    router.mark_written(["u1"], now=100)
+    router.mark_written(["u2"], now=103)
+    assert router.is_recent("u1", now=104)
+    assert not router.is_recent("u1", now=105)
+    assert router.is_recent("u2", now=105)
+    assert list(router.recent) == ["u2"]
+
+
+def test_without_replicas_everything_goes_to_primary():
+    router = ReadRouter(sessionmaker(info={"db": "primary"}))
+    router.mark_written(["u1"])
+    assert router.recent == {}
+    assert router.session(["u2"]).info["db"] == "primary"
+
+
+def test_concurrent_expiry_and_marks():
+    # get_read_db идёт в потоках threadpool, отметки ставятся после коммитов в других потоках;
+    # частое переключение потоков, чтобы они сталкивались на снятии устаревших отметок
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    router = ReadRouter(sessionmaker(), [sessionmaker()], window=0)
+    errors = []
+
+    def work(n):
+        try:
+            for i in range(10000):
+                router.mark_written([f"u{n}-{i % 50}"])
+                router.is_recent(f"u{(n + 1) % 8}-{i % 50}")
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
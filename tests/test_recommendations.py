@@ -0,0 +1,116 @@
+from datetime import datetime
+
+import pytest
+
+import models
+from recommendations import Recommender
+from services.purge_service import soft_delete_user
+
+
+def olymp(tg_id, profile, level=1):
+    return models.Olymps(name=f"{profile} {level}", profile=profile, level=level, user_tg_id=tg_id, result=0, year="2025")
+
+
+@pytest.fixture()
+def populated(db_session):
+    db_session.add_all([
+        models.Users(tg_id="me", goal=1, city="Москва", age=17, gender=False, who_interested=2),
+        # общие профиль и уровень, цель, город, возраст
+        models.Users(tg_id="best", goal=1, city=" москва ", age=17, gender=True, who_interested=1),
+        # общий профиль другого уровня, другой город
+        models.Users(tg_id="good", goal=1, city="Казань", age=18, gender=True, who_interested=2),
+        # ничего общего и не интересуется парнями
+        models.Users(tg_id="far", goal=0, city="Омск", age=25, gender=True, who_interested=0),
+        models.Users(tg_id="empty"),
+    ])
+    db_session.add_all([
+        olymp("me", "Физика"), olymp("me", "Информатика", 2),
+        olymp("best", "Физика"), olymp("best", "Информатика", 2),
+        olymp("good", "физика", 3),
+        olymp("far", "Биология"),
+    ])
+    db_session.commit()
+    return db_session
+
+
+def ranked(recommender, db, tg_id="me", limit=20):
+    return [row["tg_id"] for row in recommender.recommend(db, tg_id, limit)]
+
+
+def test_ranks_by_compatibility(populated):
+    recommender = Recommender()
+    result = recommender.recommend(populated, "me")
+    assert [row["tg_id"] for row in result] == ["best", "good", "empty", "far"]
+    # 2 профиля + 2 пары (профиль, уровень) + цель + город + возраст + взаимный интерес
+    assert result[0]["score"] == pytest.approx(2 + 0.5 * 2 + 2 + 1 + 1 + 1)
+    assert ranked(recommender, populated, limit=2) == ["best", "good"]
+
+
+def test_levels_match_only_within_shared_profile(db_session):
+    # 40 профилей — больше 16, при которых пары (профиль, уровень) делили бы биты разных профилей
+    db_session.add_all([models.Users(tg_id=f"p{n}") for n in range(40)])
+    db_session.add_all([olymp(f"p{n}", f"Профиль {n}") for n in range(40)])
+    db_session.commit()
+    result = Recommender().recommend(db_session, "p0", 100)
+    # общего у них только незаполненный интерес
+    assert len(result) == 39
+    assert {row["score"] for row in result} == {1.0}
+
+
+def test_unknown_user(populated):
+    assert Recommender().recommend(populated, "nobody") is None
+
+
+def test_excludes_rated_and_deleted(populated):
+    populated.add_all([
+        models.Likes(from_user_tg_id="me", to_user_tg_id="best", is_like=True),
+        models.LikesArchive(id=1, from_user_tg_id="me", to_user_tg_id="good", is_like=False, created_at=datetime(2024, 1, 1)),
+        # чужие оценки не влияют
+        models.Likes(from_user_tg_id="empty", to_user_tg_id="far", is_like=False),
+    ])
+    populated.commit()
+    recommender = Recommender()
+    assert ranked(recommender, populated) == ["empty", "far"]
+
+    soft_delete_user(populated, populated.query(models.Users).filter_by(tg_id="far").one())
+    populated.commit()
+    assert recommender.refresh(populated) == {"changed": 0, "removed": 1}
+    assert ranked(recommender, populated) == ["empty"]
+    assert recommender.recommend(populated, "far") is None
+
+
+def test_refresh_reloads_only_changed_rows(populated):
+    recommender = Recommender()
+    assert ranked(recommender, populated) == ["best", "good", "empty", "far"]
+    assert recommender.refresh(populated) == {"changed": 0, "removed": 0}
+
+    empty = populated.query(models.Users).filter_by(tg_id="empty").one()
+    empty.goal, empty.city, empty.age, empty.version = 1, "Москва", 17, models.Users.version + 1
+    populated.add_all([olymp("empty", "Физика"), olymp("empty", "Информатика", 2)])
+    populated.commit()
+    assert recommender.refresh(populated) == {"changed": 1, "removed": 0}
+    assert ranked(recommender, populated)[:2] == ["best", "empty"]
+
+
+def test_new_user_is_loaded_on_first_request(populated):
+    recommender = Recommender()
+    assert ranked(recommender, populated)[0] == "best"
+    populated.add(models.Users(tg_id="new", goal=1, city="Москва", age=17, gender=False, who_interested=2))
+    populated.add(olymp("new", "Физика"))
+    populated.commit()
+    # строка нового пользователя подгружается его же запросом и сразу видна остальным
+    assert ranked(recommender, populated, "new")[0] == "me"
+    assert "new" in ranked(recommender, populated)
+
+
+def test_endpoint(api):
+    for tg_id in ("u1", "u2", "u3"):
+        assert api.post("/user/create/", params={"tg_id": tg_id}).status_code == 200
+    like = {"from_user_tg_id": "u1", "to_user_tg_id": "u2", "is_like": True}
+    assert api.post("/like/create/", json=like).status_code == 200
+
+    response = api.get("/users/recommend/u1", params={"limit": 5})
+    assert response.status_code == 200
+    assert [row["tg_id"] for row in response.json()] == ["u3"]
+    assert api.get("/users/recommend/missing").status_code == 404
+    assert api.get("/users/recommend/u1", params={"limit": 0}).status_code == 422
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from services.catalog_service import resolve_catalog_id
+from services.search_service import index_user_text, init_text_search, search_users_by_olymps, search_users_by_text
+
+
+def add_olymp(session, tg_id, profile, level, result, year="2025", is_approved=True):
+    session.add(
+        models.Olymps(
+            name=f"Олимпиада {profile}",
+            profile=profile,
+            catalog_id=resolve_catalog_id(session, f"Олимпиада {profile}", profile),
+            level=level,
+            user_tg_id=tg_id,
+            result=result,
+            year=year,
+            is_approved=is_approved,
+        )
+    )
+
+
+@pytest.fixture()
+def populated(db_session):
+    for tg_id in ("u1", "u2", "u3", "u4"):
+        db_session.add(models.Users(tg_id=tg_id))
+    add_olymp(db_session, "u1", "физика", 1, 0)
+    add_olymp(db_session, "u1", "физика", 1, 1)  # вторая подходящая — пользователь не дублируется
+    add_olymp(db_session, "u2", "физика", 1, 2)
+    add_olymp(db_session, "u3", " Физика ", 2, 1)
+    add_olymp(db_session, "u4", "физика", 1, 1, is_approved=False)
+    db_session.commit()
+    return db_session
+
+
+def test_search_by_profile_level_and_result(populated):
+    users = search_users_by_olymps(populated, profile="физика", level=1, max_result=1)
+    assert [u.tg_id for u in users] == ["u1", "u4"]
+
+    users = search_users_by_olymps(populated, profile="физика", level=1, max_result=1, is_approved=True)
+    assert [u.tg_id for u in users] == ["u1"]
+
+
+def test_search_normalizes_profile(populated):
+    assert [u.tg_id for u in search_users_by_olymps(populated, profile="  ФИЗИКА", level=2)] == ["u3"]
+    assert search_users_by_olymps(populated, profile="химия") == []
+
+
+def test_search_keyset_pagination(populated):
+    first = search_users_by_olymps(populated, profile="физика", limit=2)
+    second = search_users_by_olymps(populated, profile="физика", after_id=first[-1].id, limit=2)
+    assert [u.tg_id for u in first + second] == ["u1", "u2", "u3", "u4"]
+    assert search_users_by_olymps(populated, profile="физика", after_id=second[-1].id) == []
+
+
+@pytest.fixture()
+def text_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(models.Users(tg_id="existing", description="Люблю олимпиадное программирование"))
+    session.commit()
+    init_text_search(engine)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_text_search_indexes_existing_and_updated_profiles(text_session):
+    assert [u.tg_id for u in search_users_by_text(text_session, "программирование")] == ["existing"]
+
+    text_session.add(models.Users(tg_id="new", description="Looking for a team in robotics"))
+    index_user_text(text_session, "new")
+    text_session.commit()
+    assert [u.tg_id for u in search_users_by_text(text_session, "Robotics")] == ["new"]
+
+    add_olymp(text_session, "new", "программирование", 1, 0)
+    index_user_text(text_session, "new")
+    text_session.commit()
+    found = [u.tg_id for u in search_users_by_text(text_session, "программирование")]
+    assert sorted(found) == ["existing", "new"]
+
+
+def test_text_search_ignores_fts_syntax(text_session):
+    assert search_users_by_text(text_session, '"') == []
+    assert search_users_by_text(text_session, "программ* OR NOT") == []
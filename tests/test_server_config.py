@@ -0,0 +1,101 @@
+import importlib
+import os
+import runpy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def test_defaults_size_workers_from_available_cpus(monkeypatch):
+    monkeypatch.delenv("GUNICORN_WORKERS", raising=False)
+    config = runpy.run_path(CONFIG)
+    assert 1 <= config["available_cpus"]() <= len(os.sched_getaffinity(0))
+    assert config["workers"] == min(config["available_cpus"](), config["max_workers"]())
+    assert config["worker_class"] == "gunicorn_worker.TunedUvicornWorker"
+    assert config["preload_app"] is True
+    assert config["max_requests"] > 0 and config["max_requests_jitter"] > 0
+
+
+def test_workers_fit_database_connection_budget(monkeypatch):
+    monkeypatch.delenv("GUNICORN_WORKERS", raising=False)
+    # пул 15 соединений + LISTEN на воркер
+    monkeypatch.setenv("GUNICORN_DB_CONNECTIONS", "40")
+    config = runpy.run_path(CONFIG)
+    assert config["max_workers"]() == 2
+    assert config["max_workers"](100) == 6
+    assert config["max_workers"](5) == 1
+    assert config["workers"] <= 2
+
+
+def test_env_overrides(monkeypatch):
+    monkeypatch.setenv("GUNICORN_WORKERS", "3")
+    monkeypatch.setenv("GUNICORN_PRELOAD", "0")
+    monkeypatch.setenv("GUNICORN_KEEPALIVE", "2")
+    config = runpy.run_path(CONFIG)
+    assert (config["workers"], config["preload_app"], config["keepalive"]) == (3, False, 2)
+
+
+def test_post_fork_keeps_in_memory_database():
+    config = runpy.run_path(CONFIG)
+    from database import engine
+
+    with engine.connect():
+        pass
+    pool = engine.pool
+    # in-memory SQLite не сбрасывается: иначе воркер потерял бы созданные мастером таблицы
+    config["post_fork"](None, None)
+    assert engine.pool is pool
+
+
+def test_worker_takes_loop_and_http_from_env():
+    from gunicorn_worker import TunedUvicornWorker
+
+    assert TunedUvicornWorker.CONFIG_KWARGS["loop"] == os.getenv("UVICORN_LOOP", "auto")
+    assert TunedUvicornWorker.CONFIG_KWARGS["http"] == os.getenv("UVICORN_HTTP", "auto")
+
+
+def test_connection_limit_is_off_by_default(monkeypatch):
+    import gunicorn_worker
+
+    # keep-alive и потоки /like/stream/ не должны упираться в размер пула БД
+    monkeypatch.delenv("UVICORN_LIMIT_CONCURRENCY", raising=False)
+    importlib.reload(gunicorn_worker)
+    assert gunicorn_worker.TunedUvicornWorker.CONFIG_KWARGS["limit_concurrency"] is None
+
+    monkeypatch.setenv("UVICORN_LIMIT_CONCURRENCY", "1000")
+    importlib.reload(gunicorn_worker)
+    assert gunicorn_worker.TunedUvicornWorker.CONFIG_KWARGS["limit_concurrency"] == 1000
+    monkeypatch.undo()
+    importlib.reload(gunicorn_worker)
+
+
+def test_db_sessions_are_capped_by_slots(api, monkeypatch):
+    import main
+
+    class SlowRecommender:
+        active = peak = 0
+        lock = threading.Lock()
+
+        def recommend(self, db, tg_id, limit):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.05)
+            with self.lock:
+                self.active -= 1
+            return []
+
+        def maybe_refresh(self, session_factory):
+            pass
+
+    recommender = SlowRecommender()
+    monkeypatch.setattr(main, "recommender", recommender)
+    monkeypatch.setattr(main, "db_slots", anyio.Semaphore(2))
+    with ThreadPoolExecutor(6) as pool:
+        statuses = list(pool.map(lambda n: api.get(f"/users/recommend/u{n}").status_code, range(6)))
+    assert statuses == [200] * 6
+    assert recommender.peak == 2
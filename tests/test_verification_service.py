@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+import models
+from sqlalchemy import update
+from services import verification_service
+from services.verification_service import DiplomaRegistry, verify_pending
+
+HEADER = "name,profile,year,result,last_name,first_name\n"
+
+
+@pytest.fixture()
+def registry(tmp_path, monkeypatch):
+    (tmp_path / "2025.csv").write_text(
+        HEADER
+        + "Физтех,Физика,2025,победитель,Иванов,Пётр\n"
+        + "Высшая  проба,Химия,2025,1,Петрова,Анна\n"
+        + "Высшая проба,Химия,2025,лауреат,Петрова,Анна\n"
+        + "Высшая проба,Химия,2025,²,Петрова,Анна\n",
+        encoding="utf-8",
+    )
+    registry = DiplomaRegistry(str(tmp_path), check_seconds=0)
+    registry.refresh(force=True)
+    monkeypatch.setattr(verification_service, "diploma_registry", registry)
+    return registry
+
+
+def test_registry_normalizes_keys_and_skips_bad_rows(registry):
+    assert registry.matches("физтех", " Физика ", "2025", 0, "ИВАНОВ", "Петр")
+    assert registry.matches("Высшая проба", "химия", "2025", 1, "Петрова", "Анна")
+    assert not registry.matches("Физтех", "Физика", "2025", 1, "Иванов", "Пётр")
+    assert not registry.matches("Физтех", "Физика", "2025", 0, "Иванов", None)
+    assert (len(registry.keys), registry.skipped) == (2, 2)
+
+
+def test_registry_reloads_changed_files(registry, tmp_path):
+    extra = tmp_path / "2024.csv"
+    extra.write_text(HEADER + "Физтех,Физика,2024,призёр,Иванов,Пётр\n", encoding="utf-8")
+    # mtime в будущем: изменение видно даже на ФС с грубым разрешением времени
+    os.utime(extra, (2_000_000_000, 2_000_000_000))
+    registry.refresh()
+    registry.loader.join()
+    assert registry.matches("Физтех", "Физика", "2024", 1, "Иванов", "Пётр")
+    extra.unlink()
+    registry.refresh()
+    registry.loader.join()
+    assert not registry.matches("Физтех", "Физика", "2024", 1, "Иванов", "Пётр")
+
+
+def test_verify_pending_approves_only_matches(db_session, registry):
+    db_session.add_all([
+        models.Users(tg_id="u1", last_name="Иванов", first_name="Пётр"),
+        models.Users(tg_id="u2", last_name="Сидоров", first_name="Иван"),
+    ])
+    for user_tg_id, result, rejected in (("u1", 0, False), ("u1", 1, False), ("u2", 0, False), ("u1", 0, True)):
+        db_session.add(models.Olymps(
+            name="Физтех", profile="Физика", level=1, user_tg_id=user_tg_id, result=result, year="2025",
+            is_rejected=rejected,
+        ))
+    db_session.commit()
+
+    assert verify_pending(db_session, batch_size=2) == 1
+    assert [o.id for o in db_session.query(models.Olymps).filter_by(is_approved=True)] == [1]
+
+
+def test_create_olymp_is_approved_by_registry(api, registry):
+    api.post("/user/create/", params={"tg_id": "u1"})
+    api.put("/user/update/", json={"tg_id": "u1", "last_name": "Иванов", "first_name": "Пётр"})
+    olymp = {"name": "Физтех", "profile": "Физика", "level": 1, "user_tg_id": "u1", "result": 0, "year": "2025"}
+    assert api.post("/olymp/create/", json=olymp).json()["is_approved"] is True
+    assert api.post("/olymp/create/", json={**olymp, "result": 1}).json()["is_approved"] is False
+
+
+def test_verify_pending_keeps_rejection_made_meanwhile(db_session, registry, monkeypatch):
+    db_session.add(models.Users(tg_id="u1", last_name="Иванов", first_name="Пётр"))
+    db_session.add(models.Olymps(name="Физтех", profile="Физика", level=1, user_tg_id="u1", result=0, year="2025"))
+    db_session.commit()
+    matches = registry.matches
+
+    def reject_then_match(*args):
+        # модератор отклоняет олимпиаду между выборкой очереди и одобрением
+        db_session.execute(update(models.Olymps).where(models.Olymps.id == 1).values(is_rejected=True))
+        return matches(*args)
+
+    monkeypatch.setattr(registry, "matches", reject_then_match)
+    assert verify_pending(db_session) == 0
+    olymp = db_session.get(models.Olymps, 1)
+    assert (olymp.is_approved, olymp.is_rejected) == (False, True)